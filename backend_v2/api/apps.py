@@ -1,6 +1,26 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import post_migrate
 
 
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+        from .search import install_search_index_after_migrate
+        post_migrate.connect(install_search_index_after_migrate, sender=self)
+
+        # Matching indeksi versiyasi so'rov davomida bir marta o'qiladi
+        from .rfq_matching import rfq_matching_engine
+        request_started.connect(rfq_matching_engine.begin_request, dispatch_uid='rfq_matching_begin')
+        request_finished.connect(rfq_matching_engine.end_request, dispatch_uid='rfq_matching_end')
+
+        # Odatda tashqi xizmatlar birinchi ishlatilganda yaratiladi
+        if getattr(settings, 'SERVICES_EAGER_INIT', False):
+            from .firebase_service import firebase_service
+            from .sms_service import sms_service
+            firebase_service.initialize()
+            sms_service.initialize()
@@ -0,0 +1,179 @@
+"""
+Authentication - JWT + keshlangan foydalanuvchi snapshoti
+
+Access token role, supplier_type, company_id va is_staff claimlarini o'z ichiga oladi
+(mijoz uchun). Har bir so'rovda foydalanuvchi quyidagi tartibda aniqlanadi:
+    1. process xotirasi (AUTH_SNAPSHOT_LOCAL_TTL soniya)
+    2. umumiy kesh (Redis, AUTH_SNAPSHOT_TTL soniya)
+    3. ma'lumotlar bazasi - bitta so'rov, snapshot keshlarga yoziladi
+`request.user.role == User.UserRole.BUYER` kabi tekshiruvlar DB ga murojaat qilmaydi.
+
+Foydalanuvchi hech qachon faqat token claimlaridan qurilmaydi: kesh bo'sh bo'lsa
+(restart, boshqa worker, eviction) is_active va rol doim bazadan o'qiladi.
+User yoki Company saqlanganda/o'chirilganda snapshot o'chiriladi (signals.py).
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import DEFERRED
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Company, User
+from .rate_limit import get_client_ip
+
+AUTH_CACHE_ALIAS = getattr(settings, 'AUTH_CACHE_ALIAS', 'default')
+SNAPSHOT_TTL = getattr(settings, 'AUTH_SNAPSHOT_TTL', 300)
+SNAPSHOT_LOCAL_TTL = getattr(settings, 'AUTH_SNAPSHOT_LOCAL_TTL', 5)
+# Tokenga yoziladigan claimlar (User maydoni yoki company_id)
+CLAIM_FIELDS = ('role', 'supplier_type', 'company_id', 'is_staff')
+# Snapshotga kirmaydigan maydonlar (kerak bo'lsa alohida yuklanadi)
+SNAPSHOT_EXCLUDE = {'password'}
+
+
+def user_claims(user):
+    """Foydalanuvchining token claimlari"""
+    company_id = getattr(user, 'company_id', None)
+    if company_id is None:
+        company_id = Company.objects.filter(user_id=user.pk).values_list('id', flat=True).first()
+    return {
+        'role': user.role,
+        'supplier_type': user.supplier_type,
+        'company_id': company_id,
+        'is_staff': user.is_staff,
+    }
+
+
+class SnapshotRefreshToken(RefreshToken):
+    """Claimlar refresh tokenga yoziladi va undan olinadigan access tokenlarga ko'chadi"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim, value in user_claims(user).items():
+            token[claim] = value
+        return token
+
+
+class SnapshotTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = SnapshotRefreshToken
+
+    def get_token(self, user):
+        """Login - yangi UserSession, uning id si `session_id` claimiga"""
+        from .session_tracker import SESSION_CLAIM, session_tracker
+
+        token = super().get_token(user)
+        request = self.context.get('request')
+        if request is not None:
+            token[SESSION_CLAIM] = session_tracker.start(user, request).id
+        return token
+
+
+class UserSnapshotCache:
+
+    def __init__(self, cache_alias=AUTH_CACHE_ALIAS, ttl=SNAPSHOT_TTL, local_ttl=SNAPSHOT_LOCAL_TTL):
+        self.cache_alias = cache_alias
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self._local = {}
+        self._lock = threading.Lock()
+        self.fields = [
+            field.attname for field in User._meta.concrete_fields if field.attname not in SNAPSHOT_EXCLUDE
+        ]
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    @staticmethod
+    def _key(user_id):
+        return f'auth:user:{user_id}'
+
+    def get_user(self, user_id):
+        """Foydalanuvchini snapshot yoki DB dan olish. Topilmasa None"""
+        user_id = int(user_id)
+        now = time.monotonic()
+        local = self._local.get(user_id)
+        if local is not None and local[0] > now:
+            return self.build(local[1])
+
+        snapshot = self.cache.get(self._key(user_id))
+        if snapshot is None:
+            snapshot = self.load(user_id)
+            if snapshot is None:
+                return None
+            self.cache.set(self._key(user_id), snapshot, self.ttl)
+        with self._lock:
+            self._local[user_id] = (now + self.local_ttl, snapshot)
+        return self.build(snapshot)
+
+    def load(self, user_id):
+        """Snapshot DB dan - bitta so'rov (kompaniya id si bilan)"""
+        row = User.objects.filter(pk=user_id).values(*self.fields, 'company__id').first()
+        if row is None:
+            return None
+        row['company_id'] = row.pop('company__id')
+        return row
+
+    def build(self, snapshot):
+        """Snapshotdan User obyekti (DB ga murojaatsiz, password kechiktirilgan)"""
+        user = User.from_db(
+            'default', None,
+            [snapshot.get(field.attname, DEFERRED) for field in User._meta.concrete_fields]
+        )
+        self._set_company(user, snapshot.get('company_id'))
+        return user
+
+    @staticmethod
+    def _set_company(user, company_id):
+        user.company_id = company_id
+        if company_id is None:
+            # user.company so'rovsiz Company.DoesNotExist beradi
+            User.company.related.set_cached_value(user, None)
+
+    def invalidate(self, user_id):
+        """User/Company o'zgarganda snapshotni o'chirish"""
+        with self._lock:
+            self._local.pop(user_id, None)
+        self.cache.delete(self._key(user_id))
+
+
+# Global instance
+user_snapshots = UserSnapshotCache()
+
+
+class SnapshotJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication - foydalanuvchi keshlangan snapshotdan (bo'lmasa DB dan).
+    Token sessiyasining faolligi write-behind bufer orqali qayd etiladi.
+    """
+
+    def authenticate(self, request):
+        from .session_tracker import SESSION_CLAIM, session_tracker
+
+        result = super().authenticate(request)
+        if result is not None and result[1].get(SESSION_CLAIM):
+            session_tracker.touch(result[1][SESSION_CLAIM], get_client_ip(request))
+        return result
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Parol xeshini tekshirish to'liq User talab qiladi
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken("Token contained no recognizable user identification") from e
+
+        user = user_snapshots.get_user(user_id)
+        if user is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
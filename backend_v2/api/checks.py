@@ -0,0 +1,59 @@
+"""
+System checks - jarayonlar o'rtasida umumiy bo'lishi kerak bo'lgan kesh
+
+OTP kodlari, rate limit hisoblagichlari, auth snapshotlari va mahsulot
+ko'rishlari keshda saqlanadi. Process xotirasidagi kesh (LocMemCache) bilan bir nechta
+worker (gunicorn, celery, manage.py buyruqlari) bir-birining yozuvlarini ko'rmaydi:
+bitta workerda berilgan OTP boshqasida EXPIRED, flush_product_views ko'rishlarni topmaydi.
+SHARED_CACHE_REQUIRED (production da standart) bo'lsa bunday sozlama xato hisoblanadi.
+"""
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Process xotirasidagi (umumiy bo'lmagan) kesh backendlari
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_process_local(alias):
+    """Kesh alias process xotirasida (boshqa processlar ko'rmaydi)"""
+    return settings.CACHES.get(alias, {}).get('BACKEND', '') in LOCAL_CACHE_BACKENDS
+
+
+def shared_cache_users():
+    """{kesh alias: [uni ishlatuvchi xizmatlar]}"""
+    from .authentication import AUTH_CACHE_ALIAS
+    from .otp_store import OTP_CACHE_ALIAS
+    from .product_view_counter import PRODUCT_VIEW_CACHE_ALIAS
+    from .rate_limit import RATE_LIMIT_CACHE_ALIAS
+
+    users = {}
+    for alias, feature in [
+        (OTP_CACHE_ALIAS, 'OTP'),
+        (RATE_LIMIT_CACHE_ALIAS, 'rate limit'),
+        (AUTH_CACHE_ALIAS, 'auth snapshot'),
+        (PRODUCT_VIEW_CACHE_ALIAS, "mahsulot ko'rishlari"),
+    ]:
+        users.setdefault(alias, []).append(feature)
+    return users
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if not getattr(settings, 'SHARED_CACHE_REQUIRED', False):
+        return []
+    errors = []
+    for alias, features in shared_cache_users().items():
+        if is_process_local(alias):
+            backend = settings.CACHES[alias]['BACKEND']
+            errors.append(Error(
+                f"'{alias}' keshi ({backend}) processlar o'rtasida umumiy emas, "
+                f"lekin {', '.join(features)} uchun ishlatiladi",
+                hint="REDIS_URL ni bering (yoki CACHES da umumiy backend sozlang); "
+                     "bitta processli muhitda SHARED_CACHE_REQUIRED=False",
+                id='api.E001',
+            ))
+    return errors
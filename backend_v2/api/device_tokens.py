@@ -0,0 +1,85 @@
+"""
+Device token registry - foydalanuvchi qurilmalarining FCM tokenlari
+
+Push yuborishda barcha qabul qiluvchilarning tokenlari bitta so'rov bilan olinadi.
+FCM UNREGISTERED / INVALID_ARGUMENT javobini qaytargan tokenlar paketlab o'chiriladi -
+o'lik qurilmalarga qayta yuborilmaydi.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DeviceToken
+
+logger = logging.getLogger(__name__)
+
+# Bitta foydalanuvchiga push yuboriladigan qurilmalar soni (eng oxirgi faollari)
+MAX_TOKENS_PER_USER = getattr(settings, 'DEVICE_TOKENS_PER_USER', 10)
+# FCM ning token yaroqsizligini bildiruvchi xato kodlari
+STALE_TOKEN_CODES = {'UNREGISTERED', 'INVALID_ARGUMENT'}
+
+
+def fcm_error_code(exception):
+    """FCM xatosi kodi: firebase_admin UnregisteredError, FirebaseError.code yoki xato matni"""
+    if exception is None:
+        return ''
+    if exception.__class__.__name__ == 'UnregisteredError':
+        return 'UNREGISTERED'
+    code = getattr(exception, 'code', None)
+    if isinstance(code, str) and code:
+        return code.upper().replace('-', '_')
+    return str(exception)
+
+
+class DeviceTokenRegistry:
+    prune_batch_size = 500
+
+    def register(self, user, token, platform=''):
+        """Tokenni ro'yxatga olish (boshqa foydalanuvchida bo'lsa shu foydalanuvchiga o'tadi)"""
+        device, _ = DeviceToken.objects.update_or_create(
+            token=token,
+            defaults={
+                'user': user,
+                'platform': platform or '',
+                'last_seen': timezone.now(),
+            }
+        )
+        return device
+
+    def unregister(self, user, token):
+        return DeviceToken.objects.filter(user=user, token=token).delete()[0]
+
+    def tokens_for(self, user_ids):
+        """{user_id: [token, ...]} - eng oxirgi faol qurilmalar birinchi, bitta so'rov"""
+        tokens = {}
+        user_ids = {user_id for user_id in user_ids if user_id}
+        if not user_ids:
+            return tokens
+        rows = DeviceToken.objects.filter(user_id__in=user_ids).order_by(
+            'user_id', '-last_seen', '-id'
+        ).values_list('user_id', 'token')
+        for user_id, token in rows:
+            user_tokens = tokens.setdefault(user_id, [])
+            if len(user_tokens) < MAX_TOKENS_PER_USER:
+                user_tokens.append(token)
+        return tokens
+
+    def prune(self, tokens):
+        """Yaroqsiz tokenlarni paketlab o'chirish. Qaytaradi: o'chirilganlar soni"""
+        tokens = list(set(tokens))
+        deleted = 0
+        for offset in range(0, len(tokens), self.prune_batch_size):
+            with transaction.atomic():
+                deleted += DeviceToken.objects.filter(
+                    token__in=tokens[offset:offset + self.prune_batch_size]
+                ).delete()[0]
+        if deleted:
+            logger.info(f"{deleted} ta yaroqsiz device token o'chirildi")
+        return deleted
+
+
+# Global instance
+device_tokens = DeviceTokenRegistry()
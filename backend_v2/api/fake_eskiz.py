@@ -0,0 +1,116 @@
+"""
+Fake Eskiz server - testlar va benchmark uchun mahalliy Eskiz API o'rnini bosuvchi
+
+httpx transporti sifatida ulanadi (tarmoq ishlatilmaydi):
+    server = FakeEskizServer(latency_ms=50)
+    EskizTransport(email, password, transport=server.transport(),
+                   async_transport=server.async_transport())
+
+/auth/login, /auth/refresh va /message/sms/send ni qo'llaydi. Tokenlar JWT ko'rinishida
+(exp bilan) beriladi; expire_tokens() barcha tokenlarni bekor qiladi (401 holatini
+tekshirish uchun). "99800" bilan boshlanadigan raqamlar 400 xatosini qaytaradi.
+"""
+
+import asyncio
+import base64
+import json
+import threading
+import time
+from urllib.parse import parse_qs
+
+import httpx
+
+
+class FakeEskizServer:
+
+    def __init__(self, latency_ms=0, token_ttl=30 * 24 * 60 * 60, email='test@example.com',
+                 password='secret'):
+        self.latency_ms = latency_ms
+        self.token_ttl = token_ttl
+        self.email = email
+        self.password = password
+        self.sent = []
+        self.logins = 0
+        self.refreshes = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._tokens = set()
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def transport(self):
+        return httpx.MockTransport(self.handle)
+
+    def async_transport(self):
+        return httpx.MockTransport(self.ahandle)
+
+    def issue_token(self, ttl=None):
+        with self._lock:
+            self._counter += 1
+            payload = {'sub': self.email, 'n': self._counter, 'exp': int(time.time() + (ttl or self.token_ttl))}
+            token = 'fake.' + base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=') + '.sig'
+            self._tokens.add(token)
+        return token
+
+    def expire_tokens(self):
+        with self._lock:
+            self._tokens.clear()
+
+    def handle(self, request):
+        self._enter()
+        try:
+            if self.latency_ms:
+                time.sleep(self.latency_ms / 1000)
+            return self.respond(request)
+        finally:
+            self._exit()
+
+    async def ahandle(self, request):
+        self._enter()
+        try:
+            if self.latency_ms:
+                await asyncio.sleep(self.latency_ms / 1000)
+            return self.respond(request)
+        finally:
+            self._exit()
+
+    def _enter(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _authorized(self, request):
+        token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        with self._lock:
+            return token in self._tokens
+
+    def respond(self, request):
+        path = request.url.path.rsplit('/api', 1)[-1]
+        form = {key: values[0] for key, values in parse_qs(request.content.decode()).items()}
+
+        if path == '/auth/login':
+            if form.get('email') != self.email or form.get('password') != self.password:
+                return httpx.Response(401, json={'message': 'Invalid credentials'})
+            self.logins += 1
+            return httpx.Response(200, json={'message': 'token_generated', 'data': {'token': self.issue_token()}})
+
+        if not self._authorized(request):
+            return httpx.Response(401, json={'status': 'token-invalid', 'message': 'Token is invalid'})
+
+        if path == '/auth/refresh':
+            self.refreshes += 1
+            return httpx.Response(200, json={'message': 'token_generated', 'data': {'token': self.issue_token()}})
+
+        if path == '/message/sms/send':
+            if form.get('mobile_phone', '').startswith('99800'):
+                return httpx.Response(400, json={'status': 'error', 'message': 'Invalid phone number'})
+            with self._lock:
+                self.sent.append(form)
+                message_id = len(self.sent)
+            return httpx.Response(200, json={'id': str(message_id), 'status': 'waiting', 'message': 'Waiting for SMS provider'})
+
+        return httpx.Response(404, json={'message': 'Not found'})
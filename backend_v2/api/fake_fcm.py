@@ -0,0 +1,84 @@
+"""
+Fake FCM - benchmark va testlar uchun mahalliy FCM o'rnini bosuvchi
+
+firebase_service bilan bir xil send_each_for_multicast, send_topic_notification va
+subscribe_to_topic / unsubscribe_from_topic interfeysiga ega.
+Tarmoq kechikishi har bir chaqiruvga sleep bilan taqlid qilinadi; "invalid"
+bilan boshlanadigan tokenlar UNREGISTERED, "malformed" bilan boshlanadiganlari
+INVALID_ARGUMENT xatosini qaytaradi.
+"""
+
+import time
+from types import SimpleNamespace
+
+
+class FakeFCMError(Exception):
+    """FCM xatosi (firebase_admin kabi .code bilan)"""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+class FakeFCMClient:
+
+    def __init__(self, latency_ms=0, batch_limit=500):
+        self.latency_ms = latency_ms
+        self.batch_limit = batch_limit
+        self.calls = []
+        self.topic_calls = []
+
+    def send_each_for_multicast(self, device_tokens, title, body, data=None):
+        if len(device_tokens) > self.batch_limit:
+            raise ValueError(f"Bir chaqiruvda ko'pi bilan {self.batch_limit} ta token yuboriladi")
+        self.calls.append({'tokens': list(device_tokens), 'title': title, 'data': data or {}})
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        responses = []
+        for index, token in enumerate(device_tokens):
+            if token.startswith(('invalid', 'malformed')):
+                code = 'UNREGISTERED' if token.startswith('invalid') else 'INVALID_ARGUMENT'
+                responses.append(SimpleNamespace(
+                    success=False, message_id=None, exception=FakeFCMError(code)
+                ))
+            else:
+                responses.append(SimpleNamespace(
+                    success=True, message_id=f'fake-{len(self.calls)}-{index}', exception=None
+                ))
+        success_count = sum(1 for response in responses if response.success)
+        return SimpleNamespace(
+            responses=responses,
+            success_count=success_count,
+            failure_count=len(responses) - success_count
+        )
+
+    def send_topic_notification(self, topic, title, body, data=None):
+        self.calls.append({'topic': topic, 'title': title, 'data': data or {}})
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return f'fake-topic-{len(self.calls)}'
+
+    def _manage_topic(self, action, device_tokens, topic):
+        if len(device_tokens) > 1000:
+            raise ValueError("Bir chaqiruvda ko'pi bilan 1000 ta token")
+        self.topic_calls.append({'action': action, 'topic': topic, 'tokens': list(device_tokens)})
+        errors = [
+            SimpleNamespace(index=index, reason='registration-token-not-registered')
+            for index, token in enumerate(device_tokens) if token.startswith('invalid')
+        ]
+        return SimpleNamespace(
+            success_count=len(device_tokens) - len(errors), failure_count=len(errors), errors=errors
+        )
+
+    def subscribe_to_topic(self, device_tokens, topic):
+        return self._manage_topic('subscribe', device_tokens, topic)
+
+    def unsubscribe_from_topic(self, device_tokens, topic):
+        return self._manage_topic('unsubscribe', device_tokens, topic)
+
+    def send_notification(self, device_token, title, body, data=None):
+        response = self.send_each_for_multicast([device_token], title, body, data).responses[0]
+        if not response.success:
+            raise response.exception
+        return response.message_id
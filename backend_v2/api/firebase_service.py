@@ -3,9 +3,17 @@ from firebase_admin import credentials, messaging
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 import logging
+import os
+
+from .lazy_service import LazyService
 
 logger = logging.getLogger(__name__)
 
+# FCM multicast chegarasi
+MULTICAST_BATCH_SIZE = 500
+# Firebase app yaratilgan process (fork dan keyin bola process o'z app ini yaratadi)
+_app_pid = None
+
 
 class FirebaseService:
     """
@@ -39,11 +47,15 @@ class FirebaseService:
                 "token_uri": config['TOKEN_URI'],
             })
             
-            # Firebase app ni ishga tushirish
+            # Firebase app ni ishga tushirish (ota processdan meros qolgan app qayta yaratiladi)
+            global _app_pid
+            if firebase_admin._apps and _app_pid not in (None, os.getpid()):
+                firebase_admin.delete_app(firebase_admin.get_app())
             if not firebase_admin._apps:
                 self.app = firebase_admin.initialize_app(cred)
             else:
                 self.app = firebase_admin.get_app()
+            _app_pid = os.getpid()
             
             logger.info("Firebase Admin SDK initialized successfully")
             
@@ -150,8 +162,8 @@ class FirebaseService:
                 data=data or {}
             )
             
-            # Yuborish
-            response = messaging.send_multicast(message)
+            # Yuborish (bir chaqiruvda ko'pi bilan 500 ta token)
+            response = messaging.send_each_for_multicast(message)
             logger.info(f"Multicast notification sent: {response.success_count}/{len(device_tokens)}")
             return response
             
@@ -159,6 +171,15 @@ class FirebaseService:
             logger.error(f"Multicast notification failed: {str(e)}")
             raise Exception(f"Multicast notification failed: {str(e)}")
     
+    def send_each_for_multicast(self, device_tokens, title, body, data=None):
+        """
+        Bir xil xabarni ko'p tokenga yuborish (500 tadan oshmasligi kerak).
+        Har bir token natijasi response.responses da tokenlar tartibida qaytadi.
+        """
+        if len(device_tokens) > MULTICAST_BATCH_SIZE:
+            raise ValueError(f"Bir chaqiruvda ko'pi bilan {MULTICAST_BATCH_SIZE} ta token yuboriladi")
+        return self.send_multicast_notification(device_tokens, title, body, data)
+    
     def send_topic_notification(self, topic, title, body, data=None):
         """
         Topic bo'yicha push notification yuborish
@@ -252,5 +273,5 @@ class FirebaseService:
             raise Exception(f"Topic unsubscription failed: {str(e)}")
 
 
-# Global Firebase service instance
-firebase_service = FirebaseService()
+# Global Firebase service instance (birinchi murojaatda, har bir processda alohida yaratiladi)
+firebase_service = LazyService(FirebaseService)
@@ -0,0 +1,57 @@
+"""
+LazyService - global xizmatlar (Firebase, Eskiz) uchun kechiktirilgan proxy
+
+Xizmat obyekti birinchi atributga murojaatda yaratiladi - modul importi,
+`manage.py check` va worker ishga tushishi tashqi SDK larni sozlashni kutmaydi.
+Nusxa har bir process uchun alohida: fork dan keyin (gunicorn/celery pre-fork)
+bola processda qayta yaratiladi, ota processning ulanishlari ishlatilmaydi.
+"""
+
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class LazyService:
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._instance = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def _setup(self):
+        # register_at_fork bo'lmagan platformalar uchun pid ham tekshiriladi
+        if self._instance is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._instance = None
+                    self._pid = os.getpid()
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    @property
+    def initialized(self):
+        return self._instance is not None and self._pid == os.getpid()
+
+    def initialize(self):
+        """Oldindan yaratish (SERVICES_EAGER_INIT). Xato loglanadi, keyingi murojaatda qayta urinadi"""
+        try:
+            self._setup()
+        except Exception as e:
+            logger.error(f"{self._factory.__name__} ni ishga tushirib bo'lmadi: {str(e)}")
+
+    def __getattr__(self, name):
+        return getattr(self._setup(), name)
+
+    def __repr__(self):
+        state = 'tayyor' if self.initialized else 'yaratilmagan'
+        return f"<LazyService {self._factory.__name__} ({state})>"
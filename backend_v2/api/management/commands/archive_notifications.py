@@ -0,0 +1,23 @@
+"""
+Eski notificationlarni arxiv jadvaliga ko'chirish (cron yoki celery beat orqali)
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.notification_retention import notification_retention
+
+
+class Command(BaseCommand):
+    help = "Retention muddatidan eski notificationlarni bo'laklab arxivlash va arxivni tozalash"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=notification_retention.default_chunk_size
+        )
+
+    def handle(self, *args, **options):
+        stats = notification_retention.run(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['archived']} ta arxivlandi, {stats['purged']} ta arxivdan o'chirildi, "
+            f"{stats['chunks']} ta bo'lak, {stats['duration_ms']} ms"
+        ))
@@ -0,0 +1,138 @@
+"""
+Bulk notification fan-out benchmark (mahalliy fake FCM bilan)
+
+Misol:
+    python manage.py benchmark_notification_fanout --recipients 5000 --fcm-latency-ms 80
+
+Barcha ma'lumotlar tranzaksiya ichida yaratiladi va oxirida rollback qilinadi.
+"""
+
+import time
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.fake_fcm import FakeFCMClient
+from api.models import DeviceToken, Notification, NotificationOutbox, User
+from api.notification_outbox import NotificationOutboxService, send_push_batch
+from api.notification_service import NotificationService
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Bulk notification yaratish va FCM multicast yuborishni fake FCM bilan o'lchash"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=5000)
+        parser.add_argument('--fcm-latency-ms', type=float, default=50.0,
+                            help="Fake FCM ning har bir chaqiruvdagi kechikishi")
+        parser.add_argument('--invalid-every', type=int, default=100,
+                            help="Har N-token yaroqsiz (0 - hammasi yaroqli)")
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Worker bir paketda egallaydigan yozuvlar soni")
+        parser.add_argument('--legacy-sample', type=int, default=100,
+                            help="Eski (har bir qabul qiluvchi alohida) yo'l uchun o'lchanadigan namuna")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        recipients = options['recipients']
+        invalid_every = options['invalid_every']
+        fcm = FakeFCMClient(latency_ms=options['fcm_latency_ms'])
+        outbox = NotificationOutboxService(
+            batch_senders={NotificationOutbox.Channel.PUSH: partial(send_push_batch, client=fcm)}
+        )
+
+        users = User.objects.bulk_create([
+            User(
+                username=f'bench_{index}',
+                phone=f'+99899{index:07d}',
+                role=User.UserRole.SUPPLIER,
+                password='!',
+                device_token=(
+                    f'invalid-{index}' if invalid_every and index % invalid_every == 0
+                    else f'token-{index}'
+                )
+            )
+            for index in range(recipients)
+        ], batch_size=1000)
+        DeviceToken.objects.bulk_create(
+            [DeviceToken(user=user, token=user.device_token) for user in users], batch_size=1000
+        )
+
+        # Bulk yo'l: yozish
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            NotificationService.send_bulk_notification(
+                notification_type=Notification.NotificationType.NEW_RFQ,
+                title="Yangi so'rov",
+                message='Benchmark',
+                recipient_users=users,
+                delivery_method=Notification.DeliveryMethod.PUSH_ONLY
+            )
+        enqueue_ms = (time.perf_counter() - started) * 1000
+        enqueue_queries = len(queries)
+
+        # Bulk yo'l: worker
+        started = time.perf_counter()
+        totals = {'claimed': 0, 'sent': 0, 'retried': 0, 'failed': 0}
+        with CaptureQueriesContext(connection) as queries:
+            while True:
+                stats = outbox.run_once(batch_size=options['batch_size'], worker_id='benchmark')
+                if not stats['claimed']:
+                    break
+                for key in totals:
+                    totals[key] += stats[key]
+        deliver_ms = (time.perf_counter() - started) * 1000
+        deliver_queries = len(queries)
+
+        # Eski yo'l: har bir qabul qiluvchi uchun INSERT + sinxron push + UPDATE
+        sample = users[:min(options['legacy_sample'], recipients)]
+        legacy_fcm = FakeFCMClient(latency_ms=options['fcm_latency_ms'])
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            for user in sample:
+                notification = Notification.objects.create(
+                    type=Notification.NotificationType.NEW_RFQ,
+                    title="Yangi so'rov",
+                    message='Benchmark',
+                    recipient_user=user,
+                    delivery_method=Notification.DeliveryMethod.PUSH_ONLY
+                )
+                try:
+                    legacy_fcm.send_notification(user.device_token, notification.title, notification.message)
+                except Exception:
+                    pass
+                notification.mark_as_sent()
+        legacy_ms = (time.perf_counter() - started) * 1000
+        scale = recipients / max(len(sample), 1)
+
+        self.stdout.write(f"Qabul qiluvchilar: {recipients}, fake FCM kechikishi: {fcm.latency_ms} ms")
+        self.stdout.write(
+            f"Bulk yozish:   {enqueue_ms:9.1f} ms, {enqueue_queries} ta so'rov"
+        )
+        self.stdout.write(
+            f"Bulk yuborish: {deliver_ms:9.1f} ms, {deliver_queries} ta so'rov, "
+            f"{len(fcm.calls)} ta FCM chaqiruvi "
+            f"(yuborildi {totals['sent']}, qayta urinish {totals['retried']}, xato {totals['failed']})"
+        )
+        self.stdout.write(
+            f"Eski yo'l ({len(sample)} ta namuna -> {recipients} ga hisoblangan): "
+            f"{legacy_ms * scale:9.1f} ms, {int(len(queries) * scale)} ta so'rov, "
+            f"{int(len(legacy_fcm.calls) * scale)} ta FCM chaqiruvi"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Tezlanish: {legacy_ms * scale / max(enqueue_ms + deliver_ms, 0.001):.1f}x "
+            "(ma'lumotlar rollback qilindi)"
+        ))
@@ -0,0 +1,103 @@
+"""
+Sessiya faolligini yozish benchmarki: har so'rovda UPDATE va write-behind bufer
+
+Misol:
+    python manage.py benchmark_session_tracking --sessions 200 --requests 2000
+
+Autentifikatsiyalangan yengil endpointga (notifications/unread-count) Django test client
+orqali so'rovlar yuboriladi; har bir so'rov tasodifiy sessiya tokeni bilan.
+Barcha ma'lumotlar tranzaksiya ichida yaratiladi va oxirida rollback qilinadi.
+"""
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api.authentication import SnapshotRefreshToken
+from api.models import User, UserSession
+from api.session_tracker import SESSION_CLAIM, session_tracker
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "So'rov o'tkazuvchanligini har so'rovda yozish va paketlab yozish bilan solishtirish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--flush-interval', type=float, default=1.0,
+                            help="Write-behind bufer yozilish oralig'i (soniya)")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        users = User.objects.bulk_create([
+            User(username=f'session_bench_{index}', phone=f'+99898{index:07d}',
+                 role=User.UserRole.BUYER, password='!')
+            for index in range(options['sessions'])
+        ], batch_size=1000)
+        sessions = UserSession.objects.bulk_create([
+            UserSession(user=user, ip_address='127.0.0.1', user_agent='benchmark') for user in users
+        ], batch_size=1000)
+        headers = []
+        for user, session in zip(users, sessions):
+            token = SnapshotRefreshToken.for_user(user)
+            token[SESSION_CLAIM] = session.id
+            headers.append({'HTTP_AUTHORIZATION': f'Bearer {token.access_token}'})
+
+        client = Client(REMOTE_ADDR='10.0.0.1')
+        url = reverse('notification-unread-count')
+        # Snapshot keshlarini isitish (ikkala rejim teng sharoitda)
+        for header in headers:
+            client.get(url, **header)
+
+        results = {}
+        original = (session_tracker.write_behind, session_tracker.flush_interval)
+        try:
+            for label, write_behind in (("har so'rovda UPDATE", False), ('write-behind bufer', True)):
+                session_tracker.flush()
+                session_tracker.write_behind = write_behind
+                session_tracker.flush_interval = options['flush_interval']
+                results[label] = self.measure(client, url, headers, options['requests'])
+        finally:
+            session_tracker.write_behind, session_tracker.flush_interval = original
+            session_tracker.flush()
+
+        self.stdout.write(f"Sessiyalar: {len(sessions)}, so'rovlar: {options['requests']}")
+        for label, (elapsed, writes) in results.items():
+            self.stdout.write(
+                f"{label:20} {options['requests'] / elapsed:9.1f} so'rov/s, "
+                f"{writes} ta user_sessions UPDATE"
+            )
+        (before, _), (after, _) = results.values()
+        self.stdout.write(self.style.SUCCESS(
+            f"Tezlanish: {before / max(after, 0.000001):.2f}x (ma'lumotlar rollback qilindi)"
+        ))
+
+    def measure(self, client, url, headers, requests):
+        rng = random.Random(42)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(requests):
+                client.get(url, **rng.choice(headers))
+            session_tracker.flush()
+            elapsed = time.perf_counter() - started
+        writes = sum(
+            1 for query in queries
+            if query['sql'].startswith('UPDATE') and 'user_sessions' in query['sql']
+        )
+        return elapsed, writes
@@ -0,0 +1,66 @@
+"""
+Ishga tushish vaqti benchmarki: tashqi xizmatlar lazy (standart) va eager holatda
+
+Misol:
+    python manage.py benchmark_startup --repeat 5
+
+Har bir o'lchov alohida processda bajariladi:
+    - `manage.py check`
+    - WSGI worker boot (core.wsgi + URLconf importi; gunicorn o'rnatilgan bo'lsa
+      `gunicorn --check-config --preload` ham o'lchanadi)
+Eager holat SERVICES_EAGER_INIT=true bilan (Firebase/Eskiz process boshida yaratiladi).
+"""
+
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+WSGI_BOOT = 'from core.wsgi import application; import core.urls'
+
+
+class Command(BaseCommand):
+    help = "manage.py check va WSGI worker ishga tushish vaqtini lazy/eager xizmatlar bilan o'lchash"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        repeat = max(options['repeat'], 1)
+        commands = [
+            ('manage.py check', [sys.executable, 'manage.py', 'check']),
+            ('WSGI worker boot', [sys.executable, '-c', WSGI_BOOT]),
+        ]
+        gunicorn = shutil.which('gunicorn')
+        if gunicorn:
+            commands.append((
+                'gunicorn --check-config',
+                [gunicorn, '--check-config', '--preload', 'core.wsgi:application']
+            ))
+        else:
+            self.stdout.write(self.style.WARNING("gunicorn topilmadi - faqat WSGI boot o'lchanadi"))
+
+        for label, command in commands:
+            lazy = self.measure(command, repeat, eager=False)
+            eager = self.measure(command, repeat, eager=True)
+            self.stdout.write(
+                f"{label:24} eager {eager:8.1f} ms -> lazy {lazy:8.1f} ms "
+                f"({eager - lazy:+.1f} ms tejaldi, median {repeat} ta ishga tushirish)"
+            )
+
+    def measure(self, command, repeat, eager):
+        env = dict(os.environ, SERVICES_EAGER_INIT='true' if eager else 'false')
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            subprocess.run(
+                command, cwd=settings.BASE_DIR, env=env,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
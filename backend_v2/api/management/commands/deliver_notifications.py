@@ -0,0 +1,50 @@
+"""
+Notification outbox worker - navbatdagi push/SMS xabarlarni yuborish
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.notification_outbox import default_worker_id, notification_outbox
+
+
+class Command(BaseCommand):
+    help = "Notification outbox navbatini paketlab yuborish (doimiy sikl yoki --once)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=notification_outbox.default_batch_size)
+        parser.add_argument(
+            '--interval', type=float, default=2.0,
+            help="Navbat bo'sh bo'lganda kutish (soniya)"
+        )
+        parser.add_argument('--once', action='store_true', help="Bitta paketni yuborib chiqish")
+        parser.add_argument('--worker-id', default=None)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        worker_id = options['worker_id'] or default_worker_id()
+
+        try:
+            while True:
+                stats = notification_outbox.run_once(batch_size=batch_size, worker_id=worker_id)
+                if stats['claimed']:
+                    self.stdout.write(
+                        f"{stats['claimed']} ta egallandi, {stats['sent']} yuborildi "
+                        f"({stats['coalesced']} tasi digest ichida), "
+                        f"{stats['retried']} qayta urinishga, {stats['failed']} muvaffaqiyatsiz, "
+                        f"{stats['skipped']} manzilsiz, "
+                        f"latency {stats['latency_ms']}, {stats['duration_ms']} ms"
+                    )
+                if options['once']:
+                    break
+                # To'liq paket bo'lsa navbatda yana yozuvlar bor - kutmasdan davom etiladi
+                if stats['claimed'] < batch_size:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("Worker to'xtatildi"))
+
+        saved = notification_outbox.coalescing_stats()
+        self.stdout.write(
+            f"Birlashtirish tejagan yuborishlar: {saved['saved']} ({saved['by_channel']})"
+        )
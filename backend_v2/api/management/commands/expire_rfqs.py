@@ -0,0 +1,28 @@
+"""
+Muddati o'tgan RFQ larni EXPIRED holatiga o'tkazish (cron yoki celery beat orqali)
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.rfq_expiry import rfq_expiry_sweeper
+
+
+class Command(BaseCommand):
+    help = "Muddati o'tgan faol RFQ larni bo'laklab EXPIRED holatiga o'tkazish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=rfq_expiry_sweeper.default_chunk_size)
+        parser.add_argument(
+            '--no-notify', action='store_true',
+            help="Xaridorlarga bildirishnoma yaratmaslik"
+        )
+
+    def handle(self, *args, **options):
+        stats = rfq_expiry_sweeper.sweep(
+            chunk_size=options['chunk_size'],
+            notify=not options['no_notify']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['expired']} ta RFQ yopildi, {stats['notifications']} ta bildirishnoma, "
+            f"{stats['chunks']} ta bo'lak, {stats['duration_ms']} ms"
+        ))
@@ -0,0 +1,21 @@
+"""
+Uzoq vaqt faol bo'lmagan UserSession larni yopish (cron yoki celery beat orqali)
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.session_tracker import SESSION_IDLE_DAYS, session_tracker
+
+
+class Command(BaseCommand):
+    help = "idle-days dan beri faol bo'lmagan sessiyalarni bo'laklab yopish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--idle-days', type=int, default=SESSION_IDLE_DAYS)
+        parser.add_argument('--chunk-size', type=int, default=session_tracker.expire_chunk_size)
+
+    def handle(self, *args, **options):
+        expired = session_tracker.expire(
+            idle_days=options['idle_days'], chunk_size=options['chunk_size']
+        )
+        self.stdout.write(self.style.SUCCESS(f"{expired} ta sessiya yopildi"))
@@ -0,0 +1,24 @@
+"""
+Keshdagi mahsulot ko'rishlarini DB ga yozish (cron yoki celery beat orqali)
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.checks import is_process_local
+from api.product_view_counter import product_view_counter
+
+
+class Command(BaseCommand):
+    help = "Yopilgan ko'rish bo'laklarini view_count va kunlik statistikaga yozish"
+
+    def handle(self, *args, **options):
+        if is_process_local(product_view_counter.cache_alias):
+            self.stderr.write(self.style.WARNING(
+                f"'{product_view_counter.cache_alias}' keshi processlar o'rtasida umumiy emas (api.E001): "
+                "veb-processlardagi ko'rishlar bu buyruqqa ko'rinmaydi - REDIS_URL ni bering"
+            ))
+        stats = product_view_counter.flush()
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['buckets']} ta bo'lak, {stats['products']} ta mahsulot, "
+            f"{stats['views']} ta ko'rish yozildi ({stats['duration_ms']} ms)"
+        ))
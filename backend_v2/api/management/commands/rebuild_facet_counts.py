@@ -0,0 +1,15 @@
+"""
+Mahsulot facet hisoblarini products jadvalidan qayta hisoblash (cron yoki celery beat orqali)
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.product_search import product_search_service
+
+
+class Command(BaseCommand):
+    help = "ProductFacetCount jadvalini faol mahsulotlardan qayta qurish (drift tuzatish)"
+
+    def handle(self, *args, **options):
+        rows = product_search_service.rebuild_facet_counts()
+        self.stdout.write(self.style.SUCCESS(f"{rows} ta facet hisobi qayta qurildi"))
@@ -0,0 +1,19 @@
+"""
+Faol RFQ lar uchun mos sotuvchilar lentasini qayta yozish
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.rfq_matching import rfq_matching_engine
+
+
+class Command(BaseCommand):
+    help = "Faol RFQ larni matching indeksi bo'yicha sotuvchilarga qayta moslashtirish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        rfq_matching_engine.invalidate()
+        matched = rfq_matching_engine.rematch_active(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{matched} ta moslik topildi"))
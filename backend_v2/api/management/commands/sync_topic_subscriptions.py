@@ -0,0 +1,18 @@
+"""
+Sotuvchi kategoriyalari bo'yicha FCM topic obunalarini sinxronlash (cron yoki celery beat orqali)
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.notification_topics import topic_subscriptions
+
+
+class Command(BaseCommand):
+    help = "SupplierCategory va qurilma tokenlari asosida category_<id> topic obunalarini sinxronlash"
+
+    def handle(self, *args, **options):
+        stats = topic_subscriptions.sync()
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['subscribed']} ta obuna, {stats['unsubscribed']} ta bekor qilindi, "
+            f"{stats['failed']} ta xato, {stats['calls']} ta FCM chaqiruvi, {stats['duration_ms']} ms"
+        ))
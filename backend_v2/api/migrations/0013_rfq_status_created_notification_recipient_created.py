@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_factory_contact_info_factory_description_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient_user', 'created_at'], name='notificatio_recipie_c85215_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rfq',
+            index=models.Index(fields=['status', 'created_at'], name='rfqs_status_cf4ee9_idx'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+from django.db import migrations
+
+# Migratsiya ilova kodiga bog'liq emas: SQL shu yerda muzlatilgan.
+# SQLite da triggerlar jadval qayta qurilganda yo'qoladi - ular post_migrate da
+# (api.search.install_search_index_after_migrate) qayta o'rnatiladi.
+
+POSTGRES_INSTALL = [
+    """
+    ALTER TABLE rfqs ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(brand, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(grade, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(delivery_location, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS rfqs_search_vector_gin ON rfqs USING GIN (search_vector)",
+]
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS rfqs_search_vector_gin",
+    "ALTER TABLE rfqs DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_COLUMNS = 'brand, grade, delivery_location'
+SQLITE_NEW = 'new.brand, new.grade, new.delivery_location'
+SQLITE_OLD = 'old.brand, old.grade, old.delivery_location'
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS rfqs_fts USING fts5(
+        {SQLITE_COLUMNS}, content='rfqs', content_rowid='id', tokenize='{{tokenizer}}'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rfqs_fts_ai AFTER INSERT ON rfqs BEGIN
+        INSERT INTO rfqs_fts(rowid, {SQLITE_COLUMNS}) VALUES (new.id, {SQLITE_NEW});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rfqs_fts_ad AFTER DELETE ON rfqs BEGIN
+        INSERT INTO rfqs_fts(rfqs_fts, rowid, {SQLITE_COLUMNS}) VALUES ('delete', old.id, {SQLITE_OLD});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rfqs_fts_au AFTER UPDATE OF {SQLITE_COLUMNS} ON rfqs BEGIN
+        INSERT INTO rfqs_fts(rfqs_fts, rowid, {SQLITE_COLUMNS}) VALUES ('delete', old.id, {SQLITE_OLD});
+        INSERT INTO rfqs_fts(rowid, {SQLITE_COLUMNS}) VALUES (new.id, {SQLITE_NEW});
+    END
+    """,
+    "INSERT INTO rfqs_fts(rfqs_fts) VALUES ('rebuild')",
+]
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS rfqs_fts_ai",
+    "DROP TRIGGER IF EXISTS rfqs_fts_ad",
+    "DROP TRIGGER IF EXISTS rfqs_fts_au",
+    "DROP TABLE IF EXISTS rfqs_fts",
+]
+
+
+def install_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        statements = POSTGRES_INSTALL
+    elif connection.vendor == 'sqlite':
+        # trigram tokenizer SQLite 3.34+ da mavjud
+        tokenizer = 'trigram' if connection.Database.sqlite_version_info >= (3, 34, 0) else 'unicode61'
+        statements = [sql.replace('{tokenizer}', tokenizer) for sql in SQLITE_INSTALL]
+    else:
+        return
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def uninstall_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    statements = {'postgresql': POSTGRES_UNINSTALL, 'sqlite': SQLITE_UNINSTALL}.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0013_rfq_status_created_notification_recipient_created"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:19
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_facet_counts(apps, schema_editor):
+    Product = apps.get_model('api', 'Product')
+    ProductFacetCount = apps.get_model('api', 'ProductFacetCount')
+    active = Product.objects.filter(is_active=True)
+    rows = [
+        ProductFacetCount(facet='category', value=str(item['category_id']), count=item['n'])
+        for item in active.values('category_id').annotate(n=Count('id'))
+    ] + [
+        ProductFacetCount(
+            facet='supplier_type', value=item['supplier__supplier_type'] or '', count=item['n']
+        )
+        for item in active.values('supplier__supplier_type').annotate(n=Count('id'))
+    ]
+    ProductFacetCount.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_rfq_full_text_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFacetCount',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('facet', models.CharField(choices=[('category', 'Kategoriya'), ('supplier_type', 'Sotuvchi turi')], max_length=20, verbose_name='Facet')),
+                ('value', models.CharField(max_length=50, verbose_name='Qiymat')),
+                ('count', models.IntegerField(default=0, verbose_name='Soni')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Mahsulot facet soni',
+                'verbose_name_plural': 'Mahsulot facet sonlari',
+                'db_table': 'product_facet_counts',
+                'unique_together': {('facet', 'value')},
+            },
+        ),
+        migrations.RunPython(populate_facet_counts, migrations.RunPython.noop),
+    ]
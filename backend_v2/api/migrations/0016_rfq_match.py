@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_product_facet_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RFQMatch',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('rfq', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='api.rfq')),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rfq_matches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Mos RFQ',
+                'verbose_name_plural': 'Mos RFQ lar',
+                'db_table': 'rfq_matches',
+                'indexes': [models.Index(fields=['supplier', 'created_at'], name='rfq_matches_supplie_c69262_idx')],
+                'unique_together': {('rfq', 'supplier')},
+            },
+        ),
+    ]
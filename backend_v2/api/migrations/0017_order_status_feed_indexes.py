@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_rfq_match'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['buyer', 'status', 'created_at'], name='orders_buyer_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['supplier', 'status', 'created_at'], name='orders_supplier_status_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_order_status_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(choices=[('push', 'Push'), ('sms', 'SMS')], max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Navbatda'), ('processing', 'Yuborilmoqda'), ('sent', 'Yuborildi'), ('failed', 'Muvaffaqiyatsiz')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('locked_by', models.CharField(blank=True, max_length=100)),
+                ('last_error', models.TextField(blank=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbox_entries', to='api.notification')),
+            ],
+            options={
+                'verbose_name': 'Xabar navbati',
+                'verbose_name_plural': 'Xabar navbati',
+                'db_table': 'notification_outbox',
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificationDeliveryAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(choices=[('push', 'Push'), ('sms', 'SMS')], max_length=10)),
+                ('success', models.BooleanField(default=False)),
+                ('latency_ms', models.FloatField()),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('outbox', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='delivery_attempts', to='api.notificationoutbox')),
+            ],
+            options={
+                'verbose_name': 'Yuborish urinishi',
+                'verbose_name_plural': 'Yuborish urinishlari',
+                'db_table': 'notification_delivery_attempts',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notificationoutbox',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='notif_outbox_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationdeliveryattempt',
+            index=models.Index(fields=['channel', 'created_at'], name='notificatio_channel_26de17_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='coalesce_key',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='coalesced',
+            field=models.BooleanField(default=False, help_text='Boshqa yozuvning digest xabari tarkibida yuborilgan'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationoutbox',
+            index=models.Index(fields=['coalesce_key', 'status'], name='notif_outbox_coalesce_idx'),
+        ),
+    ]
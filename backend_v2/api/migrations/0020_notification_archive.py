@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_notification_outbox_coalescing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('type', models.CharField(choices=[('profile_updated', 'Profil yangilandi'), ('password_changed', "Parol o'zgartirildi"), ('company_profile_updated', 'Kompaniya profili yangilandi'), ('certificate_added', "Sertifikat qo'shildi"), ('member_added', "A'zo qo'shildi"), ('product_created', 'Mahsulot yaratildi'), ('product_updated', 'Mahsulot yangilandi'), ('new_rfq', "Yangi so'rov"), ('rfq_expired', "So'rov muddati tugadi"), ('new_offer', 'Yangi taklif'), ('offer_accepted', 'Taklif qabul qilindi'), ('offer_rejected', 'Taklif rad etildi'), ('order_created', 'Buyurtma yaratildi'), ('order_updated', 'Buyurtma yangilandi'), ('order_completed', 'Buyurtma yakunlandi'), ('order_cancelled', 'Buyurtma bekor qilindi'), ('payment_confirmed', "To'lov tasdiqlandi"), ('payment_failed', "To'lov amalga oshmadi"), ('rating_request', "Baho so'rovi"), ('rating_received', 'Baho qoldirildi'), ('info', "Ma'lumot"), ('warning', 'Ogohlantirish'), ('error', 'Xatolik')], max_length=50)),
+                ('title', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('related_rfq_id', models.IntegerField(blank=True, null=True)),
+                ('related_offer_id', models.IntegerField(blank=True, null=True)),
+                ('related_order_id', models.IntegerField(blank=True, null=True)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('recipient_user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Arxivlangan xabar',
+                'verbose_name_plural': 'Arxivlangan xabarlar',
+                'db_table': 'notifications_archive',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['recipient_user', 'created_at'], name='notif_archive_user_idx'), models.Index(fields=['created_at'], name='notif_archive_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_user_device_tokens(apps, schema_editor):
+    User = apps.get_model('api', 'User')
+    DeviceToken = apps.get_model('api', 'DeviceToken')
+    tokens = {}
+    for user_id, token in User.objects.exclude(device_token='').values_list('id', 'device_token'):
+        tokens[token] = user_id
+    DeviceToken.objects.bulk_create(
+        [DeviceToken(user_id=user_id, token=token) for token, user_id in tokens.items()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_notification_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeviceToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=255, unique=True)),
+                ('platform', models.CharField(blank=True, choices=[('android', 'Android'), ('ios', 'iOS'), ('web', 'Web')], max_length=10)),
+                ('last_seen', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='device_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Qurilma tokeni',
+                'verbose_name_plural': 'Qurilma tokenlari',
+                'db_table': 'device_tokens',
+                'indexes': [models.Index(fields=['user', 'last_seen'], name='device_token_user_idx')],
+            },
+        ),
+        migrations.RunPython(copy_user_device_tokens, migrations.RunPython.noop),
+    ]
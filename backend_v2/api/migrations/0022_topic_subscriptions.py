@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_device_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='topic',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='notificationdeliveryattempt',
+            name='channel',
+            field=models.CharField(choices=[('push', 'Push'), ('sms', 'SMS'), ('topic', 'FCM topic')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='notificationoutbox',
+            name='channel',
+            field=models.CharField(choices=[('push', 'Push'), ('sms', 'SMS'), ('topic', 'FCM topic')], max_length=10),
+        ),
+        migrations.CreateModel(
+            name='TopicSubscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=255)),
+                ('topic', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Topic obunasi',
+                'verbose_name_plural': 'Topic obunalari',
+                'db_table': 'topic_subscriptions',
+                'indexes': [models.Index(fields=['topic'], name='topic_subscription_topic_idx')],
+                'unique_together': {('token', 'topic')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_topic_subscriptions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductViewDaily',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField(verbose_name='Sana')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name="Ko'rishlar")),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='api.product')),
+            ],
+            options={
+                'verbose_name': "Mahsulot kunlik ko'rishlari",
+                'verbose_name_plural': "Mahsulot kunlik ko'rishlari",
+                'db_table': 'product_view_daily',
+                'unique_together': {('product', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_product_view_daily'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notificationoutbox',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Navbatda'), ('processing', 'Yuborilmoqda'), ('sent', 'Yuborildi'), ('failed', 'Muvaffaqiyatsiz'), ('skipped', "Manzil yo'q")], default='pending', max_length=20),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models import Count, Min, Max, Q
 from django.utils import timezone
+from datetime import timedelta
 from django.core.validators import RegexValidator, FileExtensionValidator
 from django.contrib.auth.models import AbstractUser
 import uuid
@@ -440,6 +442,51 @@ class Product(models.Model):
         return self.factory is not None
 
 
+class ProductFacetCount(models.Model):
+    """
+    Faol mahsulotlar soni - kategoriya va sotuvchi turi bo'yicha (oldindan hisoblangan).
+    Product saqlanganda/o'chirilganda signal orqali yangilanadi.
+    """
+    class Facet(models.TextChoices):
+        CATEGORY = 'category', 'Kategoriya'
+        SUPPLIER_TYPE = 'supplier_type', 'Sotuvchi turi'
+
+    id = models.AutoField(primary_key=True)
+    facet = models.CharField(max_length=20, choices=Facet.choices, verbose_name='Facet')
+    value = models.CharField(max_length=50, verbose_name='Qiymat')
+    count = models.IntegerField(default=0, verbose_name='Soni')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'product_facet_counts'
+        unique_together = ['facet', 'value']
+        verbose_name = 'Mahsulot facet soni'
+        verbose_name_plural = 'Mahsulot facet sonlari'
+
+    def __str__(self):
+        return f"{self.facet}={self.value}: {self.count}"
+
+
+class ProductViewDaily(models.Model):
+    """
+    Mahsulot ko'rishlari - kunlik bo'laklar (sotuvchi analytics trendlari uchun).
+    product_view_counter flush qilganda yangilanadi.
+    """
+    id = models.AutoField(primary_key=True)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_views')
+    date = models.DateField(verbose_name='Sana')
+    views = models.PositiveIntegerField(default=0, verbose_name="Ko'rishlar")
+
+    class Meta:
+        db_table = 'product_view_daily'
+        unique_together = ['product', 'date']
+        verbose_name = "Mahsulot kunlik ko'rishlari"
+        verbose_name_plural = "Mahsulot kunlik ko'rishlari"
+
+    def __str__(self):
+        return f"{self.product_id} {self.date}: {self.views}"
+
+
 class VerificationCode(models.Model):
     """
     Telefon raqami tasdiqlash uchun kodlar
@@ -506,6 +553,42 @@ class UserSession(models.Model):
         ]
 
 
+def rfq_offer_stats_expressions(prefix='offers__'):
+    """
+    RFQ takliflari statistikasi uchun aggregate ifodalar.
+    prefix='offers__' - RFQ querysetini annotatsiya qilish uchun,
+    prefix='' - bitta RFQ ning rfq.offers querysetida aggregate qilish uchun.
+    """
+    new_since = timezone.now() - timedelta(hours=24)
+    offer_ref = prefix.rstrip('_') or 'id'
+    return {
+        'offers_count': Count(offer_ref, distinct=True),
+        'min_offer_price': Min(f'{prefix}price_per_unit'),
+        'max_offer_price': Max(f'{prefix}price_per_unit'),
+        'earliest_offer_delivery_date': Min(f'{prefix}delivery_date'),
+        'new_offers_count': Count(
+            offer_ref,
+            filter=Q(**{f'{prefix}created_at__gte': new_since}),
+            distinct=True
+        ),
+    }
+
+
+class RFQQuerySet(models.QuerySet):
+    """
+    RFQ querysetlari - takliflar statistikasi bitta SQL so'rovda
+    """
+
+    def with_offer_stats(self):
+        """Takliflar soni, min/max narx, eng erta yetkazish va oxirgi 24 soatdagi takliflar"""
+        return self.annotate(**rfq_offer_stats_expressions())
+
+    def search(self, term):
+        """Full-text qidiruv (natijaga search_rank annotatsiyasi qo'shiladi)"""
+        from .search import search_rfqs
+        return search_rfqs(self, term)
+
+
 class RFQ(models.Model):
     """
     Request for Quote - Sotib oluvchi so'rovi
@@ -562,6 +645,8 @@ class RFQ(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = RFQQuerySet.as_manager()
+
     class Meta:
         db_table = 'rfqs'
         verbose_name = 'So\'rov'
@@ -572,6 +657,7 @@ class RFQ(models.Model):
             models.Index(fields=['subcategory', 'status']),
             models.Index(fields=['delivery_date']),
             models.Index(fields=['expires_at']),
+            models.Index(fields=['status', 'created_at']),
         ]
         ordering = ['-created_at']
 
@@ -586,6 +672,23 @@ class RFQ(models.Model):
         """RFQ takliflar qabul qila oladimi"""
         return self.status == self.RFQStatus.ACTIVE and not self.is_expired()
 
+    def get_offer_stats(self):
+        """
+        Takliflar statistikasi. with_offer_stats() annotatsiyasi bo'lsa
+        qo'shimcha so'rov yuborilmaydi, aks holda bitta aggregate so'rov.
+        """
+        if not hasattr(self, 'offers_count'):
+            stats = self.offers.aggregate(**rfq_offer_stats_expressions(prefix=''))
+            for name, value in stats.items():
+                setattr(self, name, value)
+        return {
+            'count': self.offers_count,
+            'min_price': self.min_offer_price,
+            'max_price': self.max_offer_price,
+            'earliest_delivery_date': self.earliest_offer_delivery_date,
+            'new_last_24h': self.new_offers_count,
+        }
+
     def clean(self):
         """Validatsiya"""
         from django.core.exceptions import ValidationError
@@ -606,6 +709,29 @@ class RFQ(models.Model):
 
 
 
+class RFQMatch(models.Model):
+    """
+    RFQ va unga mos sotuvchi bog'lanishi (matching engine tomonidan yoziladi).
+    Sotuvchining "mos RFQ lar" lentasi shu jadvaldan o'qiladi.
+    """
+    id = models.AutoField(primary_key=True)
+    rfq = models.ForeignKey(RFQ, on_delete=models.CASCADE, related_name='matches')
+    supplier = models.ForeignKey(User, on_delete=models.CASCADE, related_name='rfq_matches')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'rfq_matches'
+        unique_together = ['rfq', 'supplier']
+        verbose_name = 'Mos RFQ'
+        verbose_name_plural = 'Mos RFQ lar'
+        indexes = [
+            models.Index(fields=['supplier', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"RFQ #{self.rfq_id} -> {self.supplier_id}"
+
+
 class Offer(models.Model):
     """
     Sotuvchining taklifi
@@ -805,6 +931,9 @@ class Order(models.Model):
             models.Index(fields=['supplier']),
             models.Index(fields=['status']),
             models.Index(fields=['created_at']),
+            # Holat lentasi: tomon + holat bo'yicha created_at tartibida
+            models.Index(fields=['buyer', 'status', 'created_at'], name='orders_buyer_status_idx'),
+            models.Index(fields=['supplier', 'status', 'created_at'], name='orders_supplier_status_idx'),
         ]
 
     def __str__(self):
@@ -1103,6 +1232,7 @@ class Notification(models.Model):
         verbose_name_plural = 'Xabarlar'
         indexes = [
             models.Index(fields=['recipient_user', 'read_at']),
+            models.Index(fields=['recipient_user', 'created_at']),
             models.Index(fields=['type', 'created_at']),
             models.Index(fields=['delivery_method', 'sent_at']),
         ]
@@ -1114,8 +1244,18 @@ class Notification(models.Model):
     def mark_as_read(self):
         """Notificationni o'qilgan deb belgilash"""
         if not self.read_at:
+            from .notification_counter import unread_counter
             self.read_at = timezone.now()
             self.save(update_fields=['read_at'])
+            unread_counter.decrement(self.recipient_user_id)
+
+    def mark_as_unread(self):
+        """Notificationni o'qilmagan deb belgilash"""
+        if self.read_at:
+            from .notification_counter import unread_counter
+            self.read_at = None
+            self.save(update_fields=['read_at'])
+            unread_counter.increment(self.recipient_user_id)
 
     def mark_as_sent(self):
         """Notificationni yuborilgan deb belgilash"""
@@ -1142,6 +1282,173 @@ class Notification(models.Model):
         return self.failed_at is not None
 
 
+class NotificationOutbox(models.Model):
+    """
+    Notification yuborish navbati (transactional outbox).
+    Har bir kanal uchun alohida yozuv notification bilan bitta tranzaksiyada yaratiladi,
+    yuborishni esa alohida worker bajaradi.
+    """
+    class Channel(models.TextChoices):
+        PUSH = "push", "Push"
+        SMS = "sms", "SMS"
+        TOPIC = "topic", "FCM topic"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Navbatda"
+        PROCESSING = "processing", "Yuborilmoqda"
+        SENT = "sent", "Yuborildi"
+        FAILED = "failed", "Muvaffaqiyatsiz"
+        SKIPPED = "skipped", "Manzil yo'q"
+
+    notification = models.ForeignKey(
+        Notification, on_delete=models.CASCADE, related_name='outbox_entries'
+    )
+    channel = models.CharField(max_length=10, choices=Channel.choices)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    # FCM topic (faqat topic kanali uchun, masalan: category_5)
+    topic = models.CharField(max_length=100, blank=True)
+    # Birlashtirish (digest): bir xil kalitli yozuvlar bitta oynada bitta xabar bilan yuboriladi
+    coalesce_key = models.CharField(max_length=100, blank=True)
+    coalesced = models.BooleanField(
+        default=False, help_text="Boshqa yozuvning digest xabari tarkibida yuborilgan"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'notification_outbox'
+        verbose_name = 'Xabar navbati'
+        verbose_name_plural = 'Xabar navbati'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='notif_outbox_due_idx'),
+            models.Index(fields=['coalesce_key', 'status'], name='notif_outbox_coalesce_idx'),
+        ]
+
+    def __str__(self):
+        return f"Outbox {self.id} - {self.channel} ({self.status})"
+
+
+class NotificationDeliveryAttempt(models.Model):
+    """
+    Outbox yozuvini yuborish urinishi - kanal bo'yicha kechikish (latency) statistikasi uchun
+    """
+    outbox = models.ForeignKey(
+        NotificationOutbox, on_delete=models.CASCADE, related_name='delivery_attempts'
+    )
+    channel = models.CharField(max_length=10, choices=NotificationOutbox.Channel.choices)
+    success = models.BooleanField(default=False)
+    latency_ms = models.FloatField()
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'notification_delivery_attempts'
+        verbose_name = 'Yuborish urinishi'
+        verbose_name_plural = 'Yuborish urinishlari'
+        indexes = [
+            models.Index(fields=['channel', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} - {'OK' if self.success else 'xato'} ({self.latency_ms:.1f} ms)"
+
+
+class DeviceToken(models.Model):
+    """
+    Foydalanuvchi qurilmalarining FCM tokenlari (bir foydalanuvchida bir nechta qurilma)
+    """
+    class Platform(models.TextChoices):
+        ANDROID = "android", "Android"
+        IOS = "ios", "iOS"
+        WEB = "web", "Web"
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='device_tokens')
+    token = models.CharField(max_length=255, unique=True)
+    platform = models.CharField(max_length=10, choices=Platform.choices, blank=True)
+    last_seen = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'device_tokens'
+        verbose_name = 'Qurilma tokeni'
+        verbose_name_plural = 'Qurilma tokenlari'
+        indexes = [
+            models.Index(fields=['user', 'last_seen'], name='device_token_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.get_platform_display() or '-'} ({self.token[:12]}...)"
+
+
+class TopicSubscription(models.Model):
+    """
+    FCM topic obunasi (token, topic) - FCM da haqiqatda obuna qilingan holat.
+    Token satr sifatida saqlanadi: qurilma o'chirilgandan keyin ham obunani bekor qilish mumkin.
+    """
+    token = models.CharField(max_length=255)
+    topic = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'topic_subscriptions'
+        verbose_name = 'Topic obunasi'
+        verbose_name_plural = 'Topic obunalari'
+        unique_together = ['token', 'topic']
+        indexes = [
+            models.Index(fields=['topic'], name='topic_subscription_topic_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} - {self.token[:12]}..."
+
+
+class NotificationArchive(models.Model):
+    """
+    Arxivlangan (eski) notificationlar - ixcham jadval.
+    Yozuvlar `notifications` jadvalidan retention vazifasi bilan ko'chiriladi;
+    id asl notification id si bilan bir xil.
+    """
+    id = models.IntegerField(primary_key=True)
+    recipient_user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_notifications',
+        null=True,
+        blank=True
+    )
+    type = models.CharField(max_length=50, choices=Notification.NotificationType.choices)
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    related_rfq_id = models.IntegerField(null=True, blank=True)
+    related_offer_id = models.IntegerField(null=True, blank=True)
+    related_order_id = models.IntegerField(null=True, blank=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'notifications_archive'
+        verbose_name = 'Arxivlangan xabar'
+        verbose_name_plural = 'Arxivlangan xabarlar'
+        indexes = [
+            models.Index(fields=['recipient_user', 'created_at'], name='notif_archive_user_idx'),
+            models.Index(fields=['created_at'], name='notif_archive_created_idx'),
+        ]
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.title} (arxiv)"
+
+    def is_read(self):
+        return self.read_at is not None
+
+
 def document_upload_path(instance, filename):
     """
     Moslashuvchan fayl yuklash yo'li
@@ -0,0 +1,79 @@
+"""
+Unread notification counter - foydalanuvchi bo'yicha o'qilmagan xabarlar soni (cache da)
+
+Hisoblagich cache.incr / cache.decr bilan atomik o'zgartiriladi (Redis, memcached va
+LocMem da atomik). Kalit yo'q bo'lsa o'zgartirish o'tkazib yuboriladi - keyingi get()
+sonni bazadan qayta hisoblaydi. O'zgarishlar transaction.on_commit da qo'llanadi,
+shuning uchun rollback bo'lgan yozuvlar hisoblagichni buzmaydi.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+COUNTER_TTL = getattr(settings, 'NOTIFICATION_UNREAD_COUNTER_TTL', 60 * 60 * 24)
+
+
+class UnreadCounter:
+    key_prefix = 'notif_unread'
+
+    def key(self, user_id):
+        return f'{self.key_prefix}:{user_id}'
+
+    def count_from_db(self, user_id):
+        from .models import Notification
+        return Notification.objects.filter(recipient_user_id=user_id, read_at__isnull=True).count()
+
+    def get(self, user_id):
+        """O'qilmagan xabarlar soni (cache da bo'lmasa bazadan hisoblanadi)"""
+        value = cache.get(self.key(user_id))
+        if value is None:
+            value = self.count_from_db(user_id)
+            cache.add(self.key(user_id), value, COUNTER_TTL)
+        return value
+
+    def set(self, user_id, value):
+        cache.set(self.key(user_id), value, COUNTER_TTL)
+
+    def _apply(self, user_id, delta):
+        if not user_id or not delta:
+            return
+        try:
+            if delta > 0:
+                value = cache.incr(self.key(user_id), delta)
+            else:
+                value = cache.decr(self.key(user_id), -delta)
+        except ValueError:
+            # Kalit yo'q - keyingi get() da qayta hisoblanadi
+            return
+        if value < 0:
+            cache.delete(self.key(user_id))
+
+    def change(self, user_id, delta):
+        """Hisoblagichni tranzaksiya commit bo'lgach o'zgartirish"""
+        transaction.on_commit(lambda: self._apply(user_id, delta))
+
+    def increment(self, user_id, amount=1):
+        self.change(user_id, amount)
+
+    def decrement(self, user_id, amount=1):
+        self.change(user_id, -amount)
+
+    def increment_many(self, counts):
+        """counts - {user_id: soni} (bulk_create qilingan xabarlar uchun)"""
+        def apply():
+            for user_id, amount in counts.items():
+                self._apply(user_id, amount)
+        transaction.on_commit(apply)
+
+    def decrement_many(self, counts):
+        """counts - {user_id: soni} (o'chirilgan yoki arxivlangan o'qilmagan xabarlar)"""
+        self.increment_many({user_id: -amount for user_id, amount in counts.items()})
+
+    def invalidate(self, user_id):
+        """Aniq o'zgarish noma'lum bo'lganda (masalan, o'chirish) - qayta hisoblashga majburlash"""
+        transaction.on_commit(lambda: cache.delete(self.key(user_id)))
+
+
+# Global instance
+unread_counter = UnreadCounter()
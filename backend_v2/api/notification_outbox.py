@@ -0,0 +1,542 @@
+"""
+Notification outbox - push/SMS yuborishni HTTP so'rovdan ajratish
+
+Notification va uning outbox yozuvlari biznes o'zgarishi bilan bitta tranzaksiyada
+yaratiladi. Worker (`python manage.py deliver_notifications` yoki celery vazifasi)
+navbatdagi yozuvlarni SELECT ... FOR UPDATE SKIP LOCKED bilan egallaydi, ularni
+paketlab yuboradi, xatoda eksponensial kechikish bilan qayta urinadi va har bir
+urinishning kanal bo'yicha kechikishini (latency) yozib boradi.
+
+Birlashtirish (coalescing): NOTIFICATION_COALESCE_TYPES dagi turlar qabul qiluvchi va
+kanal bo'yicha NOTIFICATION_COALESCE_WINDOW_SECONDS oynasida yig'iladi va oyna tugagach
+bitta digest push/SMS bilan yuboriladi. Har bir notification va outbox yozuvi bazada
+alohida qoladi; digest tarkibida yuborilganlari `coalesced=True` bilan belgilanadi.
+"""
+
+import copy
+import logging
+import os
+import random
+import socket
+import time
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .device_tokens import STALE_TOKEN_CODES, device_tokens, fcm_error_code
+from .models import Notification, NotificationDeliveryAttempt, NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = getattr(settings, 'NOTIFICATION_OUTBOX_MAX_ATTEMPTS', 5)
+BACKOFF_SECONDS = getattr(settings, 'NOTIFICATION_OUTBOX_BACKOFF_SECONDS', 30)
+MAX_BACKOFF_SECONDS = getattr(settings, 'NOTIFICATION_OUTBOX_MAX_BACKOFF_SECONDS', 3600)
+# FCM send_each_for_multicast chegarasi
+PUSH_BATCH_SIZE = 500
+# Shu vaqtdan ko'p "processing" holatida qolgan yozuv (worker o'lgan) qayta egallanadi
+LEASE_SECONDS = getattr(settings, 'NOTIFICATION_OUTBOX_LEASE_SECONDS', 300)
+# Birlashtirish oynasi (soniya), 0 - o'chirilgan
+COALESCE_WINDOW_SECONDS = getattr(settings, 'NOTIFICATION_COALESCE_WINDOW_SECONDS', 300)
+# Birlashtiriladigan notification turlari
+COALESCE_TYPES = getattr(settings, 'NOTIFICATION_COALESCE_TYPES', (
+    Notification.NotificationType.NEW_OFFER,
+))
+
+Channel = NotificationOutbox.Channel
+Method = Notification.DeliveryMethod
+
+# Yuborish usuli -> outbox kanallari
+CHANNELS_BY_METHOD = {
+    Method.DATABASE_ONLY: (),
+    Method.PUSH_ONLY: (Channel.PUSH,),
+    Method.SMS_ONLY: (Channel.SMS,),
+    Method.PUSH_SMS: (Channel.PUSH, Channel.SMS),
+    Method.ALL: (Channel.PUSH, Channel.SMS),
+}
+
+
+class DeliveryError(Exception):
+    """Kanal orqali yuborib bo'lmadi (qayta urinish mumkin)"""
+
+
+class Undeliverable(str):
+    """
+    Yuboruvchi natijasidagi xato matni: yozuvni yuboradigan manzil yo'q yoki yaroqsiz (qabul
+    qiluvchi, device token, noto'g'ri telefon, sozlanmagan SMS xizmati). Yozuv SKIPPED holatiga o'tadi - qayta urinilmaydi va yuborilgan hisoblanmaydi.
+    """
+
+
+def send_push_batch(entries, client=None):
+    """
+    Push yozuvlarini FCM multicast bilan yuborish.
+    Qabul qiluvchilarning qurilma tokenlari bitta so'rov bilan olinadi; bir xil mazmunli
+    xabarlar guruhlanib PUSH_BATCH_SIZE tadan tokenli send_each_for_multicast chaqiruvlari
+    bilan yuboriladi. Yozuv kamida bitta qurilmaga yetsa yuborilgan hisoblanadi.
+    UNREGISTERED / INVALID_ARGUMENT qaytargan tokenlar registrdan o'chiriladi.
+    Qaytaradi: {entry.id: (xato matni yoki '', chaqiruv kechikishi ms)}
+    """
+    results = {}
+    groups = {}
+    tokens_by_user = device_tokens.tokens_for(
+        entry.notification.recipient_user_id for entry in entries
+    )
+    for entry in entries:
+        notification = entry.notification
+        tokens = tokens_by_user.get(notification.recipient_user_id)
+        if not tokens:
+            if notification.recipient_user_id:
+                logger.warning(f"Foydalanuvchi uchun device token topilmadi: {notification.recipient_user_id}")
+            results[entry.id] = (Undeliverable("Device token yo'q"), 0.0)
+            continue
+        key = (
+            notification.type, notification.title, notification.message,
+            notification.related_rfq_id, notification.related_offer_id, notification.related_order_id
+        )
+        groups.setdefault(key, []).extend((entry, token) for token in tokens)
+
+    if not groups:
+        return results
+    if client is None:
+        from .firebase_service import firebase_service as client
+
+    outcomes = {}
+    stale = []
+    for items in groups.values():
+        notification = items[0][0].notification
+        data = {
+            'type': notification.type,
+            'related_rfq': str(notification.related_rfq_id or ''),
+            'related_offer': str(notification.related_offer_id or ''),
+            'related_order': str(notification.related_order_id or ''),
+        }
+        if len({entry.id for entry, _ in items}) == 1:
+            data['notification_id'] = str(notification.id)
+
+        for offset in range(0, len(items), PUSH_BATCH_SIZE):
+            chunk = items[offset:offset + PUSH_BATCH_SIZE]
+            started = time.perf_counter()
+            try:
+                response = client.send_each_for_multicast(
+                    [token for _, token in chunk], notification.title, notification.message, data
+                )
+                exceptions = [
+                    None if result.success else (result.exception or DeliveryError('FCM xatosi'))
+                    for result in response.responses
+                ]
+            except Exception as e:
+                exceptions = [e] * len(chunk)
+                codes = []
+            else:
+                codes = [fcm_error_code(exception) for exception in exceptions]
+            latency_ms = (time.perf_counter() - started) * 1000
+
+            # Hamma token INVALID_ARGUMENT bo'lsa - xato xabarning o'zida, tokenlar o'chirilmaydi
+            payload_rejected = bool(codes) and all(code == 'INVALID_ARGUMENT' for code in codes)
+            for (entry, token), exception, code in zip(chunk, exceptions, codes or [''] * len(chunk)):
+                error = '' if exception is None else (str(exception) or code or exception.__class__.__name__)
+                outcome = outcomes.setdefault(entry.id, [False, '', 0.0])
+                outcome[0] = outcome[0] or not error
+                outcome[1] = outcome[1] or error
+                outcome[2] = max(outcome[2], latency_ms)
+                if code in STALE_TOKEN_CODES and not (code == 'INVALID_ARGUMENT' and payload_rejected):
+                    stale.append(token)
+
+    for entry_id, (delivered, error, latency_ms) in outcomes.items():
+        results[entry_id] = ('' if delivered else error, latency_ms)
+    if stale:
+        device_tokens.prune(stale)
+    return results
+
+
+def send_sms_batch(entries, service=None):
+    """
+    SMS yozuvlarini Eskiz ga parallel (asyncio, ESKIZ_CONCURRENCY bilan cheklangan) yuborish.
+    Qaytaradi: {entry.id: (xato matni yoki '', yuborish kechikishi ms)}
+    """
+    results = {}
+    messages = []
+    for entry in entries:
+        user = entry.notification.recipient_user
+        if not user or not user.phone:
+            results[entry.id] = (Undeliverable("Qabul qiluvchi telefoni yo'q"), 0.0)
+            continue
+        messages.append((entry, user.phone, f"{entry.notification.title}\n{entry.notification.message}"))
+    if not messages:
+        return results
+    if service is None:
+        from .sms_service import sms_service as service
+
+    responses = async_to_sync(service.asend_many)([(phone, text) for _, phone, text in messages])
+    for (entry, _, _), response in zip(messages, responses):
+        error = '' if response.get('success') else response.get('error', 'SMS yuborilmadi')
+        if error and response.get('permanent'):
+            # Noto'g'ri raqam yoki sozlanmagan xizmat - qayta urinilmaydi
+            error = Undeliverable(error)
+        results[entry.id] = (error, response.get('latency_ms', 0.0))
+    return results
+
+
+def send_topic_batch(entries, client=None):
+    """
+    Topic yozuvlarini yuborish - har bir yozuv bitta FCM topic xabari
+    (topicga obuna bo'lgan barcha qurilmalarga FCM o'zi tarqatadi).
+    Qaytaradi: {entry.id: (xato matni yoki '', chaqiruv kechikishi ms)}
+    """
+    if client is None:
+        from .firebase_service import firebase_service as client
+
+    results = {}
+    for entry in entries:
+        notification = entry.notification
+        started = time.perf_counter()
+        error = ''
+        try:
+            client.send_topic_notification(
+                topic=entry.topic,
+                title=notification.title,
+                body=notification.message,
+                data={
+                    'notification_id': str(notification.id),
+                    'type': notification.type,
+                    'topic': entry.topic,
+                    'related_rfq': str(notification.related_rfq_id or ''),
+                }
+            )
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+        results[entry.id] = (error, (time.perf_counter() - started) * 1000)
+    return results
+
+
+# Paketli yuboruvchilar: kanal -> fn(entries) -> {entry.id: (xato, ms)}
+DEFAULT_BATCH_SENDERS = {
+    Channel.PUSH: send_push_batch,
+    Channel.SMS: send_sms_batch,
+    Channel.TOPIC: send_topic_batch,
+}
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def digest_notification(notifications):
+    """
+    Bir nechta notification uchun bitta digest xabar (bazaga yozilmaydi).
+    Eng oxirgi xabar matni asos qilinadi; bog'liq obyektlar faqat hammasida bir xil bo'lsa qoladi.
+    """
+    latest = notifications[-1]
+    digest = copy.copy(latest)
+    labels = dict(Notification.NotificationType.choices)
+    digest.title = f"{labels.get(latest.type, latest.title)} ({len(notifications)} ta)"
+    digest.message = f"{latest.message}\n(va yana {len(notifications) - 1} ta)"
+    for field in ('related_rfq_id', 'related_offer_id', 'related_order_id'):
+        if len({getattr(notification, field) for notification in notifications}) > 1:
+            setattr(digest, field, None)
+    return digest
+
+
+class NotificationOutboxService:
+    """
+    Outbox navbati: yozish (enqueue), egallash (claim) va yuborish (deliver).
+    batch_senders - kanal -> fn(entries) paketli yuboruvchi, senders - kanal -> fn(notification)
+    alohida yuboruvchi (testlarda soxta yuboruvchi beriladi). Kanalda paketli yuboruvchi bo'lsa
+    u ishlatiladi.
+    """
+    default_batch_size = 100
+    bulk_batch_size = 1000
+
+    def __init__(self, senders=None, batch_senders=None, coalesce_window=None, coalesce_types=None):
+        self.senders = dict(senders or {})
+        self.batch_senders = dict(DEFAULT_BATCH_SENDERS if batch_senders is None else batch_senders)
+        self.coalesce_window = COALESCE_WINDOW_SECONDS if coalesce_window is None else coalesce_window
+        self.coalesce_types = set(COALESCE_TYPES if coalesce_types is None else coalesce_types)
+
+    # Navbatga qo'yish
+
+    def enqueue(self, notifications):
+        """
+        Notificationlar uchun outbox yozuvlarini yaratish.
+        Chaqiruvchining tranzaksiyasi ichida ishlatiladi - rollback bo'lsa navbat ham bekor bo'ladi.
+        """
+        if isinstance(notifications, Notification):
+            notifications = [notifications]
+        entries = [
+            NotificationOutbox(
+                notification=notification,
+                channel=channel,
+                coalesce_key=self.coalesce_key(notification, channel)
+            )
+            for notification in notifications
+            for channel in CHANNELS_BY_METHOD.get(notification.delivery_method, ())
+        ]
+        self._assign_windows(entries)
+        return NotificationOutbox.objects.bulk_create(entries, batch_size=self.bulk_batch_size)
+
+    def enqueue_topic(self, notification, topic):
+        """Topic xabari uchun outbox yozuvi (qabul qiluvchisiz notification)"""
+        return NotificationOutbox.objects.create(
+            notification=notification, channel=Channel.TOPIC, topic=topic
+        )
+
+    def coalesce_key(self, notification, channel):
+        """Birlashtirish kaliti (qabul qiluvchi, tur, kanal) yoki birlashtirilmasa ''"""
+        if (not self.coalesce_window or not notification.recipient_user_id
+                or notification.type not in self.coalesce_types):
+            return ''
+        return f"{notification.recipient_user_id}:{notification.type}:{channel}"
+
+    def _assign_windows(self, entries):
+        """
+        Birlashtiriladigan yozuvlarni ochiq oynaga qo'shish: yozuv oyna tugash vaqtida
+        (next_attempt_at) yuboriladi. Ochiq oyna yo'q bo'lsa yangisi ochiladi.
+        """
+        keys = {entry.coalesce_key for entry in entries if entry.coalesce_key}
+        if not keys:
+            return
+        now = timezone.now()
+        windows = dict(
+            NotificationOutbox.objects.filter(
+                coalesce_key__in=keys,
+                status=NotificationOutbox.Status.PENDING,
+                attempts=0,
+                next_attempt_at__gt=now
+            ).order_by('-next_attempt_at').values_list('coalesce_key', 'next_attempt_at')
+        )
+        for entry in entries:
+            if entry.coalesce_key:
+                entry.next_attempt_at = windows.setdefault(
+                    entry.coalesce_key, now + timedelta(seconds=self.coalesce_window)
+                )
+
+    # Worker
+
+    def claim(self, batch_size=None, worker_id=None, now=None):
+        """Navbatdagi yozuvlarni egallash (SKIP LOCKED - parallel workerlar bir-birini kutmaydi)"""
+        now = now or timezone.now()
+        batch_size = batch_size or self.default_batch_size
+        worker_id = worker_id or default_worker_id()
+
+        with transaction.atomic():
+            ids = list(
+                NotificationOutbox.objects.select_for_update(skip_locked=True).filter(
+                    Q(status=NotificationOutbox.Status.PENDING, next_attempt_at__lte=now)
+                    | Q(status=NotificationOutbox.Status.PROCESSING,
+                        locked_at__lt=now - timedelta(seconds=LEASE_SECONDS))
+                ).order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return []
+            NotificationOutbox.objects.filter(id__in=ids).update(
+                status=NotificationOutbox.Status.PROCESSING,
+                locked_at=now,
+                locked_by=worker_id,
+                updated_at=now
+            )
+
+        return list(
+            NotificationOutbox.objects.filter(id__in=ids).select_related(
+                'notification__recipient_user'
+            ).order_by('id')
+        )
+
+    def backoff(self, attempts):
+        """Keyingi urinishgacha kechikish (soniya): eksponensial, yuqori chegara va jitter bilan"""
+        delay = min(BACKOFF_SECONDS * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS)
+        return delay + random.uniform(0, delay * 0.1)
+
+    def send(self, entries):
+        """Yozuvlarni kanallari bo'yicha yuborish. Qaytaradi: {entry.id: (xato, ms)}"""
+        by_channel = {}
+        for entry in entries:
+            by_channel.setdefault(entry.channel, []).append(entry)
+
+        results = {}
+        for channel, items in by_channel.items():
+            batch_sender = self.batch_senders.get(channel)
+            if batch_sender is not None:
+                results.update(batch_sender(items))
+                continue
+            sender = self.senders.get(channel)
+            for entry in items:
+                started = time.perf_counter()
+                error = ''
+                try:
+                    if sender is None:
+                        raise DeliveryError(f"{channel} kanali uchun yuboruvchi yo'q")
+                    sender(entry.notification)
+                except Exception as e:
+                    error = str(e) or e.__class__.__name__
+                results[entry.id] = (error, (time.perf_counter() - started) * 1000)
+        return results
+
+    def coalesce(self, entries):
+        """
+        Bir xil coalesce_key li yozuvlarni guruhlash.
+        Qaytaradi: (yuboriladigan yozuvlar, {yozuv id: digestni yuborgan yozuv id})
+        Guruhning oxirgi yozuvi digest xabar bilan yuboriladi, qolganlari uning natijasini oladi.
+        """
+        groups = {}
+        to_send = []
+        for entry in entries:
+            if entry.coalesce_key:
+                groups.setdefault(entry.coalesce_key, []).append(entry)
+            else:
+                to_send.append(entry)
+
+        leaders = {}
+        for group in groups.values():
+            leader = group[-1]
+            if len(group) == 1:
+                to_send.append(leader)
+                continue
+            # Digest yozuvi - outbox yozuvi o'zgartirilmaydi
+            to_send.append(NotificationOutbox(
+                id=leader.id,
+                channel=leader.channel,
+                notification=digest_notification([entry.notification for entry in group])
+            ))
+            for entry in group[:-1]:
+                leaders[entry.id] = leader.id
+        return to_send, leaders
+
+    def deliver(self, entries):
+        """
+        Egallangan yozuvlarni yuborish va natijalarni yozish.
+        Yozuvlar natija bo'yicha (holat, urinish, xato) guruhlanadi - har bir guruh bitta UPDATE.
+        Qaytaradi: {'sent', 'retried', 'failed', 'skipped', 'coalesced', 'latency_ms': {kanal: o'rtacha ms}}
+        """
+        to_send, leaders = self.coalesce(entries)
+        results = self.send(to_send)
+        stats = {'sent': 0, 'retried': 0, 'failed': 0, 'skipped': 0, 'coalesced': 0}
+        groups = {}
+        attempts = []
+        latencies = {}
+
+        for entry in entries:
+            leader_id = leaders.get(entry.id)
+            error, latency_ms = results.get(leader_id or entry.id, ('Natija qaytmadi', 0.0))
+            entry.attempts += 1
+            entry.last_error = error
+            entry.coalesced = bool(leader_id) and not error
+            if not error:
+                entry.status = NotificationOutbox.Status.SENT
+                stats['sent'] += 1
+            elif isinstance(error, Undeliverable):
+                entry.status = NotificationOutbox.Status.SKIPPED
+                stats['skipped'] += 1
+            elif entry.attempts >= MAX_ATTEMPTS:
+                entry.status = NotificationOutbox.Status.FAILED
+                stats['failed'] += 1
+            else:
+                entry.status = NotificationOutbox.Status.PENDING
+                stats['retried'] += 1
+            groups.setdefault(
+                (entry.status, entry.attempts, str(error), entry.coalesced), []
+            ).append(entry.id)
+
+            # Digest tarkibidagi yoki manzilsiz yozuv alohida yuborilmagan - urinish yozilmaydi
+            if entry.status == NotificationOutbox.Status.SKIPPED:
+                continue
+            if leader_id:
+                stats['coalesced'] += entry.coalesced
+                continue
+            latencies.setdefault(entry.channel, []).append(latency_ms)
+            attempts.append(NotificationDeliveryAttempt(
+                outbox_id=entry.id,
+                channel=entry.channel,
+                success=not error,
+                latency_ms=latency_ms,
+                error=error
+            ))
+
+        now = timezone.now()
+        with transaction.atomic():
+            for (entry_status, attempt_count, error, coalesced), ids in groups.items():
+                values = {
+                    'status': entry_status,
+                    'attempts': attempt_count,
+                    'last_error': error,
+                    'coalesced': coalesced,
+                    'locked_at': None,
+                    'locked_by': '',
+                    'updated_at': now,
+                }
+                if entry_status == NotificationOutbox.Status.SENT:
+                    values['sent_at'] = now
+                elif entry_status == NotificationOutbox.Status.PENDING:
+                    values['next_attempt_at'] = now + timedelta(seconds=self.backoff(attempt_count))
+                NotificationOutbox.objects.filter(id__in=ids).update(**values)
+            NotificationDeliveryAttempt.objects.bulk_create(attempts, batch_size=self.bulk_batch_size)
+            self._finalize_notifications(entries, now)
+
+        stats['latency_ms'] = {
+            channel: round(sum(values) / len(values), 2) for channel, values in latencies.items()
+        }
+        return stats
+
+    def _finalize_notifications(self, entries, now):
+        """
+        Barcha kanallari yakunlangan va kamida bittasi yetkazilgan notificationlarda sent_at ni,
+        muvaffaqiyatsiz yoki manzilsiz kanali borlarida failed_at ni belgilash
+        """
+        notification_ids = {entry.notification_id for entry in entries}
+        unfinished = Q(outbox_entries__status__in=[
+            NotificationOutbox.Status.PENDING,
+            NotificationOutbox.Status.PROCESSING,
+            NotificationOutbox.Status.FAILED,
+        ])
+        delivered = NotificationOutbox.objects.filter(status=NotificationOutbox.Status.SENT).values(
+            'notification_id'
+        )
+        Notification.objects.filter(
+            id__in=notification_ids, sent_at__isnull=True
+        ).filter(id__in=delivered).exclude(unfinished).update(sent_at=now, updated_at=now)
+
+        failed = {}
+        for entry in entries:
+            if entry.status in (NotificationOutbox.Status.FAILED, NotificationOutbox.Status.SKIPPED):
+                failed.setdefault(f"{entry.channel}: {entry.last_error}", []).append(entry.notification_id)
+        for error_message, ids in failed.items():
+            Notification.objects.filter(id__in=ids).update(
+                failed_at=now, error_message=error_message, updated_at=now
+            )
+
+    def coalescing_stats(self, since=None):
+        """
+        Birlashtirish tejagan yuborishlar soni (digest tarkibida yuborilgan yozuvlar).
+        Qaytaradi: {'saved': jami, 'by_channel': {kanal: soni}}
+        """
+        queryset = NotificationOutbox.objects.filter(coalesced=True)
+        if since is not None:
+            queryset = queryset.filter(sent_at__gte=since)
+        by_channel = dict(
+            queryset.order_by().values_list('channel').annotate(count=Count('id'))
+        )
+        return {'saved': sum(by_channel.values()), 'by_channel': by_channel}
+
+    def run_once(self, batch_size=None, worker_id=None):
+        """Bitta paket: egallash va yuborish"""
+        started = time.perf_counter()
+        entries = self.claim(batch_size=batch_size, worker_id=worker_id)
+        stats = self.deliver(entries) if entries else {
+            'sent': 0, 'retried': 0, 'failed': 0, 'skipped': 0, 'coalesced': 0, 'latency_ms': {}
+        }
+        stats['claimed'] = len(entries)
+        stats['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        if entries:
+            logger.info(
+                "Outbox paketi: %(claimed)d ta egallandi, %(sent)d yuborildi "
+                "(%(coalesced)d tasi digest ichida), %(retried)d qayta urinishga, "
+                "%(failed)d muvaffaqiyatsiz, %(skipped)d manzilsiz, %(duration_ms).1f ms",
+                stats
+            )
+        return stats
+
+
+# Global instance
+notification_outbox = NotificationOutboxService()
@@ -0,0 +1,145 @@
+"""
+Notification retention - eski notificationlarni arxiv jadvaliga ko'chirish
+
+`notifications` jadvalida faqat so'nggi NOTIFICATION_RETENTION_DAYS kunlik ("issiq")
+xabarlar qoladi. Eskilari bo'laklab (chunk) ixcham NotificationArchive jadvaliga
+ko'chiriladi va o'chiriladi; arxivdan esa NOTIFICATION_ARCHIVE_RETENTION_DAYS dan
+eskilari o'chiriladi. Vazifa cron (`python manage.py archive_notifications`) yoki
+celery beat (`api.tasks.archive_notifications`) orqali ishga tushiriladi.
+"""
+
+import logging
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, NotificationArchive, NotificationOutbox
+from .notification_counter import unread_counter
+
+logger = logging.getLogger(__name__)
+
+RETENTION_DAYS = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90)
+# Arxivda saqlash muddati (kun), 0 - arxiv o'chirilmaydi
+ARCHIVE_RETENTION_DAYS = getattr(settings, 'NOTIFICATION_ARCHIVE_RETENTION_DAYS', 365)
+
+ARCHIVE_FIELDS = (
+    'id', 'recipient_user_id', 'type', 'title', 'message',
+    'related_rfq_id', 'related_offer_id', 'related_order_id', 'read_at', 'created_at',
+)
+
+
+def hot_cutoff(now=None):
+    """Issiq (notifications jadvalidagi) xabarlarning eng eski vaqti"""
+    return (now or timezone.now()) - timedelta(days=RETENTION_DAYS)
+
+
+class NotificationRetention:
+    """
+    Bo'laklab arxivlash va o'chirish: har bir bo'lak id bo'yicha tanlanadi (keyset)
+    va alohida tranzaksiyada bajariladi - jadval uzoq vaqt qulflanmaydi.
+    Yetkazilishi tugamagan (outbox da navbatdagi) xabarlar arxivlanmaydi.
+    """
+    default_chunk_size = 1000
+
+    def run(self, now=None, chunk_size=None):
+        """
+        Bitta retention o'tishi. Qaytaradi: {'archived', 'purged', 'chunks', 'duration_ms'}
+        """
+        now = now or timezone.now()
+        chunk_size = chunk_size or self.default_chunk_size
+        started = time.perf_counter()
+
+        archived, chunks = self.archive(hot_cutoff(now), chunk_size)
+        purged = 0
+        if ARCHIVE_RETENTION_DAYS:
+            purged = self.purge_archive(now - timedelta(days=ARCHIVE_RETENTION_DAYS), chunk_size)
+
+        stats = {
+            'archived': archived,
+            'purged': purged,
+            'chunks': chunks,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+        logger.info(
+            "Notification retention: %(archived)d ta arxivlandi, %(purged)d ta arxivdan o'chirildi, "
+            "%(chunks)d ta bo'lak, %(duration_ms).1f ms", stats
+        )
+        return stats
+
+    def archive(self, before, chunk_size=None):
+        """before dan eski notificationlarni arxivga ko'chirish. Qaytaradi: (soni, bo'laklar)"""
+        chunk_size = chunk_size or self.default_chunk_size
+        candidates = Notification.objects.filter(created_at__lt=before).exclude(
+            outbox_entries__status__in=[
+                NotificationOutbox.Status.PENDING, NotificationOutbox.Status.PROCESSING
+            ]
+        ).order_by('id')
+
+        archived = chunks = 0
+        last_id = 0
+        while True:
+            ids = list(candidates.filter(id__gt=last_id).values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            archived += self._archive_chunk(ids)
+            chunks += 1
+            if len(ids) < chunk_size:
+                break
+        return archived, chunks
+
+    @transaction.atomic
+    def _archive_chunk(self, ids):
+        rows = list(
+            Notification.objects.select_for_update().filter(id__in=ids).values(*ARCHIVE_FIELDS)
+        )
+        if not rows:
+            return 0
+        # Takroriy ishga tushirishda mavjud arxiv yozuvlari o'tkazib yuboriladi
+        NotificationArchive.objects.bulk_create(
+            [NotificationArchive(**row) for row in rows], ignore_conflicts=True
+        )
+        Notification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        unread_counter.decrement_many(Counter(
+            row['recipient_user_id'] for row in rows
+            if row['recipient_user_id'] and row['read_at'] is None
+        ))
+        return len(rows)
+
+    def purge_archive(self, before, chunk_size=None):
+        """Arxivdan before dan eski yozuvlarni bo'laklab o'chirish"""
+        chunk_size = chunk_size or self.default_chunk_size
+        queryset = NotificationArchive.objects.filter(created_at__lt=before).order_by('id')
+        return self._delete_in_chunks(queryset, chunk_size)
+
+    def delete_for_user(self, queryset, chunk_size=None):
+        """
+        Foydalanuvchi notificationlarini bo'laklab o'chirish (views dan).
+        Qaytaradi: o'chirilganlar soni
+        """
+        chunk_size = chunk_size or self.default_chunk_size
+        return self._delete_in_chunks(queryset.order_by('id'), chunk_size)
+
+    def _delete_in_chunks(self, queryset, chunk_size):
+        model = queryset.model
+        deleted = 0
+        last_id = 0
+        while True:
+            ids = list(queryset.filter(id__gt=last_id).values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            with transaction.atomic():
+                model.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+            if len(ids) < chunk_size:
+                break
+        return deleted
+
+
+# Global instance
+notification_retention = NotificationRetention()
@@ -1,8 +1,12 @@
+from collections import Counter
+
+from django.db import transaction
 from django.utils import timezone
 from django.conf import settings
 from .models import Notification, User
-from .firebase_service import firebase_service
-from .sms_service import sms_service
+from .notification_counter import unread_counter
+from .notification_outbox import notification_outbox
+from .realtime import publish_notifications
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,7 +29,9 @@ class NotificationService:
         related_order=None
     ):
         """
-        Notification yaratish va yuborish
+        Notification yaratish va yuborish navbatiga (outbox) qo'yish.
+        Push/SMS so'rov ichida yuborilmaydi - ularni `deliver_notifications` worker yuboradi.
+        Chaqiruvchi tranzaksiya ichida bo'lsa, notification ham o'sha tranzaksiyaga kiradi.
         
         Args:
             notification_type: Notification turi
@@ -33,26 +39,29 @@ class NotificationService:
             message: Xabar matni
             recipient_user: Qabul qiluvchi foydalanuvchi
             delivery_method: Yuborish usuli
-            related_*: Bog'liq obyektlar
+            related_*: Bog'liq obyektlar (yoki ularning id lari)
         
         Returns:
             Notification: Yaratilgan notification
         """
         try:
-            # Database da notification yaratish
-            notification = Notification.objects.create(
-                type=notification_type,
-                title=title,
-                message=message,
-                recipient_user=recipient_user,
-                delivery_method=delivery_method,
-                related_rfq=related_rfq,
-                related_offer=related_offer,
-                related_order=related_order
-            )
-            
-            # Delivery method bo'yicha yuborish
-            NotificationService._deliver_notification(notification)
+            with transaction.atomic():
+                # Database da notification yaratish
+                notification = Notification.objects.create(
+                    type=notification_type,
+                    title=title,
+                    message=message,
+                    recipient_user=recipient_user,
+                    delivery_method=delivery_method,
+                    related_rfq_id=getattr(related_rfq, 'pk', related_rfq),
+                    related_offer_id=getattr(related_offer, 'pk', related_offer),
+                    related_order_id=getattr(related_order, 'pk', related_order),
+                    # Faqat database - yuboriladigan kanal yo'q
+                    sent_at=timezone.now() if delivery_method == Notification.DeliveryMethod.DATABASE_ONLY else None
+                )
+                
+                # Push/SMS kanallari uchun outbox yozuvlari
+                notification_outbox.enqueue(notification)
             
             return notification
             
@@ -61,92 +70,12 @@ class NotificationService:
             raise
     
     @staticmethod
-    def _deliver_notification(notification):
-        """
-        Notificationni yuborish (private method)
-        """
-        try:
-            if notification.delivery_method in [
-                Notification.DeliveryMethod.PUSH_ONLY,
-                Notification.DeliveryMethod.PUSH_SMS,
-                Notification.DeliveryMethod.ALL
-            ]:
-                NotificationService._send_push_notification(notification)
-            
-            if notification.delivery_method in [
-                Notification.DeliveryMethod.SMS_ONLY,
-                Notification.DeliveryMethod.PUSH_SMS,
-                Notification.DeliveryMethod.ALL
-            ]:
-                NotificationService._send_sms_notification(notification)
-            
-            # Yuborilgan deb belgilash
-            notification.mark_as_sent()
-            
-        except Exception as e:
-            logger.error(f"Notification yuborishda xatolik: {str(e)}")
-            notification.mark_as_failed(str(e))
-    
-    @staticmethod
-    def _send_push_notification(notification):
-        """
-        Push notification yuborish
-        """
-        if not notification.recipient_user:
-            return
-        
-        # Foydalanuvchining device tokenini olish
-        # Bu keyingi qadamda qo'shamiz
-        device_token = NotificationService._get_user_device_token(notification.recipient_user)
-        
-        if device_token:
-            try:
-                firebase_service.send_notification(
-                    device_token=device_token,
-                    title=notification.title,
-                    body=notification.message,
-                    data={
-                        'notification_id': str(notification.id),
-                        'type': notification.type,
-                        'related_rfq': str(notification.related_rfq.id) if notification.related_rfq else None,
-                        'related_offer': str(notification.related_offer.id) if notification.related_offer else None,
-                        'related_order': str(notification.related_order.id) if notification.related_order else None,
-                    }
-                )
-                logger.info(f"Push notification yuborildi: {notification.id}")
-            except Exception as e:
-                logger.error(f"Push notification yuborishda xatolik: {str(e)}")
-                raise
-        else:
-            logger.warning(f"Foydalanuvchi uchun device token topilmadi: {notification.recipient_user.phone}")
-    
-    @staticmethod
-    def _send_sms_notification(notification):
-        """
-        SMS notification yuborish
-        """
-        if not notification.recipient_user:
-            return
-        
-        try:
-            sms_service.send_sms(
-                phone=notification.recipient_user.phone,
-                message=f"{notification.title}\n{notification.message}"
-            )
-            logger.info(f"SMS notification yuborildi: {notification.id}")
-        except Exception as e:
-            logger.error(f"SMS notification yuborishda xatolik: {str(e)}")
-            raise
-    
-    @staticmethod
-    def _get_user_device_token(user):
+    def get_coalescing_stats(since=None):
         """
-        Foydalanuvchining device tokenini olish
-        Bu keyingi qadamda User modeliga qo'shamiz
+        Birlashtirish (digest) tejagan push/SMS yuborishlar soni.
+        Bir xil turdagi xabarlar notification_outbox da qabul qiluvchi bo'yicha oynada yig'iladi.
         """
-        # Hozircha None qaytaramiz
-        # Keyingi qadamda User modeliga device_token field qo'shamiz
-        return getattr(user, 'device_token', None)
+        return notification_outbox.coalescing_stats(since=since)
     
     @staticmethod
     def send_bulk_notification(
@@ -157,32 +86,46 @@ class NotificationService:
         delivery_method=Notification.DeliveryMethod.DATABASE_ONLY
     ):
         """
-        Ko'p foydalanuvchilarga notification yuborish
+        Ko'p foydalanuvchilarga notification yuborish.
+        Barcha notificationlar va outbox yozuvlari bulk_create bilan bitta tranzaksiyada
+        yoziladi; push xabarlarni worker FCM multicast (500 tokenli paketlar) bilan yuboradi.
         
         Args:
             notification_type: Notification turi
             title: Sarlavha
             message: Xabar matni
-            recipient_users: Qabul qiluvchi foydalanuvchilar
+            recipient_users: Qabul qiluvchi foydalanuvchilar (ro'yxat yoki queryset)
             delivery_method: Yuborish usuli
         
         Returns:
             list: Yaratilgan notificationlar
         """
-        notifications = []
+        sent_at = timezone.now() if delivery_method == Notification.DeliveryMethod.DATABASE_ONLY else None
+        notifications = [
+            Notification(
+                type=notification_type,
+                title=title,
+                message=message,
+                recipient_user=user,
+                delivery_method=delivery_method,
+                sent_at=sent_at
+            )
+            for user in recipient_users
+        ]
         
-        for user in recipient_users:
-            try:
-                notification = NotificationService.create_notification(
-                    notification_type=notification_type,
-                    title=title,
-                    message=message,
-                    recipient_user=user,
-                    delivery_method=delivery_method
+        try:
+            with transaction.atomic():
+                notifications = Notification.objects.bulk_create(
+                    notifications, batch_size=notification_outbox.bulk_batch_size
                 )
-                notifications.append(notification)
-            except Exception as e:
-                logger.error(f"Bulk notification yuborishda xatolik (user: {user.phone}): {str(e)}")
+                notification_outbox.enqueue(notifications)
+                unread_counter.increment_many(Counter(
+                    notification.recipient_user_id for notification in notifications
+                ))
+                publish_notifications(notifications)
+        except Exception as e:
+            logger.error(f"Bulk notification yaratishda xatolik ({len(notifications)} ta): {str(e)}")
+            raise
         
         return notifications
     
@@ -192,49 +135,47 @@ class NotificationService:
         title,
         message,
         topic,
-        delivery_method=Notification.DeliveryMethod.PUSH_ONLY
+        delivery_method=Notification.DeliveryMethod.PUSH_ONLY,
+        related_rfq=None
     ):
         """
-        Topic bo'yicha notification yuborish
+        Topic bo'yicha notification yuborish.
+        Bitta FCM topic xabari outbox orqali yuboriladi - topicga obuna bo'lgan
+        qurilmalarga FCM o'zi tarqatadi (har bir foydalanuvchiga alohida push yo'q).
         
         Args:
             notification_type: Notification turi
             title: Sarlavha
             message: Xabar matni
-            topic: Topic nomi (masalan: 'all_suppliers', 'all_buyers')
-            delivery_method: Yuborish usuli
+            topic: Topic nomi (masalan: 'category_5', 'all_suppliers')
+            delivery_method: Yuborish usuli (topic faqat push kanaliga ega)
+            related_rfq: Bog'liq RFQ (yoki uning id si)
         
         Returns:
             Notification: Yaratilgan notification
         """
+        push = delivery_method in [
+            Notification.DeliveryMethod.PUSH_ONLY,
+            Notification.DeliveryMethod.PUSH_SMS,
+            Notification.DeliveryMethod.ALL
+        ]
         try:
-            # Database da notification yaratish (recipient_user=None)
-            notification = Notification.objects.create(
-                type=notification_type,
-                title=title,
-                message=message,
-                recipient_user=None,  # Topic notification uchun
-                delivery_method=delivery_method
-            )
-            
-            # FCM topic notification yuborish
-            if delivery_method in [
-                Notification.DeliveryMethod.PUSH_ONLY,
-                Notification.DeliveryMethod.PUSH_SMS,
-                Notification.DeliveryMethod.ALL
-            ]:
-                firebase_service.send_topic_notification(
-                    topic=topic,
+            with transaction.atomic():
+                # Database da notification yaratish (recipient_user=None)
+                notification = Notification.objects.create(
+                    type=notification_type,
                     title=title,
-                    body=message,
-                    data={
-                        'notification_id': str(notification.id),
-                        'type': notification_type,
-                        'topic': topic,
-                    }
+                    message=message,
+                    recipient_user=None,  # Topic notification uchun
+                    delivery_method=delivery_method,
+                    related_rfq_id=getattr(related_rfq, 'pk', related_rfq),
+                    sent_at=None if push else timezone.now()
                 )
+                
+                # FCM topic xabari worker orqali yuboriladi
+                if push:
+                    notification_outbox.enqueue_topic(notification, topic)
             
-            notification.mark_as_sent()
             return notification
             
         except Exception as e:
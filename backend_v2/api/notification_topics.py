@@ -0,0 +1,109 @@
+"""
+FCM topic obunalari - sotuvchi kategoriyalari bo'yicha (`category_<id>`)
+
+Kerakli holat SupplierCategory x DeviceToken dan bitta so'rov bilan hisoblanadi va
+TopicSubscription (FCM da haqiqatda obuna qilingan juftliklar) bilan solishtiriladi.
+Farq topic bo'yicha guruhlanib, TOPIC_BATCH_SIZE tokenli subscribe_to_topic /
+unsubscribe_from_topic chaqiruvlari bilan FCM ga yuboriladi. Sinxronlash davriy
+vazifa sifatida ishlaydi (`python manage.py sync_topic_subscriptions` yoki celery beat).
+"""
+
+import logging
+import time
+
+from .device_tokens import device_tokens
+from .models import SupplierCategory, TopicSubscription
+
+logger = logging.getLogger(__name__)
+
+# FCM topic boshqaruvi chegarasi (bir chaqiruvda)
+TOPIC_BATCH_SIZE = 1000
+# Token yaroqsizligini bildiruvchi sabablar (firebase_admin ErrorInfo.reason)
+STALE_TOKEN_REASONS = {'registration-token-not-registered', 'invalid-argument'}
+
+
+def category_topic(category_id):
+    return f'category_{category_id}'
+
+
+class TopicSubscriptionManager:
+
+    def desired(self):
+        """Kerakli (token, topic) juftliklari: faol sotuvchilarning barcha qurilmalari"""
+        rows = SupplierCategory.objects.filter(
+            user__is_active=True, user__device_tokens__isnull=False
+        ).values_list('user__device_tokens__token', 'category_id')
+        return {(token, category_topic(category_id)) for token, category_id in rows}
+
+    def sync(self, client=None):
+        """
+        Bitta sinxronlash. Qaytaradi: {'subscribed', 'unsubscribed', 'failed', 'calls', 'duration_ms'}
+        """
+        started = time.perf_counter()
+        desired = self.desired()
+        recorded = set(TopicSubscription.objects.values_list('token', 'topic'))
+        stats = {'subscribed': 0, 'unsubscribed': 0, 'failed': 0, 'calls': 0}
+
+        to_subscribe = self._by_topic(desired - recorded)
+        to_unsubscribe = self._by_topic(recorded - desired)
+        if to_subscribe or to_unsubscribe:
+            if client is None:
+                from .firebase_service import firebase_service as client
+            stale = set()
+            for topic, tokens in to_subscribe.items():
+                done = self._call(client.subscribe_to_topic, tokens, topic, stats, stale)
+                TopicSubscription.objects.bulk_create(
+                    [TopicSubscription(token=token, topic=topic) for token in done],
+                    batch_size=TOPIC_BATCH_SIZE, ignore_conflicts=True
+                )
+                stats['subscribed'] += len(done)
+            for topic, tokens in to_unsubscribe.items():
+                done = self._call(client.unsubscribe_from_topic, tokens, topic, stats, stale)
+                # Yaroqsiz token FCM da ham obunadan chiqqan hisoblanadi
+                done += [token for token in tokens if token in stale]
+                for offset in range(0, len(done), TOPIC_BATCH_SIZE):
+                    TopicSubscription.objects.filter(
+                        topic=topic, token__in=done[offset:offset + TOPIC_BATCH_SIZE]
+                    ).delete()
+                stats['unsubscribed'] += len(done)
+            if stale:
+                device_tokens.prune(stale)
+
+        stats['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(
+            "Topic obunalari: %(subscribed)d ta obuna, %(unsubscribed)d ta bekor qilindi, "
+            "%(failed)d ta xato, %(calls)d ta FCM chaqiruvi, %(duration_ms).1f ms", stats
+        )
+        return stats
+
+    @staticmethod
+    def _by_topic(pairs):
+        topics = {}
+        for token, topic in pairs:
+            topics.setdefault(topic, []).append(token)
+        return topics
+
+    def _call(self, method, tokens, topic, stats, stale):
+        """Tokenlarni paketlab yuborish. Qaytaradi: muvaffaqiyatli tokenlar"""
+        done = []
+        for offset in range(0, len(tokens), TOPIC_BATCH_SIZE):
+            chunk = tokens[offset:offset + TOPIC_BATCH_SIZE]
+            stats['calls'] += 1
+            try:
+                response = method(chunk, topic)
+            except Exception as e:
+                logger.error(f"Topic '{topic}' obunasini o'zgartirib bo'lmadi: {str(e)}")
+                stats['failed'] += len(chunk)
+                continue
+            failed = set()
+            for error in response.errors:
+                failed.add(error.index)
+                if error.reason in STALE_TOKEN_REASONS:
+                    stale.add(chunk[error.index])
+            stats['failed'] += len(failed)
+            done.extend(token for index, token in enumerate(chunk) if index not in failed)
+        return done
+
+
+# Global instance
+topic_subscriptions = TopicSubscriptionManager()
@@ -0,0 +1,133 @@
+"""
+Offer acceptance service - taklifni qabul qilish (bitta tranzaksiyada, RFQ qulfi bilan)
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+
+from .models import Offer, Order, OrderStatusHistory, RFQ
+from .realtime import publish_offer_status, publish_order_status
+
+logger = logging.getLogger(__name__)
+
+# Qulf kutish shu chegaradan oshsa ogohlantirish yoziladi (ms)
+LOCK_WAIT_WARNING_MS = getattr(settings, 'OFFER_ACCEPT_LOCK_WAIT_WARNING_MS', 200)
+
+
+class OfferAcceptanceError(Exception):
+    """Taklifni qabul qilib bo'lmaydi - xabar va HTTP status bilan"""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class OfferAcceptanceService:
+    """
+    Taklifni qabul qilish:
+        1. RFQ qatori select_for_update bilan qulflanadi (qulf kutish vaqti o'lchanadi)
+        2. Tanlangan taklif ACCEPTED, qolganlari bitta UPDATE bilan REJECTED
+        3. RFQ COMPLETED
+        4. Order va birinchi OrderStatusHistory yozuvi yaratiladi
+    Barcha qadamlar bitta tranzaksiyada - bir RFQ uchun ikki taklif qabul qilinmaydi.
+    """
+    acceptable_statuses = (Offer.OfferStatus.PENDING, Offer.OfferStatus.COUNTER_OFFERED)
+    sibling_rejection_reason = 'Boshqa taklif qabul qilindi'
+
+    def accept(self, offer_id, user, rfq_id=None):
+        """
+        Qaytaradi: {'order', 'offer', 'rejected_count', 'lock_wait_ms', 'duration_ms'}
+        """
+        started = time.perf_counter()
+        offers = Offer.objects.filter(pk=offer_id)
+        if rfq_id is not None:
+            offers = offers.filter(rfq_id=rfq_id)
+        offer_rfq_id = offers.values_list('rfq_id', flat=True).first()
+        if offer_rfq_id is None:
+            raise OfferAcceptanceError('Taklif topilmadi', status.HTTP_404_NOT_FOUND)
+
+        with transaction.atomic():
+            lock_started = time.perf_counter()
+            rfq = RFQ.objects.select_for_update().get(pk=offer_rfq_id)
+            lock_wait_ms = (time.perf_counter() - lock_started) * 1000
+
+            if rfq.buyer_id != user.id:
+                raise OfferAcceptanceError(
+                    'Siz bu taklifni qabul qila olmaysiz', status.HTTP_403_FORBIDDEN
+                )
+            if rfq.status != RFQ.RFQStatus.ACTIVE:
+                raise OfferAcceptanceError('RFQ faol emas', status.HTTP_409_CONFLICT)
+
+            offer = Offer.objects.select_related('supplier').get(pk=offer_id)
+            if offer.status not in self.acceptable_statuses:
+                raise OfferAcceptanceError(
+                    'Bu taklifni qabul qilib bo\'lmaydi', status.HTTP_409_CONFLICT
+                )
+
+            now = timezone.now()
+            Offer.objects.filter(pk=offer.pk).update(
+                status=Offer.OfferStatus.ACCEPTED, updated_at=now
+            )
+            offer.status = Offer.OfferStatus.ACCEPTED
+
+            siblings = list(
+                Offer.objects.filter(rfq_id=rfq.pk).exclude(pk=offer.pk).exclude(
+                    status=Offer.OfferStatus.REJECTED
+                ).values_list('id', 'supplier_id')
+            )
+            rejected_count = Offer.objects.filter(id__in=[offer_id for offer_id, _ in siblings]).update(
+                status=Offer.OfferStatus.REJECTED,
+                rejection_reason=self.sibling_rejection_reason,
+                updated_at=now
+            )
+
+            RFQ.objects.filter(pk=rfq.pk).update(status=RFQ.RFQStatus.COMPLETED, updated_at=now)
+            rfq.status = RFQ.RFQStatus.COMPLETED
+
+            order = Order.objects.create(
+                rfq=rfq,
+                offer=offer,
+                buyer_id=rfq.buyer_id,
+                supplier_id=offer.supplier_id,
+                total_amount=offer.total_amount,
+                payment_method=rfq.payment_method,
+                delivery_address=rfq.delivery_location,
+                delivery_date=offer.delivery_date,
+                status=Order.OrderStatus.CREATED
+            )
+            OrderStatusHistory.objects.create(
+                order=order,
+                status=order.status,
+                comment='Taklif qabul qilindi, buyurtma yaratildi',
+                created_by=user
+            )
+
+            publish_offer_status(offer.pk, rfq.pk, offer.status, [offer.supplier_id])
+            for sibling_id, supplier_id in siblings:
+                publish_offer_status(sibling_id, rfq.pk, Offer.OfferStatus.REJECTED, [supplier_id])
+            publish_order_status(order.pk, order.status, [order.buyer_id, order.supplier_id])
+
+        duration_ms = (time.perf_counter() - started) * 1000
+        log = logger.warning if lock_wait_ms >= LOCK_WAIT_WARNING_MS else logger.info
+        log(
+            "Taklif #%s qabul qilindi (RFQ #%s, order #%s): %d ta taklif rad etildi, "
+            "qulf kutish %.1f ms, jami %.1f ms",
+            offer.pk, rfq.pk, order.pk, rejected_count, lock_wait_ms, duration_ms
+        )
+        return {
+            'order': order,
+            'offer': offer,
+            'rejected_count': rejected_count,
+            'lock_wait_ms': round(lock_wait_ms, 2),
+            'duration_ms': round(duration_ms, 2),
+        }
+
+
+# Global instance
+offer_acceptance_service = OfferAcceptanceService()
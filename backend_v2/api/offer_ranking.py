@@ -0,0 +1,127 @@
+"""
+Offer ranking - RFQ takliflarini narx, yetkazish muddati va sotuvchi ishonchliligi bo'yicha solishtirish
+"""
+
+import math
+from collections import OrderedDict
+
+import numpy as np
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Offer, Order
+
+DEFAULT_WEIGHTS = OrderedDict([
+    ('price', 0.5),
+    ('delivery', 0.3),
+    ('reliability', 0.2),
+])
+
+
+def normalize_weights(weights=None):
+    """Vaznlarni yig'indisi 1 ga teng qilib normallashtirish (nan/inf e'tiborga olinmaydi)"""
+    merged = OrderedDict(DEFAULT_WEIGHTS)
+    if weights:
+        merged.update({
+            key: float(value) for key, value in weights.items()
+            if key in merged and math.isfinite(float(value))
+        })
+    total = sum(merged.values())
+    if not math.isfinite(total) or total <= 0:
+        merged = OrderedDict(DEFAULT_WEIGHTS)
+        total = sum(merged.values())
+    return OrderedDict((key, value / total) for key, value in merged.items())
+
+
+def _inverted_minmax(values):
+    """Kichik qiymat - yaxshi: [0, 1] oralig'iga o'tkazish (eng kichigi 1)"""
+    if values.size == 0:
+        return values
+    low, high = values.min(), values.max()
+    if high == low:
+        return np.ones_like(values)
+    return (high - values) / (high - low)
+
+
+class OfferRankingService:
+    """
+    Takliflarni vektorlashtirilgan (NumPy) hisob bilan reytinglash.
+
+    Ikkita so'rov: takliflar (select_related bilan) va sotuvchilar bo'yicha
+    bajarilgan/bekor qilingan buyurtmalar soni (bitta GROUP BY).
+    """
+
+    def get_offers(self, rfq, include_rejected=False):
+        offers = Offer.objects.filter(rfq=rfq).select_related(
+            'supplier', 'rfq__category', 'rfq__unit'
+        ).order_by('id')
+        if not include_rejected:
+            offers = offers.exclude(status=Offer.OfferStatus.REJECTED)
+        return list(offers)
+
+    def supplier_reliability(self, supplier_ids):
+        """
+        Sotuvchi ishonchliligi: (yakunlangan + 1) / (yakunlangan + bekor qilingan + 2).
+        Buyurtma tarixi yo'q sotuvchi 0.5 oladi.
+        """
+        stats = Order.objects.filter(supplier_id__in=set(supplier_ids)).order_by().values(
+            'supplier_id'
+        ).annotate(
+            completed=Count('id', filter=Q(status=Order.OrderStatus.COMPLETED)),
+            cancelled=Count('id', filter=Q(status=Order.OrderStatus.CANCELLED)),
+        )
+        return {
+            row['supplier_id']: (row['completed'] + 1) / (row['completed'] + row['cancelled'] + 2)
+            for row in stats
+        }
+
+    def score(self, prices, lead_days, reliability, weights):
+        """
+        Har bir taklif uchun mezon ballari va umumiy ball.
+        Qaytaradi: (ballar matritsasi [n x 3], umumiy ball [n])
+        """
+        matrix = np.column_stack([
+            _inverted_minmax(prices),
+            _inverted_minmax(lead_days),
+            reliability,
+        ]) if prices.size else np.empty((0, 3))
+        weight_vector = np.array(list(weights.values()), dtype=np.float64)
+        return matrix, matrix @ weight_vector
+
+    def rank(self, rfq, weights=None, include_rejected=False):
+        """Takliflarni umumiy ball bo'yicha kamayish tartibida qaytarish"""
+        weights = normalize_weights(weights)
+        offers = self.get_offers(rfq, include_rejected=include_rejected)
+        reliability_map = self.supplier_reliability(offer.supplier_id for offer in offers)
+
+        today = timezone.now().date()
+        prices = np.fromiter((offer.price_per_unit for offer in offers), dtype=np.float64, count=len(offers))
+        lead_days = np.fromiter(
+            (max((offer.delivery_date - today).days, 0) for offer in offers),
+            dtype=np.float64, count=len(offers)
+        )
+        reliability = np.fromiter(
+            (reliability_map.get(offer.supplier_id, 0.5) for offer in offers),
+            dtype=np.float64, count=len(offers)
+        )
+
+        matrix, totals = self.score(prices, lead_days, reliability, weights)
+        # Teng ballda arzonroq, keyin oldinroq kelgan taklif yuqorida
+        order = np.lexsort((np.arange(len(offers)), prices, -totals))
+
+        ranked = []
+        for position, index in enumerate(order, start=1):
+            ranked.append({
+                'rank': position,
+                'offer': offers[index],
+                'score': round(float(totals[index]), 4),
+                'price_score': round(float(matrix[index, 0]), 4),
+                'delivery_score': round(float(matrix[index, 1]), 4),
+                'reliability_score': round(float(matrix[index, 2]), 4),
+                'lead_time_days': int(lead_days[index]),
+            })
+        return weights, ranked
+
+
+# Global instance
+offer_ranking_service = OfferRankingService()
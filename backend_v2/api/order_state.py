@@ -0,0 +1,145 @@
+"""
+Order state machine - buyurtma holatlari o'tishlari (deklarativ jadval)
+"""
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+
+from .models import Order, OrderStatusHistory
+from .realtime import publish_order_status
+
+S = Order.OrderStatus
+
+# Holat -> ruxsat etilgan keyingi holatlar
+TRANSITIONS = {
+    S.CREATED: {S.AWAITING_PAYMENT, S.IN_PREPARATION, S.CANCELLED},
+    S.AWAITING_PAYMENT: {S.PAYMENT_CONFIRMED, S.CANCELLED},
+    S.PAYMENT_CONFIRMED: {S.IN_PREPARATION},
+    S.IN_PREPARATION: {S.READY_FOR_DELIVERY, S.IN_TRANSIT},
+    S.READY_FOR_DELIVERY: {S.IN_TRANSIT},
+    S.IN_TRANSIT: {S.DELIVERED, S.CONFIRMED},
+    S.DELIVERED: {S.CONFIRMED, S.COMPLETED},
+    S.CONFIRMED: {S.COMPLETED},
+    S.COMPLETED: set(),
+    S.CANCELLED: set(),
+}
+
+# Oldindan hisoblangan jadvallar: (from, to) juftliklari va har bir holatga kira oladigan holatlar
+ALLOWED = frozenset(
+    (source, target) for source, targets in TRANSITIONS.items() for target in targets
+)
+SOURCES = {
+    target: frozenset(source for source, to in ALLOWED if to == target)
+    for target in S.values
+}
+
+# Holat tarixiga yoziladigan standart izohlar
+DEFAULT_COMMENTS = {
+    S.AWAITING_PAYMENT: 'To\'lov kutilmoqda',
+    S.PAYMENT_CONFIRMED: 'Sotuvchi tomonidan to\'lov tasdiqlangan',
+    S.IN_PREPARATION: 'Buyurtma tayyorlanmoqda',
+    S.READY_FOR_DELIVERY: 'Yetkazib berishga tayyor',
+    S.IN_TRANSIT: 'Mahsulot yo\'lda',
+    S.DELIVERED: 'Yetkazib berildi',
+    S.CONFIRMED: 'Yetkazish tasdiqlandi',
+    S.COMPLETED: 'Buyurtma yakunlandi',
+    S.CANCELLED: 'Buyurtma bekor qilindi',
+}
+
+
+class InvalidTransition(Exception):
+    """Ruxsat etilmagan holat o'tishi"""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class OrderStateMachine:
+    """
+    Buyurtma holatini o'zgartirish. Yozuv faqat o'zgargan ustunlar bo'yicha
+    shartli UPDATE (WHERE status = eski_holat) bilan bajariladi - parallel
+    o'zgarish bo'lsa InvalidTransition (409) qaytadi.
+    """
+
+    def can_transition(self, from_status, to_status):
+        return (from_status, to_status) in ALLOWED
+
+    def allowed_transitions(self, from_status):
+        return sorted(TRANSITIONS.get(from_status, ()))
+
+    def _validate(self, from_status, to_status):
+        if to_status not in SOURCES:
+            raise InvalidTransition(f'Noma\'lum holat: {to_status}')
+        if (from_status, to_status) not in ALLOWED:
+            raise InvalidTransition(
+                f'"{from_status}" holatidan "{to_status}" holatiga o\'tib bo\'lmaydi'
+            )
+
+    @transaction.atomic
+    def transition(self, order, to_status, user, comment=None, **fields):
+        """
+        Bitta buyurtmani yangi holatga o'tkazish.
+        fields - holat bilan birga yoziladigan qo'shimcha maydonlar.
+        """
+        from_status = order.status
+        self._validate(from_status, to_status)
+
+        now = timezone.now()
+        values = dict(fields, status=to_status, updated_at=now)
+        updated = Order.objects.filter(pk=order.pk, status=from_status).update(**values)
+        if not updated:
+            raise InvalidTransition(
+                'Buyurtma holati boshqa so\'rov tomonidan o\'zgartirildi',
+                status.HTTP_409_CONFLICT
+            )
+        for field, value in values.items():
+            setattr(order, field, value)
+        publish_order_status(order.pk, to_status, [order.buyer_id, order.supplier_id])
+
+        return OrderStatusHistory.objects.create(
+            order=order,
+            status=to_status,
+            comment=DEFAULT_COMMENTS.get(to_status, '') if comment is None else comment,
+            created_by=user
+        )
+
+    @transaction.atomic
+    def bulk_transition(self, orders, to_status, user, comment=None):
+        """
+        Ko'p buyurtmani bitta UPDATE va bitta bulk_create bilan o'tkazish.
+        orders - queryset yoki id lar ro'yxati (int yoki raqamli satr). Ruxsat etilmagan holatdagilar o'tkazib yuboriladi.
+        Qaytaradi: {'updated': [id...], 'skipped': [id...]}
+        """
+        if to_status not in SOURCES:
+            raise InvalidTransition(f'Noma\'lum holat: {to_status}')
+
+        if hasattr(orders, 'values_list'):
+            requested = set(orders.values_list('id', flat=True))
+        else:
+            # JSON / query parametrlardan kelgan id lar satr bo'lishi mumkin (noto'g'ri qiymat - ValueError)
+            requested = {int(order_id) for order_id in orders}
+
+        rows = list(
+            Order.objects.select_for_update().filter(
+                id__in=requested, status__in=SOURCES[to_status]
+            ).order_by('id').values_list('id', 'buyer_id', 'supplier_id')
+        )
+        eligible = [order_id for order_id, _, _ in rows]
+        if eligible:
+            Order.objects.filter(id__in=eligible).update(status=to_status, updated_at=timezone.now())
+            text = DEFAULT_COMMENTS.get(to_status, '') if comment is None else comment
+            OrderStatusHistory.objects.bulk_create([
+                OrderStatusHistory(order_id=order_id, status=to_status, comment=text, created_by=user)
+                for order_id in eligible
+            ])
+            for order_id, buyer_id, supplier_id in rows:
+                publish_order_status(order_id, to_status, [buyer_id, supplier_id])
+
+        return {'updated': eligible, 'skipped': sorted(requested - set(eligible))}
+
+
+# Global instance
+order_state_machine = OrderStateMachine()
@@ -0,0 +1,144 @@
+"""
+OTP store - SMS tasdiqlash kodlari ombori
+
+Kodlar keshda (production da Redis - CACHES) TTL bilan saqlanadi: ochiq kod emas,
+HMAC xeshi. Har bir kodning urinishlar hisoblagichi atomik `incr` bilan oshiriladi,
+kodni ishlatish esa `add` (SET NX) orqali - bir vaqtdagi ikki to'g'ri so'rovdan
+faqat bittasi muvaffaqiyatli bo'ladi. Jadval so'rovi yo'q.
+
+VerificationCode jadvali endi faqat audit jurnali (OTP_AUDIT_LOG): yozuvlar
+tranzaksiya commit bo'lgach `tasks.record_otp_audit` orqali (celery bo'lsa worker da)
+yoziladi. Ombor OTP_STORE_BACKEND sozlamasi bilan almashtiriladi.
+"""
+
+import hashlib
+import hmac
+import secrets
+import string
+import time
+import uuid
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+OTP_STORE_BACKEND = getattr(settings, 'OTP_STORE_BACKEND', 'api.otp_store.CacheOTPStore')
+OTP_CACHE_ALIAS = getattr(settings, 'OTP_CACHE_ALIAS', 'default')
+OTP_LENGTH = 6
+OTP_TTL_SECONDS = getattr(settings, 'OTP_TTL_SECONDS', 5 * 60)
+OTP_MAX_ATTEMPTS = getattr(settings, 'OTP_MAX_ATTEMPTS', 3)
+# Tasdiqlangan telefon ro'yxatdan o'tish uchun qancha vaqt amal qiladi
+OTP_VERIFIED_TTL_SECONDS = getattr(settings, 'OTP_VERIFIED_TTL_SECONDS', 30 * 60)
+OTP_AUDIT_LOG = getattr(settings, 'OTP_AUDIT_LOG', True)
+
+
+class OTPResult:
+    VALID = 'valid'
+    INVALID = 'invalid'  # kod noto'g'ri
+    EXPIRED = 'expired'  # kod yo'q, muddati tugagan yoki allaqachon ishlatilgan
+    LOCKED = 'locked'  # urinishlar tugagan
+
+
+class OTPStore:
+    """OTP ombori interfeysi"""
+
+    def issue(self, phone):
+        """Yangi kod yaratish (oldingi kod bekor bo'ladi). Qaytaradi: ochiq kod"""
+        raise NotImplementedError
+
+    def verify(self, phone, code):
+        """Kodni tekshirish va to'g'ri bo'lsa ishlatish. Qaytaradi: OTPResult"""
+        raise NotImplementedError
+
+    def mark_verified(self, phone):
+        raise NotImplementedError
+
+    def is_verified(self, phone):
+        raise NotImplementedError
+
+    @staticmethod
+    def generate_code():
+        return ''.join(secrets.choice(string.digits) for _ in range(OTP_LENGTH))
+
+
+class CacheOTPStore(OTPStore):
+
+    def __init__(self, cache_alias=OTP_CACHE_ALIAS, ttl=OTP_TTL_SECONDS,
+                 max_attempts=OTP_MAX_ATTEMPTS, audit_log=OTP_AUDIT_LOG):
+        self.cache_alias = cache_alias
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.audit_log = audit_log
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def issue(self, phone):
+        code = self.generate_code()
+        record_id = uuid.uuid4().hex
+        expires_at = time.time() + self.ttl
+        self.cache.set(self._key(phone), {
+            'id': record_id,
+            'hash': self._hash(phone, record_id, code),
+            'expires_at': expires_at,
+        }, self.ttl)
+        self._audit('issued', phone, expires_at, code=code)
+        return code
+
+    def verify(self, phone, code):
+        record = self.cache.get(self._key(phone))
+        if record is None:
+            return OTPResult.EXPIRED
+
+        attempts_key = f"otp:attempts:{record['id']}"
+        self.cache.add(attempts_key, 0, self.ttl)
+        try:
+            attempts = self.cache.incr(attempts_key)
+        except ValueError:  # kalit shu orada muddati tugagan
+            return OTPResult.EXPIRED
+        if attempts > self.max_attempts:
+            return OTPResult.LOCKED
+
+        if not hmac.compare_digest(record['hash'], self._hash(phone, record['id'], code)):
+            self._audit('failed', phone, record['expires_at'], attempts=attempts)
+            return OTPResult.INVALID
+
+        # Compare-and-consume: kodni faqat birinchi so'rov ishlatadi
+        if not self.cache.add(f"otp:used:{record['id']}", True, self.ttl):
+            return OTPResult.EXPIRED
+        self._audit('used', phone, record['expires_at'], attempts=attempts)
+        return OTPResult.VALID
+
+    def mark_verified(self, phone):
+        self.cache.set(f'otp:verified:{phone}', True, OTP_VERIFIED_TTL_SECONDS)
+
+    def is_verified(self, phone):
+        return bool(self.cache.get(f'otp:verified:{phone}'))
+
+    @staticmethod
+    def _key(phone):
+        return f'otp:code:{phone}'
+
+    @staticmethod
+    def _hash(phone, record_id, code):
+        message = f'{phone}:{record_id}:{code}'.encode()
+        return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+    def _audit(self, event, phone, expires_at, code='', attempts=0):
+        """Audit yozuvi - commit dan keyin, celery bo'lsa worker da"""
+        if not self.audit_log:
+            return
+        from .tasks import record_otp_audit
+
+        masked = '*' * (len(code) - 2) + code[-2:] if code else ''
+        transaction.on_commit(partial(
+            getattr(record_otp_audit, 'delay', record_otp_audit),
+            event, phone, expires_at, code=masked, attempts=attempts
+        ))
+
+
+# Global instance
+otp_store = import_string(OTP_STORE_BACKEND)()
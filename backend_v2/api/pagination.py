@@ -0,0 +1,168 @@
+"""
+Pagination - (created_at, id) bo'yicha keyset (cursor) pagination
+"""
+
+import base64
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CreatedAtKeysetPagination(BasePagination):
+    """
+    Keyset pagination: sahifalar (created_at, id) juftligi bo'yicha kesiladi.
+
+    OFFSET ishlatilmaydi - har qanday chuqurlikdagi sahifa birinchi sahifa
+    kabi created_at indeksi orqali o'qiladi. Cursor oxirgi (yoki birinchi)
+    yozuvning (created_at, id) qiymatini va yo'nalishni saqlaydi.
+    """
+    ordering_field = 'created_at'
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 20)
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Noto\'g\'ri cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+        value, pk, reverse = self.cursor or (None, None, False)
+        field = self.ordering_field
+
+        if reverse:
+            queryset = queryset.order_by(field, 'id')
+            if value is not None:
+                queryset = queryset.filter(
+                    Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk})
+                )
+        else:
+            queryset = queryset.order_by(f'-{field}', '-id')
+            if value is not None:
+                queryset = queryset.filter(
+                    Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk})
+                )
+
+        # Keyingi sahifa borligini bilish uchun bitta ortiqcha yozuv olinadi
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = self.cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        """So'rovdan sahifa hajmini olish"""
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def format_value(self, obj):
+        """Tartiblash maydoni qiymatini cursor uchun matnga o'tkazish"""
+        return obj.created_at.isoformat()
+
+    def parse_value(self, raw):
+        """Cursor dagi matnni tartiblash maydoni qiymatiga o'tkazish"""
+        value = parse_datetime(raw)
+        if value is None:
+            raise ValueError(raw)
+        return value
+
+    def decode_cursor(self, request):
+        """Cursor ni (qiymat, id, reverse) ko'rinishiga o'tkazish"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            value, pk, reverse = raw.split('|')
+            return self.parse_value(value), int(pk), reverse == '1'
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse=False):
+        """Obyekt (qiymat, id) juftligidan cursor URL yaratish"""
+        raw = f"{self.format_value(obj)}|{obj.pk}|{1 if reverse else 0}"
+        encoded = base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class SearchRankKeysetPagination(CreatedAtKeysetPagination):
+    """
+    Full-text qidiruv natijalari uchun keyset pagination:
+    sahifalar (search_rank, id) juftligi bo'yicha kesiladi.
+    """
+    ordering_field = 'search_rank'
+
+    def format_value(self, obj):
+        return repr(float(obj.search_rank))
+
+    def parse_value(self, raw):
+        return float(raw)
+
+
+class KeysetPaginationMixin:
+    """
+    Custom action va APIView lar uchun keyset pagination yordamchisi.
+    ViewSet ning standart list() pagination_class ini o'zgartirmaydi.
+    """
+    keyset_pagination_class = CreatedAtKeysetPagination
+
+    def keyset_paginated_response(self, queryset, serializer_class, pagination_class=None,
+                                  **serializer_kwargs):
+        """Querysetni keyset bo'yicha sahifalab, serializatsiya qilingan javob qaytarish"""
+        paginator = (pagination_class or self.keyset_pagination_class)()
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        serializer = serializer_class(page, many=True, **serializer_kwargs)
+        return paginator.get_paginated_response(serializer.data)
@@ -0,0 +1,245 @@
+"""
+Product search service - mahsulot qidiruvi va facet hisoblari
+"""
+
+import logging
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+
+from .models import Category, Product, ProductFacetCount, User
+
+logger = logging.getLogger(__name__)
+
+# Narx oralig'i chegaralari (base_price bo'yicha)
+DEFAULT_PRICE_BANDS = [0, 100000, 500000, 1000000, 5000000, 10000000]
+
+
+class ProductSearchService:
+    """
+    Mahsulot qidiruvi: filterlar zanjiri va facet hisoblari.
+
+    Filtrsiz so'rovda kategoriya va sotuvchi turi hisoblari ProductFacetCount
+    jadvalidan o'qiladi, filtr bo'lsa esa bitta GROUP BY so'rovda hisoblanadi.
+    """
+
+    def __init__(self):
+        self.price_bands = [
+            Decimal(str(edge))
+            for edge in getattr(settings, 'PRODUCT_PRICE_BANDS', DEFAULT_PRICE_BANDS)
+        ]
+
+    def base_queryset(self):
+        return Product.objects.select_related(
+            'supplier', 'category', 'unit', 'factory'
+        ).prefetch_related('supplier__company').filter(is_active=True)
+
+    def filter_queryset(self, queryset, filters):
+        """ProductSearchSerializer validated_data bo'yicha filterlash"""
+        if filters.get('category_id'):
+            queryset = queryset.filter(category_id=filters['category_id'])
+        if filters.get('subcategory_id'):
+            queryset = queryset.filter(category__subcategories__id=filters['subcategory_id'])
+        if filters.get('brand'):
+            queryset = queryset.filter(brand__icontains=filters['brand'])
+        if filters.get('grade'):
+            queryset = queryset.filter(grade__icontains=filters['grade'])
+        if filters.get('min_price'):
+            queryset = queryset.filter(base_price__gte=filters['min_price'])
+        if filters.get('max_price'):
+            queryset = queryset.filter(base_price__lte=filters['max_price'])
+        if filters.get('supplier_type'):
+            queryset = queryset.filter(supplier__supplier_type=filters['supplier_type'])
+        if filters.get('is_featured') is not None:
+            queryset = queryset.filter(is_featured=filters['is_featured'])
+
+        # Qidiruv matni
+        if filters.get('search'):
+            search_term = filters['search']
+            queryset = queryset.filter(
+                Q(brand__icontains=search_term) |
+                Q(grade__icontains=search_term) |
+                Q(material__icontains=search_term) |
+                Q(origin_country__icontains=search_term)
+            )
+
+        return queryset
+
+    def search(self, filters):
+        """Filterlangan queryset va unga mos facetlar"""
+        # Berilmagan (None) yoki bo'sh parametrlar filtr hisoblanmaydi
+        filters = {key: value for key, value in filters.items() if value not in (None, '')}
+        queryset = self.filter_queryset(self.base_queryset(), filters)
+        return queryset, self.get_facets(queryset, filtered=bool(filters))
+
+    def price_band_expression(self):
+        """base_price ni narx oralig'i indeksiga o'tkazish"""
+        whens = [
+            When(base_price__lt=edge, then=Value(index))
+            for index, edge in enumerate(self.price_bands[1:])
+        ]
+        return Case(*whens, default=Value(len(self.price_bands) - 1), output_field=IntegerField())
+
+    def get_facets(self, queryset, filtered=True):
+        """Kategoriya, sotuvchi turi va narx oralig'i bo'yicha hisoblar"""
+        if filtered:
+            category_counts, supplier_type_counts, band_counts = self._grouped_counts(queryset)
+        else:
+            category_counts, supplier_type_counts = self._stored_counts()
+            band_counts = dict(
+                queryset.order_by()
+                .annotate(price_band=self.price_band_expression())
+                .values_list('price_band')
+                .annotate(n=Count('id'))
+            )
+        return {
+            'category': self._category_facet(category_counts),
+            'supplier_type': self._supplier_type_facet(supplier_type_counts),
+            'price_band': self._price_band_facet(band_counts),
+        }
+
+    def _grouped_counts(self, queryset):
+        """Uchala facet bitta GROUP BY so'rovda, keyin Python da yig'iladi"""
+        rows = (
+            queryset.order_by()
+            .annotate(price_band=self.price_band_expression())
+            .values('category_id', 'supplier__supplier_type', 'price_band')
+            .annotate(n=Count('id', distinct=True))
+        )
+        category_counts, supplier_type_counts, band_counts = {}, {}, {}
+        for row in rows:
+            category_id = row['category_id']
+            supplier_type = row['supplier__supplier_type'] or ''
+            band = row['price_band']
+            category_counts[category_id] = category_counts.get(category_id, 0) + row['n']
+            supplier_type_counts[supplier_type] = supplier_type_counts.get(supplier_type, 0) + row['n']
+            band_counts[band] = band_counts.get(band, 0) + row['n']
+        return category_counts, supplier_type_counts, band_counts
+
+    def _stored_counts(self):
+        """Oldindan hisoblangan kategoriya va sotuvchi turi sonlari"""
+        category_counts, supplier_type_counts = {}, {}
+        for facet, value, count in ProductFacetCount.objects.filter(count__gt=0).values_list(
+            'facet', 'value', 'count'
+        ):
+            if facet == ProductFacetCount.Facet.CATEGORY:
+                category_counts[int(value)] = count
+            else:
+                supplier_type_counts[value] = count
+        return category_counts, supplier_type_counts
+
+    def _category_facet(self, counts):
+        names = dict(Category.objects.filter(id__in=counts).values_list('id', 'name'))
+        return sorted(
+            (
+                {'id': category_id, 'name': names.get(category_id, ''), 'count': count}
+                for category_id, count in counts.items()
+            ),
+            key=lambda item: (-item['count'], item['name'])
+        )
+
+    def _supplier_type_facet(self, counts):
+        labels = dict(User.SupplierType.choices)
+        return [
+            {'value': value or None, 'label': labels.get(value, ''), 'count': counts[value]}
+            for value in sorted(counts, key=lambda value: -counts[value])
+        ]
+
+    def _price_band_facet(self, counts):
+        edges = self.price_bands
+        return [
+            {
+                'min': edges[index],
+                'max': edges[index + 1] if index + 1 < len(edges) else None,
+                'count': counts.get(index, 0),
+            }
+            for index in range(len(edges))
+        ]
+
+    # Oldindan hisoblangan sonlarni yangilash
+
+    def facet_keys(self, category_id, supplier_type, is_active):
+        """Mahsulot holatiga mos (facet, value) kalitlari"""
+        if not is_active or category_id is None:
+            return []
+        return [
+            (ProductFacetCount.Facet.CATEGORY, str(category_id)),
+            (ProductFacetCount.Facet.SUPPLIER_TYPE, supplier_type or ''),
+        ]
+
+    def apply_facet_change(self, old_keys, new_keys, amount=1):
+        """Eski va yangi holat farqini F() orqali qo'llash (amount ta mahsulot uchun)"""
+        deltas = OrderedDict()
+        for key in old_keys:
+            deltas[key] = deltas.get(key, 0) - amount
+        for key in new_keys:
+            deltas[key] = deltas.get(key, 0) + amount
+
+        for (facet, value), delta in deltas.items():
+            if delta == 0:
+                continue
+            self._increment(facet, value, delta)
+
+    def _increment(self, facet, value, delta):
+        updated = ProductFacetCount.objects.filter(facet=facet, value=value).update(
+            count=F('count') + delta
+        )
+        if updated:
+            return
+        if delta < 0:
+            # Hisob products jadvalidan ajralib ketgan - rebuild_facet_counts kerak
+            logger.warning(f"Facet hisobi topilmadi: {facet}={value!r} ({delta})")
+            return
+        try:
+            with transaction.atomic():
+                ProductFacetCount.objects.create(facet=facet, value=value, count=delta)
+        except IntegrityError:
+            # Parallel so'rov qatorni yaratib ulgurdi
+            ProductFacetCount.objects.filter(facet=facet, value=value).update(
+                count=F('count') + delta
+            )
+
+    def supplier_type_changed(self, supplier_id, old_type, new_type):
+        """Sotuvchi turi o'zgardi - uning faol mahsulotlarini eski bo'lakdan yangisiga o'tkazish"""
+        if (old_type or '') == (new_type or ''):
+            return 0
+        count = Product.objects.filter(
+            supplier_id=supplier_id, is_active=True, category__isnull=False
+        ).count()
+        if count:
+            self.apply_facet_change(
+                [(ProductFacetCount.Facet.SUPPLIER_TYPE, old_type or '')],
+                [(ProductFacetCount.Facet.SUPPLIER_TYPE, new_type or '')],
+                amount=count,
+            )
+        return count
+
+    @transaction.atomic
+    def rebuild_facet_counts(self):
+        """Barcha sonlarni products jadvalidan qayta hisoblash"""
+        active = Product.objects.filter(is_active=True).order_by()
+        rows = [
+            ProductFacetCount(
+                facet=ProductFacetCount.Facet.CATEGORY,
+                value=str(item['category_id']),
+                count=item['n']
+            )
+            for item in active.values('category_id').annotate(n=Count('id'))
+        ] + [
+            ProductFacetCount(
+                facet=ProductFacetCount.Facet.SUPPLIER_TYPE,
+                value=item['supplier__supplier_type'] or '',
+                count=item['n']
+            )
+            for item in active.values('supplier__supplier_type').annotate(n=Count('id'))
+        ]
+        ProductFacetCount.objects.all().delete()
+        ProductFacetCount.objects.bulk_create(rows)
+        return len(rows)
+
+
+# Global instance
+product_search_service = ProductSearchService()
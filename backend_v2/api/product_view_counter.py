@@ -0,0 +1,217 @@
+"""
+Product view counter - mahsulot ko'rishlarini keshda yig'ish va davriy flush
+
+Har bir ko'rish DB ga yozilmaydi: keshda (Redis) vaqt bo'lagi bo'yicha atomik `incr`
+qilinadi (`pv:<bo'lak>:<product_id>`, bo'lak = PRODUCT_VIEW_FLUSH_INTERVAL_SECONDS).
+Bo'lakdagi birinchi ko'rish mahsulot id sini bo'lak ro'yxatiga qo'shadi. Yopilgan
+bo'laklar `flush()` bilan (celery beat yoki `python manage.py flush_product_views`)
+bitta `view_count = view_count + CASE id WHEN ... END` UPDATE bilan yoziladi va
+kunlik bo'laklarga (ProductViewDaily) qo'shiladi - analytics trendlari shundan o'qiladi.
+
+Har bir bo'lakni faqat bitta flusher oladi (`add` qulfi); DB ga yozish xato bersa
+qulf bo'shatiladi va bo'lak keyingi flush da qayta yoziladi. Flusher KEY_TTL gacha
+to'xtab qolsa ham bo'laklar yo'qolmaydi: shu oraliqdagi barcha bo'laklar tekshiriladi.
+
+Kesh processlar o'rtasida umumiy bo'lishi kerak (Redis): LocMemCache da alohida
+processda ishlaydigan flush_product_views ko'rishlarni ko'rmaydi (api.E001 tekshiruvi).
+"""
+
+import logging
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Prefetch, Value, When
+from django.utils import timezone
+
+from .models import Product, ProductViewDaily
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_VIEW_FLUSH_INTERVAL_SECONDS = getattr(settings, 'PRODUCT_VIEW_FLUSH_INTERVAL_SECONDS', 60)
+PRODUCT_VIEW_CACHE_ALIAS = getattr(settings, 'PRODUCT_VIEW_CACHE_ALIAS', 'default')
+# Bo'lak yopilgandan keyin kechikkan yozuvlarni kutish
+FLUSH_GRACE_SECONDS = 2
+# Flusher to'xtab qolsa ham bo'laklar shuncha vaqt saqlanadi
+KEY_TTL = 24 * 60 * 60
+# Analytics trendi uchun kunlar soni
+TREND_DAYS = 14
+
+
+class ProductViewCounter:
+    flush_batch_size = 500
+
+    def __init__(self, interval=PRODUCT_VIEW_FLUSH_INTERVAL_SECONDS, cache_alias=PRODUCT_VIEW_CACHE_ALIAS,
+                 grace=FLUSH_GRACE_SECONDS):
+        self.interval = interval
+        self.cache_alias = cache_alias
+        self.grace = grace
+
+    @property
+    def max_catchup_buckets(self):
+        """Birinchi flush (yoki uzoq tanaffus) da orqaga qarab tekshiriladigan bo'laklar - KEY_TTL gacha"""
+        return KEY_TTL // self.interval
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def bucket(self, now=None):
+        return int((time.time() if now is None else now) // self.interval)
+
+    def increment(self, product_id, now=None):
+        """Ko'rishni qayd etish: odatda bitta atomik incr"""
+        bucket = self.bucket(now)
+        key = f'pv:{bucket}:{product_id}'
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            if self.cache.add(key, 1, KEY_TTL):
+                # Bo'lakdagi birinchi ko'rish - mahsulotni bo'lak ro'yxatiga qo'shish
+                self.cache.add(f'pv:{bucket}:n', 0, KEY_TTL)
+                slot = self.cache.incr(f'pv:{bucket}:n')
+                self.cache.set(f'pv:{bucket}:id:{slot}', product_id, KEY_TTL)
+            else:
+                self.cache.incr(key)
+
+    def flush(self, now=None):
+        """
+        Yopilgan bo'laklarni DB ga yozish.
+        Qaytaradi: {'buckets', 'products', 'views', 'duration_ms'}
+        """
+        started = time.perf_counter()
+        now = time.time() if now is None else now
+        ready = self.bucket(now - self.grace) - 1
+        last = self.cache.get('pv:flushed')
+        first = ready - self.max_catchup_buckets + 1 if last is None else max(
+            last + 1, ready - self.max_catchup_buckets + 1
+        )
+
+        # Bo'sh bo'laklar bitta get_many bilan o'tkazib yuboriladi (qulf qo'yilmaydi)
+        sizes = self.cache.get_many([f'pv:{bucket}:n' for bucket in range(first, ready + 1)])
+        claimed = []
+        by_date = defaultdict(Counter)
+        for bucket in range(first, ready + 1):
+            if not sizes.get(f'pv:{bucket}:n'):
+                continue
+            if not self.cache.add(f'pv:{bucket}:lock', True, KEY_TTL):
+                continue  # boshqa flusher olgan
+            counts = self._collect(bucket)
+            claimed.append((bucket, counts))
+            by_date[self._bucket_date(bucket)].update(counts)
+
+        stats = {'buckets': len(claimed), 'products': 0, 'views': 0}
+        if by_date:
+            try:
+                stats['products'], stats['views'] = self._write(by_date)
+            except Exception:
+                # Bo'laklar keyingi flush da qayta yoziladi
+                self.cache.delete_many([f'pv:{bucket}:lock' for bucket, _ in claimed])
+                raise
+            for bucket, counts in claimed:
+                self._cleanup(bucket, counts)
+        self.cache.set('pv:flushed', max(ready, last or ready), KEY_TTL)
+
+        stats['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        if stats['views']:
+            logger.info(
+                "Mahsulot ko'rishlari: %(buckets)d ta bo'lak, %(products)d ta mahsulot, "
+                "%(views)d ta ko'rish, %(duration_ms).1f ms", stats
+            )
+        return stats
+
+    def _collect(self, bucket):
+        """Bo'lak hisoblagichlari: {product_id: views}"""
+        size = self.cache.get(f'pv:{bucket}:n') or 0
+        if not size:
+            return {}
+        ids = self.cache.get_many([f'pv:{bucket}:id:{slot}' for slot in range(1, size + 1)]).values()
+        keys = {f'pv:{bucket}:{product_id}': product_id for product_id in ids}
+        return {keys[key]: count for key, count in self.cache.get_many(list(keys)).items() if count}
+
+    def _cleanup(self, bucket, counts):
+        size = self.cache.get(f'pv:{bucket}:n') or 0
+        self.cache.delete_many(
+            [f'pv:{bucket}:{product_id}' for product_id in counts]
+            + [f'pv:{bucket}:id:{slot}' for slot in range(1, size + 1)]
+            + [f'pv:{bucket}:n']
+        )
+
+    def _bucket_date(self, bucket):
+        return timezone.localdate(datetime.fromtimestamp(bucket * self.interval, tz=dt_timezone.utc))
+
+    def _write(self, by_date):
+        """view_count va kunlik bo'laklarni CASE li UPDATE paketlari bilan yozish"""
+        totals = Counter()
+        for counts in by_date.values():
+            totals.update(counts)
+        # O'chirilgan yoki mavjud bo'lmagan mahsulotlar tashlab yuboriladi
+        existing = set(Product.objects.filter(id__in=list(totals)).values_list('id', flat=True))
+
+        with transaction.atomic():
+            self._add_views(Product.objects, 'id', 'view_count', {
+                product_id: views for product_id, views in totals.items() if product_id in existing
+            })
+            for date, counts in by_date.items():
+                counts = {product_id: views for product_id, views in counts.items() if product_id in existing}
+                ProductViewDaily.objects.bulk_create(
+                    [ProductViewDaily(product_id=product_id, date=date) for product_id in counts],
+                    batch_size=self.flush_batch_size, ignore_conflicts=True
+                )
+                self._add_views(ProductViewDaily.objects.filter(date=date), 'product_id', 'views', counts)
+        return len(existing), sum(views for product_id, views in totals.items() if product_id in existing)
+
+    def _add_views(self, queryset, key_field, count_field, counts):
+        items = sorted(counts.items())
+        for offset in range(0, len(items), self.flush_batch_size):
+            chunk = items[offset:offset + self.flush_batch_size]
+            queryset.filter(**{f'{key_field}__in': [key for key, _ in chunk]}).update(**{
+                count_field: F(count_field) + Case(
+                    *[When(**{key_field: key}, then=Value(views)) for key, views in chunk],
+                    default=Value(0), output_field=IntegerField()
+                )
+            })
+
+
+# Global instance
+product_view_counter = ProductViewCounter()
+
+
+def _recent_daily_queryset(days=TREND_DAYS):
+    since = timezone.localdate() - timedelta(days=days - 1)
+    return ProductViewDaily.objects.filter(date__gte=since).order_by('date')
+
+
+def recent_views_prefetch(days=TREND_DAYS):
+    """Oxirgi `days` kunlik ko'rishlar - barcha mahsulotlar uchun bitta so'rov"""
+    return Prefetch('daily_views', queryset=_recent_daily_queryset(days), to_attr='recent_daily_views')
+
+
+def recent_daily_views(product, days=TREND_DAYS):
+    """Prefetch qilingan kunlik ko'rishlar, bo'lmasa mahsulot uchun alohida so'rov"""
+    rows = getattr(product, 'recent_daily_views', None)
+    if rows is None:
+        rows = _recent_daily_queryset(days).filter(product=product)
+    return rows
+
+
+def view_trend(rows, days=TREND_DAYS, today=None):
+    """Kunlik ko'rishlar (nol bilan to'ldirilgan) va oxirgi 7 kun / oldingi 7 kun taqqoslashi"""
+    today = today or timezone.localdate()
+    views = {row.date: row.views for row in rows}
+    daily = [
+        {'date': day, 'views': views.get(day, 0)}
+        for day in (today - timedelta(days=offset) for offset in range(days - 1, -1, -1))
+    ]
+    last_week = sum(item['views'] for item in daily[-7:])
+    previous_week = sum(item['views'] for item in daily[-14:-7])
+    change = round((last_week - previous_week) * 100 / previous_week, 1) if previous_week else None
+    return {
+        'daily': daily,
+        'last_7_days': last_week,
+        'previous_7_days': previous_week,
+        'change_percent': change,
+    }
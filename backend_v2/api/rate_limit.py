@@ -0,0 +1,216 @@
+"""
+Rate limiter - SMS, login, OTP tekshirish va qidiruv endpointlari uchun umumiy cheklovchi
+
+Sliding window counter: joriy va oldingi oyna hisoblagichlari keshda (Redis) saqlanadi,
+oldingi oyna o'tgan vaqt ulushiga qarab tortiladi. Bitta qaror - bitta get_many va
+bitta atomik add/incr (qulf yo'q). Kalit - scope + telefon, foydalanuvchi yoki IP.
+Limit 1 bo'lgan scope lar (masalan, SMS qayta yuborish '1/min') - aniq davr davomidagi
+cooldown: birinchi so'rov TTL li kalitni `add` qiladi, kalit tugaguncha rad etiladi
+(sliding window da oldingi oyna ulushi cooldown ni ~2 davrgacha cho'zib yuborardi).
+
+DRF ga throttle sifatida ulanadi: view da `throttle_scope` va `throttle_classes`
+(PhoneRateThrottle, IPRateThrottle, UserOrIPRateThrottle) beriladi, limit RATE_LIMITS dan
+`<scope>_<kalit turi>` bo'yicha olinadi (masalan: 'sms_phone'). Limit berilmagan
+kombinatsiya cheklanmaydi.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+RATE_LIMIT_CACHE_ALIAS = getattr(settings, 'RATE_LIMIT_CACHE_ALIAS', 'default')
+RATE_LIMITS = getattr(settings, 'RATE_LIMITS', {
+    'sms_phone': '1/min',
+    'sms_ip': '20/hour',
+    'login_phone': '10/min',
+    'login_ip': '30/min',
+    'otp_verify_phone': '10/hour',
+    'otp_verify_ip': '30/hour',
+    'search_user': '60/min',
+})
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+Decision = namedtuple('Decision', ['allowed', 'remaining', 'wait'])
+
+
+def parse_rate(rate):
+    """'10/min' -> (10, 60)"""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def get_client_ip(request):
+    """Client IP manzilini olish"""
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(',')[0]
+    else:
+        ip = request.META.get('REMOTE_ADDR')
+    return ip
+
+
+class RateLimiter:
+
+    def __init__(self, rates=None, cache_alias=RATE_LIMIT_CACHE_ALIAS):
+        self.rates = RATE_LIMITS if rates is None else rates
+        self.cache_alias = cache_alias
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def hit(self, scope, ident, rate=None):
+        """
+        So'rovni hisobga olish. Qaytaradi: Decision(allowed, remaining, wait soniya).
+        Rad etilgan so'rov hisoblagichni oshirmaydi.
+        """
+        started = time.perf_counter()
+        rate = rate or self.rates.get(scope)
+        if not rate:
+            return Decision(True, None, 0)
+        limit, period = parse_rate(rate)
+
+        now = time.time()
+        if limit == 1:
+            decision = self._cooldown(scope, ident, period, now)
+            self._record(scope, decision.allowed, time.perf_counter() - started)
+            return decision
+
+        window, offset = divmod(now, period)
+        key = f'rl:{scope}:{ident}:{int(window)}'
+        previous_key = f'rl:{scope}:{ident}:{int(window) - 1}'
+        counts = self.cache.get_many([key, previous_key])
+        current = counts.get(key, 0)
+        previous = counts.get(previous_key, 0)
+        weight = 1 - offset / period
+        estimated = previous * weight + current
+
+        if estimated + 1 > limit:
+            decision = Decision(False, 0, self._wait(limit, period, offset, current, previous))
+        else:
+            if not self.cache.add(key, 1, period * 2):
+                try:
+                    current = self.cache.incr(key)
+                except ValueError:  # kalit shu orada muddati tugagan
+                    self.cache.set(key, 1, period * 2)
+                    current = 1
+            else:
+                current = 1
+            decision = Decision(True, max(int(limit - previous * weight - current), 0), 0)
+
+        self._record(scope, decision.allowed, time.perf_counter() - started)
+        return decision
+
+    def _cooldown(self, scope, ident, period, now):
+        """Limit 1: kalit qiymati - cooldown tugash vaqti, TTL - davr"""
+        key = f'rl:{scope}:{ident}:cooldown'
+        if self.cache.add(key, now + period, period):
+            return Decision(True, 0, 0)
+        until = self.cache.get(key)
+        if until is None:  # kalit shu orada muddati tugagan
+            self.cache.set(key, now + period, period)
+            return Decision(True, 0, 0)
+        return Decision(False, 0, max(math.ceil(until - now), 1))
+
+    @staticmethod
+    def _wait(limit, period, offset, current, previous):
+        """Keyingi so'rov qabul qilinadigan vaqtgacha (soniya)"""
+        if current + 1 > limit or not previous:
+            return math.ceil(period - offset)
+        # Oldingi oyna ulushi limit ostiga tushadigan nuqta
+        weight = (limit - 1 - current) / previous
+        return max(math.ceil((1 - weight) * period - offset), 1)
+
+    def reset(self, scope, ident, rate=None):
+        rate = rate or self.rates.get(scope)
+        if not rate:
+            return
+        _, period = parse_rate(rate)
+        window = int(time.time() // period)
+        self.cache.delete_many([
+            f'rl:{scope}:{ident}:{window}', f'rl:{scope}:{ident}:{window - 1}', f'rl:{scope}:{ident}:cooldown'
+        ])
+
+    def _record(self, scope, allowed, elapsed):
+        with self._lock:
+            counters = self._counters.setdefault(scope, {'allowed': 0, 'blocked': 0, 'seconds': 0.0})
+            counters['allowed' if allowed else 'blocked'] += 1
+            counters['seconds'] += elapsed
+
+    def stats(self):
+        """Monitoring uchun shu process hisoblagichlari"""
+        with self._lock:
+            scopes = {
+                scope: {
+                    'allowed': counters['allowed'],
+                    'blocked': counters['blocked'],
+                    'rate': self.rates.get(scope),
+                    'avg_decision_ms': round(
+                        counters['seconds'] * 1000 / (counters['allowed'] + counters['blocked']), 3
+                    ),
+                }
+                for scope, counters in self._counters.items()
+            }
+        return {'pid': os.getpid(), 'scopes': scopes}
+
+
+# Global instance
+rate_limiter = RateLimiter()
+
+
+class RateLimitThrottle(BaseThrottle):
+    """
+    DRF throttle: view.throttle_scope + kalit turi bo'yicha rate_limiter ga murojaat.
+    Kalit topilmasa (masalan, so'rovda telefon yo'q) cheklanmaydi.
+    """
+    key_type = None
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        ident = self.get_ident(request)
+        if not scope or not ident:
+            return True
+        self.decision = rate_limiter.hit(f'{scope}_{self.key_type}', ident)
+        return self.decision.allowed
+
+    def get_ident(self, request):
+        raise NotImplementedError
+
+    def wait(self):
+        return self.decision.wait
+
+
+class IPRateThrottle(RateLimitThrottle):
+    key_type = 'ip'
+
+    def get_ident(self, request):
+        return get_client_ip(request)
+
+
+class PhoneRateThrottle(RateLimitThrottle):
+    key_type = 'phone'
+
+    def get_ident(self, request):
+        phone = request.data.get('phone') if hasattr(request.data, 'get') else None
+        if not phone and request.user and request.user.is_authenticated:
+            phone = request.user.phone
+        return str(phone).strip() if phone else None
+
+
+class UserOrIPRateThrottle(RateLimitThrottle):
+    """Autentifikatsiyalangan foydalanuvchi bo'yicha, aks holda IP bo'yicha"""
+    key_type = 'user'
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{get_client_ip(request)}'
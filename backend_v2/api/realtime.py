@@ -0,0 +1,259 @@
+"""
+Realtime events - yangi notificationlar va taklif/buyurtma holati o'zgarishlarini
+Server-Sent Events (SSE) orqali ulangan foydalanuvchilarga yetkazish
+
+Hodisalar foydalanuvchi kanaliga (`user:<id>`) pub/sub bus orqali e'lon qilinadi:
+    - NOTIFICATION_BUS_URL (redis://...) sozlangan bo'lsa - Redis pub/sub (ko'p process)
+    - aks holda InProcessBus - bitta process ichida (development va testlar uchun)
+E'lon qilish transaction.on_commit da bajariladi.
+
+SSE da faqat notification hodisalari `id:` oladi (notification id). Qayta ulanishda
+Last-Event-ID dan keyingi notificationlar bazadan yuboriladi; holat hodisalari faqat jonli.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SECONDS = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT_SECONDS', 15)
+# Qayta ulanishda bazadan yuboriladigan notificationlar chegarasi
+RESUME_LIMIT = getattr(settings, 'NOTIFICATION_STREAM_RESUME_LIMIT', 100)
+# Sekin mijoz uchun navbat hajmi - to'lsa yangi hodisalar tashlab yuboriladi
+QUEUE_SIZE = 256
+
+EVENT_NOTIFICATION = 'notification'
+EVENT_OFFER_STATUS = 'offer_status'
+EVENT_ORDER_STATUS = 'order_status'
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+class InProcessSubscription:
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    async def get(self, timeout):
+        """Keyingi xabar yoki timeout bo'lsa None"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessBus:
+    """
+    Bitta process ichidagi pub/sub. publish() istalgan threaddan chaqirilishi mumkin -
+    xabar obunachining event loop iga call_soon_threadsafe bilan uzatiladi.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._put, queue, message)
+            except RuntimeError:
+                # Loop yopilgan - obuna tez orada o'chiriladi
+                pass
+
+    @staticmethod
+    def _put(queue, message):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            logger.warning("SSE navbati to'ldi, hodisa tashlab yuborildi")
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=QUEUE_SIZE))
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+        try:
+            yield InProcessSubscription(subscriber[1])
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+
+class RedisSubscription:
+
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        data = message['data']
+        return data.decode() if isinstance(data, bytes) else data
+
+
+class RedisBus:
+    """Redis pub/sub - barcha ASGI/WSGI processlar o'rtasida"""
+
+    def __init__(self, url):
+        import redis
+
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+
+    def publish(self, channel, message):
+        self._client.publish(channel, message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            yield RedisSubscription(pubsub)
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_bus():
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                url = getattr(settings, 'NOTIFICATION_BUS_URL', '')
+                _bus = RedisBus(url) if url else InProcessBus()
+    return _bus
+
+
+def encode(event, data, event_id=None):
+    return json.dumps({'event': event, 'id': event_id, 'data': data}, default=str)
+
+
+def _publish_on_commit(messages):
+    """messages - [(user_id, xabar)], tranzaksiya commit bo'lgach e'lon qilinadi"""
+    if not messages:
+        return
+
+    def send():
+        bus = get_bus()
+        for user_id, message in messages:
+            try:
+                bus.publish(user_channel(user_id), message)
+            except Exception as e:
+                logger.error(f"Realtime hodisani e'lon qilishda xatolik: {str(e)}")
+
+    transaction.on_commit(send)
+
+
+def publish(user_ids, event, data, event_id=None):
+    """Hodisani foydalanuvchilar kanallariga e'lon qilish"""
+    message = encode(event, data, event_id)
+    _publish_on_commit([(user_id, message) for user_id in set(user_ids) if user_id])
+
+
+def notification_payload(notification):
+    return {
+        'id': notification.id,
+        'type': notification.type,
+        'title': notification.title,
+        'message': notification.message,
+        'related_rfq_id': notification.related_rfq_id,
+        'related_offer_id': notification.related_offer_id,
+        'related_order_id': notification.related_order_id,
+        'created_at': notification.created_at.isoformat() if notification.created_at else None,
+    }
+
+
+def publish_notifications(notifications):
+    """Yangi notificationlarni qabul qiluvchilarga e'lon qilish"""
+    _publish_on_commit([
+        (notification.recipient_user_id,
+         encode(EVENT_NOTIFICATION, notification_payload(notification), notification.id))
+        for notification in notifications
+        if notification.recipient_user_id
+    ])
+
+
+def publish_offer_status(offer_id, rfq_id, offer_status, user_ids):
+    publish(user_ids, EVENT_OFFER_STATUS, {
+        'offer_id': offer_id, 'rfq_id': rfq_id, 'status': offer_status
+    })
+
+
+def publish_order_status(order_id, order_status, user_ids):
+    publish(user_ids, EVENT_ORDER_STATUS, {'order_id': order_id, 'status': order_status})
+
+
+# SSE
+
+def format_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, default=str)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def missed_notifications(user_id, last_id):
+    """Qayta ulanishda: last_id dan keyingi notificationlar (o'sish tartibida)"""
+    from .models import Notification
+
+    return list(
+        Notification.objects.filter(recipient_user_id=user_id, id__gt=last_id).order_by('id')[:RESUME_LIMIT]
+    )
+
+
+async def event_stream(user_id, last_id=None, bus=None, heartbeat=None):
+    """
+    Foydalanuvchi uchun SSE oqimi. Avval kanalga obuna bo'linadi, keyin o'tkazib
+    yuborilgan notificationlar yuboriladi - oraliqda kelgan hodisalar yo'qolmaydi.
+    """
+    from asgiref.sync import sync_to_async
+
+    bus = bus or get_bus()
+    heartbeat = heartbeat or HEARTBEAT_SECONDS
+
+    async with bus.subscribe(user_channel(user_id)) as subscription:
+        yield f'retry: {int(heartbeat * 1000)}\n\n'
+
+        if last_id is not None:
+            for notification in await sync_to_async(missed_notifications)(user_id, last_id):
+                last_id = notification.id
+                yield format_event(EVENT_NOTIFICATION, notification_payload(notification), notification.id)
+
+        while True:
+            message = await subscription.get(heartbeat)
+            if message is None:
+                yield ': heartbeat\n\n'
+                continue
+            message = json.loads(message)
+            event_id = message.get('id')
+            if event_id is not None:
+                # Bazadan yuborilgan notification qayta yuborilmaydi
+                if last_id is not None and event_id <= last_id:
+                    continue
+                last_id = event_id
+            yield format_event(message['event'], message['data'], event_id)
@@ -0,0 +1,104 @@
+"""
+RFQ expiry sweeper - muddati o'tgan RFQ larni EXPIRED holatiga o'tkazish
+"""
+
+import logging
+import time
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, RFQ
+from .notification_counter import unread_counter
+from .notification_outbox import notification_outbox
+from .realtime import publish_notifications
+
+logger = logging.getLogger(__name__)
+
+
+class RFQExpirySweeper:
+    """
+    Muddati o'tgan faol RFQ larni bo'laklab (chunk) yangilaydi.
+
+    Har bir bo'lak: id lar tanlanadi, bitta UPDATE ... WHERE id IN (...) AND status='active'
+    bajariladi va o'sha tranzaksiyada xaridorlar uchun bildirishnomalar bulk_create qilinadi
+    hamda push uchun outbox ga qo'yiladi (yuborishni `deliver_notifications` worker bajaradi).
+    """
+    default_chunk_size = 1000
+
+    def sweep(self, now=None, chunk_size=None, notify=True):
+        """
+        Bitta sweep. Qaytaradi: {'expired', 'notifications', 'chunks', 'duration_ms'}
+        """
+        now = now or timezone.now()
+        chunk_size = chunk_size or self.default_chunk_size
+        started = time.perf_counter()
+        stats = {'expired': 0, 'notifications': 0, 'chunks': 0}
+
+        candidates = RFQ.objects.filter(
+            status=RFQ.RFQStatus.ACTIVE, expires_at__lt=now
+        ).order_by('id')
+        last_id = 0
+
+        while True:
+            rows = list(
+                candidates.filter(id__gt=last_id).values_list('id', 'buyer_id')[:chunk_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            expired, notified = self._expire_chunk(rows, now, notify)
+            stats['expired'] += expired
+            stats['notifications'] += notified
+            stats['chunks'] += 1
+            if len(rows) < chunk_size:
+                break
+
+        stats['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(
+            "RFQ expiry sweep: %(expired)d ta RFQ, %(notifications)d ta bildirishnoma, "
+            "%(chunks)d ta bo'lak, %(duration_ms).1f ms", stats
+        )
+        return stats
+
+    @transaction.atomic
+    def _expire_chunk(self, rows, now, notify):
+        ids = [rfq_id for rfq_id, _ in rows]
+        # Parallel o'zgargan (bekor qilingan/yakunlangan) RFQ lar qayta tekshiriladi
+        expired_ids = set(
+            RFQ.objects.select_for_update().filter(
+                id__in=ids, status=RFQ.RFQStatus.ACTIVE, expires_at__lt=now
+            ).values_list('id', flat=True)
+        )
+        if not expired_ids:
+            return 0, 0
+
+        expired = RFQ.objects.filter(id__in=expired_ids).update(
+            status=RFQ.RFQStatus.EXPIRED, updated_at=now
+        )
+        if not notify:
+            return expired, 0
+
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                recipient_user_id=buyer_id,
+                type=Notification.NotificationType.RFQ_EXPIRED,
+                title="So'rov muddati tugadi",
+                message=f"#{rfq_id} so'rovingiz muddati tugadi va yopildi",
+                related_rfq_id=rfq_id,
+                delivery_method=Notification.DeliveryMethod.PUSH_ONLY,
+            )
+            for rfq_id, buyer_id in rows
+            if rfq_id in expired_ids
+        ], batch_size=notification_outbox.bulk_batch_size)
+        notification_outbox.enqueue(notifications)
+        unread_counter.increment_many(Counter(
+            notification.recipient_user_id for notification in notifications
+        ))
+        publish_notifications(notifications)
+        return expired, len(notifications)
+
+
+# Global instance
+rfq_expiry_sweeper = RFQExpirySweeper()
@@ -0,0 +1,186 @@
+"""
+RFQ matching engine - yangi RFQ ga mos sotuvchilarni topish
+
+Indeks (category_id, subcategory_id, unit_type) -> sotuvchi id lar to'plami ko'rinishida
+xotirada saqlanadi. Manbalar:
+    - SupplierCategory: (category, None, None) - kategoriyadagi barcha RFQ lar
+    - Product (faol): (category, None, unit.unit_type) - shu birlik turidagi RFQ lar
+    - DealerFactory: diler zavodi mahsulotlari bo'yicha (category, None, unit_type)
+None - "istalgan qiymat" degani. Manbalar o'zgarganda cache dagi versiya oshiriladi
+va har bir process indeksni keyingi so'rovda qayta quradi. Versiya HTTP so'rov
+davomida bir marta o'qiladi (request_started/request_finished).
+
+Yangi RFQ moslari commit dan keyin `tasks.match_rfq` da yoziladi (celery bo'lsa
+worker da) - indeksni qayta qurish RFQ yaratish so'roviga tushmaydi.
+"""
+
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+
+from .models import DealerFactory, Product, RFQ, RFQMatch, SupplierCategory, User
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION_KEY = 'rfq_matching_index_version'
+
+
+class RFQMatchingEngine:
+    """
+    Sotuvchi - RFQ moslashtirish uchun inverted index.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._version = None
+        self._request = threading.local()
+
+    # Indeks
+
+    def get_version(self):
+        """Indeks versiyasi - so'rov ichida birinchi murojaatda keshdan, keyin eslab qolingan"""
+        request = self._request
+        if getattr(request, 'version', None) is not None:
+            return request.version
+        version = cache.get(INDEX_VERSION_KEY)
+        if version is None:
+            cache.add(INDEX_VERSION_KEY, 1, None)
+            version = cache.get(INDEX_VERSION_KEY, 1)
+        if getattr(request, 'active', False):
+            request.version = version
+        return version
+
+    def begin_request(self, **kwargs):
+        """request_started signali"""
+        self._request.active = True
+        self._request.version = None
+
+    def end_request(self, **kwargs):
+        """request_finished signali"""
+        self._request.active = False
+        self._request.version = None
+
+    def invalidate(self):
+        """Manba jadvallar o'zgarganda barcha processlardagi indeksni eskirtirish"""
+        self._request.version = None
+        try:
+            cache.incr(INDEX_VERSION_KEY)
+        except ValueError:
+            cache.set(INDEX_VERSION_KEY, 2, None)
+
+    def get_index(self):
+        version = self.get_version()
+        if self._index is None or self._version != version:
+            with self._lock:
+                if self._index is None or self._version != version:
+                    self._index = self.build_index()
+                    self._version = version
+        return self._index
+
+    def build_index(self):
+        """Indeksni bazadan qurish (3 ta so'rov)"""
+        started = time.perf_counter()
+        index = {}
+        suppliers = User.objects.filter(role=User.UserRole.SUPPLIER, is_active=True)
+
+        def add(key, supplier_id):
+            index.setdefault(key, set()).add(supplier_id)
+
+        for supplier_id, category_id in SupplierCategory.objects.filter(
+            user__in=suppliers
+        ).values_list('user_id', 'category_id'):
+            add((category_id, None, None), supplier_id)
+
+        factory_keys = {}
+        for supplier_id, factory_id, category_id, unit_type in Product.objects.filter(
+            is_active=True, supplier__in=suppliers
+        ).values_list('supplier_id', 'factory_id', 'category_id', 'unit__unit_type'):
+            key = (category_id, None, unit_type)
+            add(key, supplier_id)
+            if factory_id is not None:
+                factory_keys.setdefault(factory_id, set()).add(key)
+
+        for dealer_id, factory_id in DealerFactory.objects.filter(
+            dealer__in=suppliers, factory_id__in=list(factory_keys)
+        ).values_list('dealer_id', 'factory_id'):
+            for key in factory_keys[factory_id]:
+                add(key, dealer_id)
+
+        frozen = {key: frozenset(ids) for key, ids in index.items()}
+        logger.debug(
+            "RFQ matching indeks qurildi: %d kalit, %.1f ms",
+            len(frozen), (time.perf_counter() - started) * 1000
+        )
+        return frozen
+
+    # Moslashtirish
+
+    def rfq_key(self, rfq):
+        """RFQ uchun (category, subcategory, unit_type) kaliti"""
+        unit_type = rfq.unit.unit_type if rfq.unit_id else rfq.category.unit_type
+        return rfq.category_id, rfq.subcategory_id, unit_type
+
+    def match_key(self, category_id, subcategory_id=None, unit_type=None):
+        """Kalitga mos sotuvchi id lari (wildcard kombinatsiyalar bilan)"""
+        index = self.get_index()
+        empty = frozenset()
+        return (
+            index.get((category_id, subcategory_id, unit_type), empty)
+            | index.get((category_id, subcategory_id, None), empty)
+            | index.get((category_id, None, unit_type), empty)
+            | index.get((category_id, None, None), empty)
+        )
+
+    def match_rfq(self, rfq):
+        """RFQ ga mos sotuvchilar to'plami"""
+        return self.match_key(*self.rfq_key(rfq))
+
+    def record_matches(self, rfq):
+        """RFQ uchun mos sotuvchilarni rfq_matches jadvaliga yozish"""
+        supplier_ids = self.match_rfq(rfq)
+        if supplier_ids:
+            # Indeks boshqa processda eskirgan bo'lishi mumkin - faqat mavjud faol sotuvchilar
+            supplier_ids = set(User.objects.filter(
+                id__in=supplier_ids, is_active=True
+            ).values_list('id', flat=True))
+        RFQMatch.objects.bulk_create(
+            [RFQMatch(rfq=rfq, supplier_id=supplier_id) for supplier_id in supplier_ids],
+            ignore_conflicts=True
+        )
+        return supplier_ids
+
+    def backfill_supplier(self, supplier_id, category_ids):
+        """Yangi kategoriya qo'shgan sotuvchi uchun mavjud faol RFQ larni lentaga qo'shish"""
+        rfq_ids = RFQ.objects.filter(
+            status=RFQ.RFQStatus.ACTIVE, category_id__in=category_ids
+        ).values_list('id', flat=True)
+        RFQMatch.objects.bulk_create(
+            [RFQMatch(rfq_id=rfq_id, supplier_id=supplier_id) for rfq_id in rfq_ids],
+            ignore_conflicts=True
+        )
+
+    def rematch_active(self, batch_size=500):
+        """Barcha faol RFQ lar uchun moslarni qayta yozish"""
+        created = 0
+        rfqs = RFQ.objects.filter(status=RFQ.RFQStatus.ACTIVE).select_related(
+            'category', 'unit'
+        ).order_by('id')
+        for rfq in rfqs.iterator(chunk_size=batch_size):
+            created += len(self.record_matches(rfq))
+        return created
+
+    def matched_feed(self, supplier):
+        """
+        Sotuvchi lentasi: faol RFQ larga mos RFQMatch yozuvlari.
+        (supplier, created_at) indeksi bo'yicha RFQMatch.created_at tartibida sahifalanadi.
+        """
+        return RFQMatch.objects.filter(
+            supplier=supplier, rfq__status=RFQ.RFQStatus.ACTIVE
+        ).only('id', 'rfq_id', 'created_at')
+
+
+# Global instance
+rfq_matching_engine = RFQMatchingEngine()
@@ -0,0 +1,237 @@
+"""
+Search - RFQ lar uchun full-text qidiruv
+
+PostgreSQL: `rfqs.search_vector` generated tsvector ustuni + GIN indeks, ts_rank bo'yicha saralash.
+SQLite (dev/test): `rfqs_fts` FTS5 virtual jadvali (trigram tokenizer) + triggerlar, bm25 bo'yicha saralash.
+Ikkala holatda ham natijaga `search_rank` (katta qiymat - yaxshiroq) annotatsiyasi qo'shiladi.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+RFQ_TABLE = 'rfqs'
+RFQ_FTS_TABLE = 'rfqs_fts'
+RFQ_SEARCH_FIELDS = ('brand', 'grade', 'delivery_location')
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TOKENS = 10
+
+
+def tokenize(term):
+    """Qidiruv matnini xavfsiz tokenlarga ajratish"""
+    return TOKEN_RE.findall((term or '').lower())[:MAX_TOKENS]
+
+
+class PostgresRFQSearchBackend:
+    """
+    PostgreSQL tsvector asosidagi qidiruv.
+    brand va grade - 'A', delivery_location - 'B' vazn bilan indekslanadi.
+    """
+    vendor = 'postgresql'
+    config = 'simple'
+
+    def install(self, connection):
+        """search_vector ustuni va GIN indeksni yaratish"""
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                ALTER TABLE {RFQ_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector
+                GENERATED ALWAYS AS (
+                    setweight(to_tsvector('{self.config}', coalesce(brand, '')), 'A') ||
+                    setweight(to_tsvector('{self.config}', coalesce(grade, '')), 'A') ||
+                    setweight(to_tsvector('{self.config}', coalesce(delivery_location, '')), 'B')
+                ) STORED
+            """)
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS rfqs_search_vector_gin "
+                f"ON {RFQ_TABLE} USING GIN (search_vector)"
+            )
+
+    def uninstall(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP INDEX IF EXISTS rfqs_search_vector_gin")
+            cursor.execute(f"ALTER TABLE {RFQ_TABLE} DROP COLUMN IF EXISTS search_vector")
+
+    def search(self, queryset, tokens):
+        # Har bir token prefiks sifatida qidiriladi: "tash" -> 'tash':*
+        query = ' & '.join(f"{token}:*" for token in tokens)
+        table = queryset.query.get_meta().db_table
+        tsquery = f"to_tsquery('{self.config}', %s)"
+        return queryset.filter(
+            RawSQL(f'"{table}".search_vector @@ {tsquery}', [query], output_field=BooleanField())
+        ).annotate(
+            # ts_rank real (float4) qaytaradi; cursor dagi float bilan aniq solishtirish uchun float8
+            search_rank=RawSQL(f'ts_rank("{table}".search_vector, {tsquery})::float8', [query],
+                               output_field=FloatField())
+        )
+
+
+class SQLiteRFQSearchBackend:
+    """
+    SQLite FTS5 asosidagi qidiruv (external content jadval, triggerlar bilan sinxronlanadi).
+    trigram tokenizer icontains kabi qism-so'z bo'yicha topadi (SQLite 3.34+),
+    eski versiyalarda unicode61 + prefiks qidiruv ishlatiladi.
+    """
+    vendor = 'sqlite'
+    min_trigram_length = 3
+
+    def use_trigram(self, connection):
+        return connection.Database.sqlite_version_info >= (3, 34, 0)
+
+    def install(self, connection):
+        """FTS5 jadvali, triggerlar va boshlang'ich indeksni yaratish"""
+        columns = ', '.join(RFQ_SEARCH_FIELDS)
+        new_values = ', '.join(f'new.{field}' for field in RFQ_SEARCH_FIELDS)
+        old_values = ', '.join(f'old.{field}' for field in RFQ_SEARCH_FIELDS)
+        tokenizer = 'trigram' if self.use_trigram(connection) else 'unicode61'
+
+        with connection.cursor() as cursor:
+            # Jadval yoki triggerlardan biri yo'q bo'lsa indeks eskirgan bo'lishi mumkin
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+                [RFQ_FTS_TABLE, 'rfqs_fts_ai', 'rfqs_fts_ad', 'rfqs_fts_au']
+            )
+            needs_rebuild = cursor.fetchone()[0] < 4
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {RFQ_FTS_TABLE} USING fts5(
+                    {columns}, content='{RFQ_TABLE}', content_rowid='id', tokenize='{tokenizer}'
+                )
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS rfqs_fts_ai AFTER INSERT ON {RFQ_TABLE} BEGIN
+                    INSERT INTO {RFQ_FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS rfqs_fts_ad AFTER DELETE ON {RFQ_TABLE} BEGIN
+                    INSERT INTO {RFQ_FTS_TABLE}({RFQ_FTS_TABLE}, rowid, {columns})
+                    VALUES ('delete', old.id, {old_values});
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS rfqs_fts_au AFTER UPDATE OF {columns} ON {RFQ_TABLE} BEGIN
+                    INSERT INTO {RFQ_FTS_TABLE}({RFQ_FTS_TABLE}, rowid, {columns})
+                    VALUES ('delete', old.id, {old_values});
+                    INSERT INTO {RFQ_FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});
+                END
+            """)
+            if needs_rebuild:
+                cursor.execute(f"INSERT INTO {RFQ_FTS_TABLE}({RFQ_FTS_TABLE}) VALUES ('rebuild')")
+
+    def uninstall(self, connection):
+        with connection.cursor() as cursor:
+            for trigger in ('rfqs_fts_ai', 'rfqs_fts_ad', 'rfqs_fts_au'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            cursor.execute(f"DROP TABLE IF EXISTS {RFQ_FTS_TABLE}")
+
+    def search(self, queryset, tokens):
+        connection = connections[queryset.db]
+        if self.use_trigram(connection):
+            # trigram 3 belgidan qisqa qatorlarni topa olmaydi
+            fts_tokens = [token for token in tokens if len(token) >= self.min_trigram_length]
+            match = ' '.join(f'"{token}"' for token in fts_tokens)
+        else:
+            fts_tokens = tokens
+            match = ' '.join(f'"{token}"*' for token in fts_tokens)
+
+        short_tokens = [token for token in tokens if token not in fts_tokens]
+        for token in short_tokens:
+            condition = Q()
+            for field in RFQ_SEARCH_FIELDS:
+                condition |= Q(**{f'{field}__icontains': token})
+            queryset = queryset.filter(condition)
+
+        table = queryset.query.get_meta().db_table
+        if not match:
+            return queryset.annotate(search_rank=RawSQL('0.0', [], output_field=FloatField()))
+
+        # bm25 kichik qiymat - yaxshiroq, shuning uchun ishorasi almashtiriladi
+        # Vaznlar: brand, grade - 10, delivery_location - 5
+        return queryset.filter(
+            RawSQL(
+                f'"{table}".id IN (SELECT rowid FROM {RFQ_FTS_TABLE} WHERE {RFQ_FTS_TABLE} MATCH %s)',
+                [match], output_field=BooleanField()
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f'(SELECT -bm25({RFQ_FTS_TABLE}, 10.0, 10.0, 5.0) FROM {RFQ_FTS_TABLE} '
+                f'WHERE {RFQ_FTS_TABLE} MATCH %s AND {RFQ_FTS_TABLE}.rowid = "{table}".id)',
+                [match], output_field=FloatField()
+            )
+        )
+
+
+class FallbackRFQSearchBackend:
+    """Boshqa bazalar uchun icontains asosidagi qidiruv (rank yo'q)"""
+    vendor = None
+
+    def install(self, connection):
+        pass
+
+    def uninstall(self, connection):
+        pass
+
+    def search(self, queryset, tokens):
+        for token in tokens:
+            condition = Q()
+            for field in RFQ_SEARCH_FIELDS:
+                condition |= Q(**{f'{field}__icontains': token})
+            queryset = queryset.filter(condition)
+        return queryset.annotate(search_rank=RawSQL('0.0', [], output_field=FloatField()))
+
+
+SEARCH_BACKENDS = {
+    'postgresql': PostgresRFQSearchBackend(),
+    'sqlite': SQLiteRFQSearchBackend(),
+}
+
+
+def get_search_backend(connection):
+    """Baza turiga mos qidiruv backendini olish"""
+    return SEARCH_BACKENDS.get(connection.vendor, FallbackRFQSearchBackend())
+
+
+def install_rfq_search_index(connection):
+    """Qidiruv indeksini o'rnatish (idempotent)"""
+    get_search_backend(connection).install(connection)
+
+
+def search_rfqs(queryset, term):
+    """
+    RFQ querysetini full-text bo'yicha filterlash.
+    Natijaga `search_rank` annotatsiyasi qo'shiladi (saralash chaqiruvchiga qoldiriladi).
+    """
+    tokens = tokenize(term)
+    if not tokens:
+        return queryset.none()
+    return get_search_backend(connections[queryset.db]).search(queryset, tokens)
+
+
+def install_search_index_after_migrate(sender, using, **kwargs):
+    """
+    post_migrate signal: SQLite da jadval qayta qurilganda (ALTER) triggerlar
+    yo'qoladi, shuning uchun har migratsiyadan keyin qayta o'rnatiladi.
+    """
+    connection = connections[using]
+    if RFQ_TABLE not in connection.introspection.table_names():
+        return
+    install_rfq_search_index(connection)
+
+
+class RFQSearchFilter(filters.SearchFilter):
+    """
+    DRF uchun full-text qidiruv filtri (?search=...).
+    `ordering` parametri berilmagan bo'lsa natijalar relevantlik bo'yicha saralanadi.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip()
+        if not term:
+            return queryset
+        queryset = search_rfqs(queryset, term)
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('-search_rank', '-created_at')
+        return queryset
@@ -59,7 +59,9 @@ from .offer_serializers import (
     OfferUpdateSerializer,
     OfferSearchSerializer,
     CounterOfferSerializer,
-    CounterOfferCreateSerializer
+    CounterOfferCreateSerializer,
+    OfferComparisonQuerySerializer,
+    OfferComparisonSerializer
 )
 
 from .order_serializers import (
@@ -83,6 +85,8 @@ from .payment_serializers import (
 from .notification_serializers import (
     NotificationSerializer,
     NotificationListSerializer,
+    NotificationArchiveSerializer,
+    DeviceTokenSerializer,
     NotificationCreateSerializer,
     NotificationSearchSerializer,
     NotificationSettingsSerializer,
@@ -155,6 +159,8 @@ __all__ = [
     'OfferListSerializer',
     'OfferUpdateSerializer',
     'OfferSearchSerializer',
+    'OfferComparisonQuerySerializer',
+    'OfferComparisonSerializer',
     'CounterOfferSerializer',
     'CounterOfferCreateSerializer',
     
@@ -177,6 +183,8 @@ __all__ = [
     # Notification serializers
     'NotificationSerializer',
     'NotificationListSerializer',
+    'NotificationArchiveSerializer',
+    'DeviceTokenSerializer',
     'NotificationCreateSerializer',
     'NotificationSearchSerializer',
     'NotificationSettingsSerializer',
@@ -3,7 +3,7 @@ Notification serializers - Xabarlar uchun serializers
 """
 
 from rest_framework import serializers
-from ..models import Notification, User
+from ..models import DeviceToken, Notification, NotificationArchive, User
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -71,6 +71,37 @@ class NotificationListSerializer(serializers.ModelSerializer):
         return obj.is_read()
 
 
+class NotificationArchiveSerializer(serializers.ModelSerializer):
+    """
+    Arxivlangan xabarlar uchun serializer
+    """
+    is_read = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = NotificationArchive
+        fields = [
+            'id', 'type', 'title', 'message',
+            'related_rfq_id', 'related_offer_id', 'related_order_id',
+            'is_read', 'created_at', 'archived_at'
+        ]
+    
+    def get_is_read(self, obj):
+        """Xabar o'qilganmi tekshirish"""
+        return obj.is_read()
+
+
+class DeviceTokenSerializer(serializers.ModelSerializer):
+    """
+    Qurilma (FCM) tokeni uchun serializer
+    """
+    class Meta:
+        model = DeviceToken
+        fields = ['id', 'token', 'platform', 'last_seen', 'created_at']
+        read_only_fields = ['id', 'last_seen', 'created_at']
+        # Mavjud token qayta ro'yxatdan o'tkazilganda yangilanadi
+        extra_kwargs = {'token': {'validators': []}}
+
+
 class NotificationCreateSerializer(serializers.ModelSerializer):
     """
     Xabar yaratish uchun serializer
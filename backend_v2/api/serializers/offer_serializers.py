@@ -2,6 +2,8 @@
 Offer serializers - Takliflar uchun serializers
 """
 
+import math
+
 from rest_framework import serializers
 from ..models import Offer, CounterOffer, User, RFQ, Product
 
@@ -345,3 +347,48 @@ class OfferSearchSerializer(serializers.Serializer):
                 })
         
         return attrs
+
+
+def validate_finite(value):
+    """nan va inf vazn sifatida qabul qilinmaydi"""
+    if not math.isfinite(value):
+        raise serializers.ValidationError('Chekli son kiriting')
+    return value
+
+
+class OfferComparisonQuerySerializer(serializers.Serializer):
+    """
+    Takliflarni solishtirish parametrlari (vaznlar avtomatik normallashtiriladi)
+    """
+    w_price = serializers.FloatField(min_value=0, required=False, validators=[validate_finite])
+    w_delivery = serializers.FloatField(min_value=0, required=False, validators=[validate_finite])
+    w_reliability = serializers.FloatField(min_value=0, required=False, validators=[validate_finite])
+    include_rejected = serializers.BooleanField(required=False, default=False)
+    
+    def validate(self, attrs):
+        """Validatsiya"""
+        weights = [attrs.get(key) for key in ('w_price', 'w_delivery', 'w_reliability')]
+        if all(weight is not None for weight in weights) and sum(weights) == 0:
+            raise serializers.ValidationError('Vaznlardan kamida bittasi 0 dan katta bo\'lishi kerak')
+        return attrs
+    
+    def get_weights(self):
+        """Berilgan vaznlar ('price', 'delivery', 'reliability' kalitlari bilan)"""
+        return {
+            key[2:]: value
+            for key, value in self.validated_data.items()
+            if key.startswith('w_') and value is not None
+        }
+
+
+class OfferComparisonSerializer(serializers.Serializer):
+    """
+    Solishtirilgan taklif: reyting, ballar va taklif ma'lumotlari
+    """
+    rank = serializers.IntegerField()
+    score = serializers.FloatField()
+    price_score = serializers.FloatField()
+    delivery_score = serializers.FloatField()
+    reliability_score = serializers.FloatField()
+    lead_time_days = serializers.IntegerField()
+    offer = OfferListSerializer()
@@ -4,6 +4,7 @@ Product serializers - Mahsulotlar uchun serializers
 
 from rest_framework import serializers
 from ..models import Product, Category, SubCategory, Unit, Factory, User
+from ..product_view_counter import recent_daily_views, view_trend
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -229,7 +230,8 @@ class ProductSearchSerializer(serializers.Serializer):
     min_price = serializers.DecimalField(max_digits=20, decimal_places=2, required=False)
     max_price = serializers.DecimalField(max_digits=20, decimal_places=2, required=False)
     supplier_type = serializers.ChoiceField(choices=User.SupplierType.choices, required=False)
-    is_featured = serializers.BooleanField(required=False)
+    # Query string da berilmasa False emas, None (filtr yo'q)
+    is_featured = serializers.BooleanField(required=False, allow_null=True, default=None)
     search = serializers.CharField(max_length=200, required=False)
     
     def validate(self, attrs):
@@ -249,12 +251,13 @@ class ProductAnalyticsSerializer(serializers.ModelSerializer):
     """
     supplier_info = serializers.SerializerMethodField()
     category_info = serializers.SerializerMethodField()
+    views_trend = serializers.SerializerMethodField()
     
     class Meta:
         model = Product
         fields = [
             'id', 'supplier_info', 'category_info', 'brand', 'grade',
-            'view_count', 'rating', 'review_count', 'is_active', 'is_featured',
+            'view_count', 'views_trend', 'rating', 'review_count', 'is_active', 'is_featured',
             'created_at', 'updated_at'
         ]
     
@@ -273,3 +276,7 @@ class ProductAnalyticsSerializer(serializers.ModelSerializer):
             'name': obj.category.name,
             'unit_type': obj.category.unit_type,
         }
+    
+    def get_views_trend(self, obj):
+        """Kunlik ko'rishlar trendi (recent_views_prefetch bo'lmasa alohida so'rov)"""
+        return view_trend(recent_daily_views(obj))
@@ -8,6 +8,17 @@ from datetime import timedelta
 from ..models import RFQ, User, Category, SubCategory, Unit
 
 
+class RFQOfferStatsSerializer(serializers.Serializer):
+    """
+    RFQ takliflari statistikasi (RFQ.get_offer_stats natijasi)
+    """
+    count = serializers.IntegerField()
+    min_price = serializers.DecimalField(max_digits=20, decimal_places=2, allow_null=True)
+    max_price = serializers.DecimalField(max_digits=20, decimal_places=2, allow_null=True)
+    earliest_delivery_date = serializers.DateField(allow_null=True)
+    new_last_24h = serializers.IntegerField()
+
+
 class RFQSerializer(serializers.ModelSerializer):
     """
     To'liq RFQ ma'lumotlari uchun serializer
@@ -17,6 +28,7 @@ class RFQSerializer(serializers.ModelSerializer):
     subcategory_info = serializers.SerializerMethodField()
     unit_info = serializers.SerializerMethodField()
     offers_count = serializers.SerializerMethodField()
+    offer_stats = RFQOfferStatsSerializer(source='get_offer_stats', read_only=True)
     is_expired = serializers.SerializerMethodField()
     can_receive_offers = serializers.SerializerMethodField()
     
@@ -26,12 +38,12 @@ class RFQSerializer(serializers.ModelSerializer):
             'id', 'buyer', 'buyer_info', 'category', 'category_info',
             'subcategory', 'subcategory_info', 'brand', 'grade', 'sizes',
             'volume', 'unit', 'unit_info', 'delivery_location', 'delivery_date',
-            'payment_method', 'status', 'expires_at', 'offers_count',
+            'payment_method', 'status', 'expires_at', 'offers_count', 'offer_stats',
             'is_expired', 'can_receive_offers', 'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'buyer', 'offers_count', 'is_expired', 'can_receive_offers',
-            'created_at', 'updated_at'
+            'id', 'buyer', 'offers_count', 'offer_stats', 'is_expired',
+            'can_receive_offers', 'created_at', 'updated_at'
         ]
     
     def get_buyer_info(self, obj):
@@ -73,8 +85,8 @@ class RFQSerializer(serializers.ModelSerializer):
         return None
     
     def get_offers_count(self, obj):
-        """Takliflar sonini olish"""
-        return obj.offers.count()
+        """Takliflar sonini olish (with_offer_stats annotatsiyasidan)"""
+        return obj.get_offer_stats()['count']
     
     def get_is_expired(self, obj):
         """Muddati tugaganmi tekshirish"""
@@ -154,6 +166,7 @@ class RFQListSerializer(serializers.ModelSerializer):
     category_info = serializers.SerializerMethodField()
     unit_info = serializers.SerializerMethodField()
     offers_count = serializers.SerializerMethodField()
+    offer_stats = RFQOfferStatsSerializer(source='get_offer_stats', read_only=True)
     is_expired = serializers.SerializerMethodField()
     
     class Meta:
@@ -161,8 +174,8 @@ class RFQListSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'buyer_info', 'category_info', 'brand', 'grade',
             'volume', 'unit_info', 'delivery_location', 'delivery_date',
-            'payment_method', 'status', 'offers_count', 'is_expired',
-            'expires_at', 'created_at'
+            'payment_method', 'status', 'offers_count', 'offer_stats',
+            'is_expired', 'expires_at', 'created_at'
         ]
     
     def get_buyer_info(self, obj):
@@ -191,8 +204,8 @@ class RFQListSerializer(serializers.ModelSerializer):
         return None
     
     def get_offers_count(self, obj):
-        """Takliflar sonini olish"""
-        return obj.offers.count()
+        """Takliflar sonini olish (with_offer_stats annotatsiyasidan)"""
+        return obj.get_offer_stats()['count']
     
     def get_is_expired(self, obj):
         """Muddati tugaganmi tekshirish"""
@@ -262,7 +275,9 @@ class RFQDetailSerializer(serializers.ModelSerializer):
     def get_offers(self, obj):
         """Takliflar ro'yxatini olish"""
         from .offer_serializers import OfferListSerializer
-        offers = obj.offers.all().order_by('-created_at')
+        offers = obj.offers.select_related(
+            'supplier', 'rfq__category', 'rfq__unit'
+        ).order_by('-created_at')
         return OfferListSerializer(offers, many=True).data
     
     def get_is_expired(self, obj):
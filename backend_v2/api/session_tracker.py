@@ -0,0 +1,184 @@
+"""
+Session tracker - UserSession faolligini write-behind bufer orqali yozish
+
+Login (va ro'yxatdan o'tish) UserSession yaratadi, uning id si tokenga `session_id`
+claimi sifatida yoziladi. Har bir autentifikatsiyalangan so'rov faqat process xotirasidagi
+buferni yangilaydi (sessiya -> oxirgi vaqt va IP); bufer SESSION_FLUSH_INTERVAL_SECONDS
+da bir marta (yoki SESSION_MAX_PENDING ga yetganda) `UPDATE ... SET last_activity = CASE
+id WHEN ... END` paketlari bilan yoziladi. Har bir API chaqiruvi yozuvga aylanmaydi.
+
+Uzoq vaqt faol bo'lmagan sessiyalar `expire()` bilan bo'laklab yopiladi
+(`python manage.py expire_sessions` yoki celery beat).
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_ipv46_address
+from django.db import DataError, IntegrityError
+from django.db.models import Case, DateTimeField, F, GenericIPAddressField, Value, When
+from django.utils import timezone
+
+from .models import UserSession
+from .rate_limit import get_client_ip
+
+logger = logging.getLogger(__name__)
+
+SESSION_CLAIM = 'session_id'
+SESSION_FLUSH_INTERVAL_SECONDS = getattr(settings, 'SESSION_FLUSH_INTERVAL_SECONDS', 30)
+SESSION_MAX_PENDING = getattr(settings, 'SESSION_MAX_PENDING', 5000)
+SESSION_IDLE_DAYS = getattr(settings, 'SESSION_IDLE_DAYS', 30)
+
+
+def valid_ip(ip):
+    """inet ustuniga yoziladigan IP (X-Forwarded-For dagi `unknown` kabi qiymatlar - None)"""
+    ip = (ip or '').strip()
+    try:
+        validate_ipv46_address(ip)
+    except ValidationError:
+        return None
+    return ip
+
+
+class SessionTracker:
+    flush_batch_size = 500
+    expire_chunk_size = 1000
+
+    def __init__(self, flush_interval=SESSION_FLUSH_INTERVAL_SECONDS, max_pending=SESSION_MAX_PENDING,
+                 write_behind=True):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.write_behind = write_behind
+        self._lock = threading.Lock()
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            # Bola process ota process buferini qayta yozmaydi
+            os.register_at_fork(after_in_child=self._reset)
+        atexit.register(self._flush_at_exit)
+
+    def _reset(self):
+        self._pending = {}
+        self._last_flush = time.monotonic()
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def start(self, user, request):
+        """Yangi sessiya (login)"""
+        return UserSession.objects.create(
+            user=user,
+            ip_address=valid_ip(get_client_ip(request)) or '0.0.0.0',
+            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        )
+
+    def end(self, session_id):
+        """Sessiyani yopish (logout)"""
+        if not session_id:
+            return 0
+        with self._lock:
+            self._pending.pop(session_id, None)
+        return UserSession.objects.filter(pk=session_id, is_active=True).update(
+            is_active=False, last_activity=timezone.now()
+        )
+
+    def touch(self, session_id, ip=None):
+        """So'rov faolligini qayd etish: write-behind rejimida faqat buferga"""
+        now = timezone.now()
+        ip = valid_ip(ip)
+        if not self.write_behind:
+            fields = {'last_activity': now}
+            if ip:
+                fields['ip_address'] = ip
+            UserSession.objects.filter(pk=session_id, is_active=True).update(**fields)
+            return
+
+        with self._lock:
+            self._pending[session_id] = (now, ip)
+            due = (
+                len(self._pending) >= self.max_pending
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+            if due:
+                self._last_flush = time.monotonic()
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Buferni CASE li UPDATE paketlari bilan yozish. Qaytaradi: yangilangan sessiyalar soni"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        items = sorted(pending.items())
+        updated = 0
+        for offset in range(0, len(items), self.flush_batch_size):
+            chunk = items[offset:offset + self.flush_batch_size]
+            try:
+                updated += self._write(chunk)
+            except (DataError, IntegrityError) as e:
+                # Qayta urinish yordam bermaydi - paket tashlab yuboriladi
+                logger.error(f"Sessiya faolligi paketi tashlab yuborildi: {str(e)}")
+            except Exception as e:
+                # Yozilmagan faollik keyingi flush ga qaytariladi (yangiroq qiymatlar ustun)
+                logger.error(f"Sessiya faolligini yozib bo'lmadi: {str(e)}")
+                with self._lock:
+                    for session_id, value in items[offset:]:
+                        self._pending.setdefault(session_id, value)
+                return updated
+
+        logger.debug(f"{updated} ta sessiya faolligi yozildi")
+        return updated
+
+    def _write(self, chunk):
+        ips = [When(pk=session_id, then=Value(ip)) for session_id, (_, ip) in chunk if ip]
+        return UserSession.objects.filter(
+            pk__in=[session_id for session_id, _ in chunk], is_active=True
+        ).update(
+            last_activity=Case(
+                *[When(pk=session_id, then=Value(seen)) for session_id, (seen, _) in chunk],
+                output_field=DateTimeField()
+            ),
+            ip_address=Case(
+                *ips, default=F('ip_address'), output_field=GenericIPAddressField()
+            ) if ips else F('ip_address')
+        )
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def expire(self, idle_days=SESSION_IDLE_DAYS, chunk_size=None):
+        """
+        idle_days dan beri faol bo'lmagan sessiyalarni bo'laklab yopish (id bo'yicha keyset).
+        Qaytaradi: yopilgan sessiyalar soni
+        """
+        self.flush()
+        chunk_size = chunk_size or self.expire_chunk_size
+        cutoff = timezone.now() - timedelta(days=idle_days)
+        expired = 0
+        last_id = 0
+        while True:
+            ids = list(UserSession.objects.filter(
+                is_active=True, last_activity__lt=cutoff, id__gt=last_id
+            ).order_by('id').values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                break
+            expired += UserSession.objects.filter(id__in=ids, is_active=True).update(is_active=False)
+            last_id = ids[-1]
+        if expired:
+            logger.info(f"{expired} ta faol bo'lmagan sessiya yopildi")
+        return expired
+
+
+# Global instance
+session_tracker = SessionTracker()
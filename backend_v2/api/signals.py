@@ -0,0 +1,227 @@
+"""
+Signals - model o'zgarishlariga bog'liq yordamchi yangilanishlar
+"""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models import DEFERRED
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Company, DealerFactory, Notification, Product, RFQ, SupplierCategory, User
+
+# Facet hisoblari va matching indeksi uchun kuzatiladigan Product maydonlari
+PRODUCT_TRACKED_FIELDS = ('category_id', 'supplier_id', 'is_active', 'unit_id', 'factory_id')
+
+
+def _product_state(product):
+    """Kuzatiladigan maydonlar qiymati (deferred maydonlar yuklanmaydi)"""
+    data = product.__dict__
+    return tuple(data.get(field) for field in PRODUCT_TRACKED_FIELDS)
+
+
+def _facet_state(state):
+    category_id, supplier_id, is_active = state[:3]
+    return category_id, supplier_id, is_active
+
+
+def _supplier_types(*supplier_ids):
+    ids = {supplier_id for supplier_id in supplier_ids if supplier_id is not None}
+    return dict(User.objects.filter(id__in=ids).values_list('id', 'supplier_type'))
+
+
+@receiver(post_init, sender=Product)
+def remember_product_state(sender, instance, **kwargs):
+    instance._tracked_state = _product_state(instance) if instance.pk else None
+
+
+@receiver(pre_save, sender=Product)
+def load_deferred_product_state(sender, instance, raw=False, **kwargs):
+    """only()/defer() bilan yuklangan mahsulot uchun eski holatni bazadan olish"""
+    state = getattr(instance, '_tracked_state', None)
+    # factory_id dan tashqari barcha kuzatiladigan maydonlar NOT NULL
+    if raw or state is None or None not in state[:4]:
+        return
+    instance._tracked_state = Product.objects.filter(pk=instance.pk).values_list(
+        *PRODUCT_TRACKED_FIELDS
+    ).first()
+
+
+@receiver(post_save, sender=Product)
+def update_product_state_on_save(sender, instance, created, raw=False, **kwargs):
+    """Facet hisoblari va matching indeksini farq bo'yicha yangilash"""
+    from .product_search import product_search_service
+    from .rfq_matching import rfq_matching_engine
+
+    if raw:
+        return
+
+    old_state = None if created else getattr(instance, '_tracked_state', None)
+    new_state = _product_state(instance)
+    instance._tracked_state = new_state
+    if old_state == new_state:
+        return
+    rfq_matching_engine.invalidate()
+
+    old_facets = _facet_state(old_state) if old_state else (None, None, False)
+    new_facets = _facet_state(new_state)
+    if old_facets == new_facets:
+        return
+
+    old_category, old_supplier, old_active = old_facets
+    new_category, new_supplier, new_active = new_facets
+    types = _supplier_types(old_supplier, new_supplier)
+    product_search_service.apply_facet_change(
+        product_search_service.facet_keys(old_category, types.get(old_supplier), old_active),
+        product_search_service.facet_keys(new_category, types.get(new_supplier), new_active),
+    )
+
+
+@receiver(post_delete, sender=Product)
+def update_product_state_on_delete(sender, instance, **kwargs):
+    from .product_search import product_search_service
+    from .rfq_matching import rfq_matching_engine
+
+    rfq_matching_engine.invalidate()
+    state = getattr(instance, '_tracked_state', None) or _product_state(instance)
+    category_id, supplier_id, is_active = _facet_state(state)
+    types = _supplier_types(supplier_id)
+    product_search_service.apply_facet_change(
+        product_search_service.facet_keys(category_id, types.get(supplier_id), is_active),
+        [],
+    )
+
+
+@receiver(post_save, sender=RFQ)
+def match_new_rfq(sender, instance, created, raw=False, **kwargs):
+    """Yangi RFQ ni mos sotuvchilar lentasiga yozish (commit dan keyin, celery bo'lsa worker da)"""
+    from .tasks import match_rfq
+
+    if created and not raw:
+        transaction.on_commit(partial(getattr(match_rfq, 'delay', match_rfq), instance.pk))
+
+
+@receiver(post_save, sender=RFQ)
+def broadcast_new_rfq(sender, instance, created, raw=False, **kwargs):
+    """Yangi RFQ - kategoriya topiciga bitta push (sotuvchilar bo'yicha sikl yo'q)"""
+    from .notification_service import NotificationService
+    from .notification_topics import category_topic
+
+    if created and not raw and instance.status == RFQ.RFQStatus.ACTIVE:
+        NotificationService.send_topic_notification(
+            notification_type=Notification.NotificationType.NEW_RFQ,
+            title="Yangi so'rov",
+            message=f"{instance.category.name} bo'yicha yangi so'rov: {instance.volume}",
+            topic=category_topic(instance.category_id),
+            related_rfq=instance
+        )
+
+
+@receiver(post_save, sender=SupplierCategory)
+def supplier_category_saved(sender, instance, created, raw=False, **kwargs):
+    from .rfq_matching import rfq_matching_engine
+
+    if raw:
+        return
+    rfq_matching_engine.invalidate()
+    if created:
+        rfq_matching_engine.backfill_supplier(instance.user_id, [instance.category_id])
+
+
+@receiver(post_delete, sender=SupplierCategory)
+@receiver(post_save, sender=DealerFactory)
+@receiver(post_delete, sender=DealerFactory)
+def matching_source_changed(sender, instance, raw=False, **kwargs):
+    from .rfq_matching import rfq_matching_engine
+
+    if not raw:
+        rfq_matching_engine.invalidate()
+
+
+@receiver(post_init, sender=User)
+def remember_device_token(sender, instance, **kwargs):
+    instance._device_token = instance.__dict__.get('device_token')
+
+
+@receiver(post_init, sender=User)
+def remember_supplier_type(sender, instance, **kwargs):
+    instance._supplier_type = instance.__dict__.get('supplier_type', DEFERRED) if instance.pk else None
+
+
+@receiver(pre_save, sender=User)
+def load_deferred_supplier_type(sender, instance, raw=False, **kwargs):
+    """only()/defer() bilan yuklangan foydalanuvchi uchun eski supplier_type ni bazadan olish"""
+    if not raw and instance._supplier_type is DEFERRED:
+        instance._supplier_type = User.objects.filter(pk=instance.pk).values_list(
+            'supplier_type', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=User)
+def move_supplier_type_facets(sender, instance, created, raw=False, **kwargs):
+    """Sotuvchi turi o'zgarsa SUPPLIER_TYPE facet hisoblarini yangi bo'lakka o'tkazish"""
+    from .product_search import product_search_service
+
+    new_type = instance.__dict__.get('supplier_type', DEFERRED)
+    if raw or new_type is DEFERRED:
+        return
+    old_type, instance._supplier_type = instance._supplier_type, new_type
+    if not created:
+        product_search_service.supplier_type_changed(instance.pk, old_type, new_type)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_snapshot(sender, instance, created, raw=False, **kwargs):
+    """Auth snapshotini o'chirish - keyingi so'rov bazadan yuklaydi"""
+    from .authentication import user_snapshots
+
+    if not raw:
+        user_snapshots.invalidate(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user_snapshot(sender, instance, **kwargs):
+    from .authentication import user_snapshots
+
+    user_snapshots.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def invalidate_company_user_snapshot(sender, instance, created=True, raw=False, **kwargs):
+    """Kompaniya o'zgarishi foydalanuvchi snapshotidagi company_id ni eskirtiradi"""
+    from .authentication import user_snapshots
+
+    if not raw:
+        user_snapshots.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def register_device_token(sender, instance, created, raw=False, **kwargs):
+    """Eski User.device_token maydoniga yozilgan token qurilmalar registriga qo'shiladi"""
+    from .device_tokens import device_tokens
+
+    token = instance.__dict__.get('device_token')
+    if raw or not token or (not created and token == getattr(instance, '_device_token', None)):
+        return
+    instance._device_token = token
+    device_tokens.register(instance, token)
+
+
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, raw=False, **kwargs):
+    """Yangi o'qilmagan xabar - foydalanuvchi hisoblagichini oshirish (bulk_create da chaqirilmaydi)"""
+    from .notification_counter import unread_counter
+
+    if created and not raw and instance.read_at is None:
+        unread_counter.increment(instance.recipient_user_id)
+
+
+@receiver(post_save, sender=Notification)
+def publish_new_notification(sender, instance, created, raw=False, **kwargs):
+    """Yangi xabarni SSE orqali ulangan foydalanuvchiga yuborish"""
+    from .realtime import publish_notifications
+
+    if created and not raw:
+        publish_notifications([instance])
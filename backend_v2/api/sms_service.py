@@ -1,7 +1,8 @@
 import logging
 from django.conf import settings
-from typing import Optional, Dict, Any
-from eskiz_sms import EskizSMS
+from typing import Optional, Dict, Any, List, Tuple
+from .lazy_service import LazyService
+from .sms_transport import EskizTransport, SMSTransportError
 
 logger = logging.getLogger(__name__)
 
@@ -9,29 +10,37 @@ logger = logging.getLogger(__name__)
 class EskizSMSService:
     """
     Eskiz.uz SMS xizmati bilan integratsiya
-    Faqat ro'yxatdan o'tish va parol o'zgartirish uchun ishlatiladi
+    Ro'yxatdan o'tish, parol o'zgartirish va notification outbox SMS lari uchun ishlatiladi.
+    So'rovlar EskizTransport orqali (ulanishlar pooli, xotiradagi token) yuboriladi.
     """
     
-    def __init__(self):
+    def __init__(self, transport: Optional[EskizTransport] = None):
         self.email = getattr(settings, 'ESKIZ_EMAIL', None)
         self.password = getattr(settings, 'ESKIZ_PASSWORD', None)
         self.sender = getattr(settings, 'ESKIZ_SENDER', '4546')
-        self.eskiz = None
+        self.transport = transport
         
-        if self.email and self.password:
-            try:
-                self.eskiz = EskizSMS(
-                    email=self.email, 
-                    password=self.password,
-                    save_token=True,
-                    env_file_path='.env'
-                )
-                logger.info("Eskiz SMS xizmati muvaffaqiyatli ishga tushirildi")
-            except Exception as e:
-                logger.error(f"Eskiz SMS xizmatini ishga tushirishda xatolik: {e}")
-                self.eskiz = None
-        else:
-            logger.warning("Eskiz email yoki parol sozlanmagan")
+        if self.transport is None:
+            if self.email and self.password:
+                self.transport = EskizTransport(email=self.email, password=self.password)
+            else:
+                logger.warning("Eskiz email yoki parol sozlanmagan")
+    
+    @staticmethod
+    def clean_phone(phone: str) -> Optional[str]:
+        """Telefon raqamini 998XXXXXXXXX formatiga keltirish (noto'g'ri bo'lsa None)"""
+        clean_phone = (phone or '').replace('+', '').replace(' ', '').replace('-', '')
+        if not clean_phone.startswith('998') or len(clean_phone) != 12:
+            return None
+        return clean_phone
+    
+    @staticmethod
+    def _result(phone: str, data: Optional[Dict], error: str, latency_ms: float = 0.0) -> Dict[str, Any]:
+        if error:
+            logger.error(f"SMS yuborishda xatolik ({phone}): {error}")
+            return {"success": False, "error": f"SMS yuborishda xatolik: {error}", "latency_ms": latency_ms}
+        logger.info(f"SMS muvaffaqiyatli yuborildi: {phone}")
+        return {"success": True, "data": data, "latency_ms": latency_ms}
     
     def send_sms(self, phone: str, message: str) -> Dict[str, Any]:
         """
@@ -44,43 +53,76 @@ class EskizSMSService:
         Returns:
             Dict: API javobi
         """
-        if not self.eskiz:
+        error = self._precheck(phone)
+        if error:
+            return error
+        
+        try:
+            response = self.transport.send(self.clean_phone(phone), message, self.sender)
+        except SMSTransportError as e:
+            return self._result(phone, None, e.message)
+        return self._result(phone, response, '')
+    
+    def _precheck(self, phone: str) -> Optional[Dict[str, Any]]:
+        """
+        Xizmat sozlanmagan yoki raqam noto'g'ri bo'lsa xato javobi.
+        Bu xatolar doimiy (`permanent`) - qayta urinish yordam bermaydi.
+        """
+        if not self.transport:
             logger.error("Eskiz SMS xizmati sozlanmagan")
             return {
                 "success": False,
-                "error": "SMS xizmati sozlanmagan"
+                "error": "SMS xizmati sozlanmagan",
+                "permanent": True
             }
-        
-        # Telefon raqamini tozalash
-        clean_phone = phone.replace('+', '').replace(' ', '').replace('-', '')
-        
-        # Telefon raqamini tekshirish
-        if not clean_phone.startswith('998') or len(clean_phone) != 12:
+        if not self.clean_phone(phone):
             logger.error(f"Noto'g'ri telefon raqam formati: {phone}")
             return {
                 "success": False,
-                "error": "Noto'g'ri telefon raqam formati"
+                "error": "Noto'g'ri telefon raqam formati",
+                "permanent": True
             }
+        return None
+    
+    def send_many(self, messages: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Ko'p SMS ni parallel yuborish (ESKIZ_CONCURRENCY ta thread bilan cheklangan)
         
-        try:
-            response = self.eskiz.send_sms(
-                clean_phone,
-                message,
-                from_whom=self.sender
-            )
-            
-            logger.info(f"SMS muvaffaqiyatli yuborildi: {phone}")
-            return {
-                "success": True,
-                "data": response
-            }
+        Args:
+            messages: [(telefon, matn)]
             
-        except Exception as e:
-            logger.error(f"SMS yuborishda xatolik: {e}")
-            return {
-                "success": False,
-                "error": f"SMS yuborishda xatolik: {str(e)}"
-            }
+        Returns:
+            List[Dict]: messages tartibidagi javoblar
+        """
+        results, pending = self._split(messages)
+        if pending:
+            sent = self.transport.send_many(
+                [(self.clean_phone(phone), message) for _, phone, message in pending], self.sender
+            )
+            for (index, phone, _), result in zip(pending, sent):
+                results[index] = self._result(phone, result.data, result.error, result.latency_ms)
+        return results
+    
+    async def asend_many(self, messages: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """send_many ning asinxron varianti (notification outbox worker uchun)"""
+        results, pending = self._split(messages)
+        if pending:
+            sent = await self.transport.asend_many(
+                [(self.clean_phone(phone), message) for _, phone, message in pending], self.sender
+            )
+            for (index, phone, _), result in zip(pending, sent):
+                results[index] = self._result(phone, result.data, result.error, result.latency_ms)
+        return results
+    
+    def _split(self, messages):
+        """Tekshiruvdan o'tmaganlar uchun javoblar va yuboriladigan (indeks, telefon, matn) lar"""
+        results = [None] * len(messages)
+        pending = []
+        for index, (phone, message) in enumerate(messages):
+            results[index] = self._precheck(phone)
+            if results[index] is None:
+                pending.append((index, phone, message))
+        return results, pending
     
     def send_verification_code(self, phone: str, code: str) -> Dict[str, Any]:
         """
@@ -110,5 +152,5 @@ class EskizSMSService:
         message = f"MetOneX Marketplaceda parolingizni o'zgartirish uchun kodi: {code}"
         return self.send_sms(phone, message)
     
-# Global instance
-sms_service = EskizSMSService()
+# Global instance (birinchi murojaatda, har bir processda alohida yaratiladi)
+sms_service = LazyService(EskizSMSService)
@@ -0,0 +1,282 @@
+"""
+Eskiz SMS transport - ulanishlar pooli, token cache va parallel yuborish
+
+Bitta httpx.Client (keep-alive ulanishlar pooli, timeout) barcha threadlar uchun
+umumiy. Eskiz tokeni faqat xotirada saqlanadi (.env ga yozilmaydi) va muddati
+tugashidan TOKEN_REFRESH_MARGIN soniya oldin /auth/refresh bilan yangilanadi;
+401 javobida token bir marta yangilanib so'rov qaytariladi.
+
+send_many() thread pool, asend_many() esa asyncio bilan ko'pi bilan
+ESKIZ_CONCURRENCY ta SMS ni parallel yuboradi (OTP to'lqinlari, outbox worker).
+"""
+
+import asyncio
+import base64
+import json
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from django.conf import settings
+
+BASE_URL = getattr(settings, 'ESKIZ_BASE_URL', 'https://notify.eskiz.uz/api')
+TIMEOUT_SECONDS = getattr(settings, 'ESKIZ_TIMEOUT_SECONDS', 10)
+MAX_CONNECTIONS = getattr(settings, 'ESKIZ_MAX_CONNECTIONS', 20)
+CONCURRENCY = getattr(settings, 'ESKIZ_CONCURRENCY', 10)
+# Token muddati tugashidan shuncha oldin yangilanadi
+TOKEN_REFRESH_MARGIN = getattr(settings, 'ESKIZ_TOKEN_REFRESH_MARGIN', 60 * 60)
+# Token muddatini o'qib bo'lmasa (JWT emas) - Eskiz tokeni 30 kun amal qiladi
+DEFAULT_TOKEN_TTL = 29 * 24 * 60 * 60
+
+SendResult = namedtuple('SendResult', ['data', 'error', 'latency_ms'])
+
+
+class SMSTransportError(Exception):
+    """Eskiz so'rovi bajarilmadi"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def token_expiry(token, now=None):
+    """JWT payload idagi exp (unix vaqt) yoki DEFAULT_TOKEN_TTL"""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return (now or time.time()) + DEFAULT_TOKEN_TTL
+
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+class TokenCache:
+    """Xotiradagi Eskiz tokeni va uning muddati"""
+
+    def __init__(self, margin=TOKEN_REFRESH_MARGIN):
+        self.margin = margin
+        self.token = None
+        self.expires_at = 0.0
+
+    def fresh(self, stale=None):
+        """Yangilash kerak bo'lmagan token yoki None. stale - 401 olgan token"""
+        if not self.token or self.token == stale:
+            return None
+        if time.time() >= self.expires_at - self.margin:
+            return None
+        return self.token
+
+    def refreshable(self, stale=None):
+        """Joriy token /auth/refresh uchun yaroqlimi (muddati tugamagan)"""
+        return bool(self.token) and self.token != stale and time.time() < self.expires_at
+
+    def set(self, token):
+        self.token = token
+        self.expires_at = token_expiry(token)
+
+    def clear(self):
+        self.token = None
+        self.expires_at = 0.0
+
+
+class EskizTransport:
+    """
+    Eskiz API mijozi. transport / async_transport - httpx transporti
+    (testlarda fake_eskiz.FakeEskizServer beriladi).
+    """
+
+    def __init__(self, email, password, base_url=None, timeout=None, max_connections=None,
+                 concurrency=None, transport=None, async_transport=None):
+        self.email = email
+        self.password = password
+        self.base_url = base_url or BASE_URL
+        self.timeout = timeout or TIMEOUT_SECONDS
+        self.max_connections = max_connections or MAX_CONNECTIONS
+        self.concurrency = concurrency or CONCURRENCY
+        self.transport = transport
+        self.async_transport = async_transport
+        self.tokens = TokenCache()
+        self._lock = threading.Lock()
+        self._client_lock = threading.Lock()
+        self._client = None
+
+    def _client_kwargs(self):
+        return {
+            'base_url': self.base_url,
+            'timeout': httpx.Timeout(self.timeout),
+            'limits': httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            ),
+        }
+
+    @property
+    def client(self):
+        """Umumiy (thread-safe) sinxron mijoz"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = httpx.Client(transport=self.transport, **self._client_kwargs())
+        return self._client
+
+    def async_client(self):
+        """Asinxron mijoz - event loop ga bog'liq, shuning uchun har bir paketga alohida"""
+        return httpx.AsyncClient(transport=self.async_transport, **self._client_kwargs())
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    # Token
+
+    def _auth_requests(self, client, stale):
+        """Token olish so'rovlari: avval refresh (token hali amal qilsa), keyin login"""
+        requests = []
+        if self.tokens.refreshable(stale):
+            requests.append(client.build_request('PATCH', '/auth/refresh', headers=bearer(self.tokens.token)))
+        requests.append(client.build_request(
+            'POST', '/auth/login', data={'email': self.email, 'password': self.password}
+        ))
+        return requests
+
+    def _store_token(self, response):
+        token = None
+        if response.status_code in (200, 201):
+            token = (parse_json(response).get('data') or {}).get('token')
+        if not token:
+            raise SMSTransportError("Eskiz tokenini olib bo'lmadi", response.status_code)
+        self.tokens.set(token)
+        return token
+
+    def token(self, stale=None):
+        token = self.tokens.fresh(stale)
+        if token:
+            return token
+        with self._lock:
+            token = self.tokens.fresh(stale)
+            if token:
+                return token
+            error = None
+            for request in self._auth_requests(self.client, stale):
+                try:
+                    return self._store_token(self.client.send(request))
+                except (httpx.HTTPError, SMSTransportError) as e:
+                    error = e
+            raise as_transport_error(error)
+
+    async def atoken(self, client, lock, stale=None):
+        token = self.tokens.fresh(stale)
+        if token:
+            return token
+        async with lock:
+            token = self.tokens.fresh(stale)
+            if token:
+                return token
+            error = None
+            for request in self._auth_requests(client, stale):
+                try:
+                    return self._store_token(await client.send(request))
+                except (httpx.HTTPError, SMSTransportError) as e:
+                    error = e
+            raise as_transport_error(error)
+
+    # Yuborish
+
+    @staticmethod
+    def _payload(phone, message, sender):
+        return {'mobile_phone': phone, 'message': message, 'from': sender}
+
+    def send(self, phone, message, sender):
+        """Bitta SMS. Qaytaradi: Eskiz javobi (dict), xatoda SMSTransportError"""
+        payload = self._payload(phone, message, sender)
+        try:
+            token = self.token()
+            response = self.client.post('/message/sms/send', data=payload, headers=bearer(token))
+            if response.status_code == 401:
+                token = self.token(stale=token)
+                response = self.client.post('/message/sms/send', data=payload, headers=bearer(token))
+        except httpx.HTTPError as e:
+            raise as_transport_error(e)
+        return check_response(response)
+
+    async def asend(self, client, lock, phone, message, sender):
+        payload = self._payload(phone, message, sender)
+        try:
+            token = await self.atoken(client, lock)
+            response = await client.post('/message/sms/send', data=payload, headers=bearer(token))
+            if response.status_code == 401:
+                token = await self.atoken(client, lock, stale=token)
+                response = await client.post('/message/sms/send', data=payload, headers=bearer(token))
+        except httpx.HTTPError as e:
+            raise as_transport_error(e)
+        return check_response(response)
+
+    def _timed(self, send, *args):
+        started = time.perf_counter()
+        try:
+            data, error = send(*args), ''
+        except SMSTransportError as e:
+            data, error = None, e.message
+        return SendResult(data, error, (time.perf_counter() - started) * 1000)
+
+    def send_many(self, messages, sender):
+        """
+        messages - [(telefon, matn)]. Ko'pi bilan `concurrency` ta thread bilan parallel.
+        Qaytaradi: [SendResult] (messages tartibida)
+        """
+        if not messages:
+            return []
+        workers = min(self.concurrency, len(messages))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(
+                lambda item: self._timed(self.send, item[0], item[1], sender), messages
+            ))
+
+    async def asend_many(self, messages, sender):
+        """send_many ning asinxron varianti (asyncio.Semaphore bilan cheklangan)"""
+        if not messages:
+            return []
+        semaphore = asyncio.Semaphore(self.concurrency)
+        lock = asyncio.Lock()
+
+        async with self.async_client() as client:
+            async def send_one(phone, message):
+                async with semaphore:
+                    started = time.perf_counter()
+                    try:
+                        data, error = await self.asend(client, lock, phone, message, sender), ''
+                    except SMSTransportError as e:
+                        data, error = None, e.message
+                    return SendResult(data, error, (time.perf_counter() - started) * 1000)
+
+            return await asyncio.gather(*(send_one(phone, message) for phone, message in messages))
+
+
+def parse_json(response):
+    try:
+        data = response.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def check_response(response):
+    data = parse_json(response)
+    if response.status_code not in (200, 201):
+        raise SMSTransportError(
+            data.get('message') or f"Eskiz HTTP {response.status_code}", response.status_code
+        )
+    return data
+
+
+def as_transport_error(error):
+    if isinstance(error, SMSTransportError):
+        return error
+    return SMSTransportError(f"Eskiz bilan aloqa xatosi: {str(error) or error.__class__.__name__}")
@@ -0,0 +1,114 @@
+"""
+Periodik vazifalar (ixtiyoriy) - celery o'rnatilgan bo'lsa ro'yxatdan o'tadi.
+
+Celery beat misoli:
+    CELERY_BEAT_SCHEDULE = {
+        'expire-rfqs': {'task': 'api.tasks.expire_rfqs', 'schedule': 300},
+        'deliver-notifications': {'task': 'api.tasks.deliver_notifications', 'schedule': 5},
+        'archive-notifications': {'task': 'api.tasks.archive_notifications', 'schedule': 3600},
+        'sync-topic-subscriptions': {'task': 'api.tasks.sync_topic_subscriptions', 'schedule': 60},
+        'expire-sessions': {'task': 'api.tasks.expire_sessions', 'schedule': 3600},
+        'flush-product-views': {'task': 'api.tasks.flush_product_views', 'schedule': 60},
+        'rebuild-facet-counts': {'task': 'api.tasks.rebuild_facet_counts', 'schedule': 86400},
+    }
+Celery ishlatilmasa `python manage.py expire_rfqs`, `python manage.py archive_notifications`,
+`python manage.py sync_topic_subscriptions`, `python manage.py expire_sessions`,
+`python manage.py flush_product_views` va `python manage.py rebuild_facet_counts` ni cron orqali, `python manage.py deliver_notifications` ni esa doimiy process sifatida
+ishga tushiring.
+"""
+
+try:
+    from celery import shared_task
+except ImportError:  # celery ixtiyoriy
+    shared_task = None
+
+
+def expire_rfqs(chunk_size=None):
+    """Muddati o'tgan RFQ larni yopish"""
+    from .rfq_expiry import rfq_expiry_sweeper
+    return rfq_expiry_sweeper.sweep(chunk_size=chunk_size)
+
+
+def match_rfq(rfq_id):
+    """Yangi RFQ ga mos sotuvchilarni rfq_matches jadvaliga yozish"""
+    from .models import RFQ
+    from .rfq_matching import rfq_matching_engine
+
+    rfq = RFQ.objects.select_related('category', 'unit').filter(pk=rfq_id).first()
+    if rfq is None:
+        return 0
+    return len(rfq_matching_engine.record_matches(rfq))
+
+
+def deliver_notifications(batch_size=None):
+    """Notification outbox dan bitta paketni yuborish"""
+    from .notification_outbox import notification_outbox
+    return notification_outbox.run_once(batch_size=batch_size)
+
+
+def archive_notifications(chunk_size=None):
+    """Eski notificationlarni arxivga ko'chirish va arxivni tozalash"""
+    from .notification_retention import notification_retention
+    return notification_retention.run(chunk_size=chunk_size)
+
+
+def sync_topic_subscriptions():
+    """Sotuvchi kategoriyalari bo'yicha FCM topic obunalarini sinxronlash"""
+    from .notification_topics import topic_subscriptions
+    return topic_subscriptions.sync()
+
+
+def expire_sessions(idle_days=None):
+    """Uzoq vaqt faol bo'lmagan UserSession larni yopish"""
+    from .session_tracker import SESSION_IDLE_DAYS, session_tracker
+    return session_tracker.expire(idle_days=idle_days or SESSION_IDLE_DAYS)
+
+
+def flush_product_views():
+    """Keshdagi mahsulot ko'rishlarini DB ga yozish"""
+    from .product_view_counter import product_view_counter
+    return product_view_counter.flush()
+
+
+def rebuild_facet_counts():
+    """Mahsulot facet hisoblarini qayta hisoblash (queryset.update() kabi signalsiz o'zgarishlar uchun)"""
+    from .product_search import product_search_service
+    return product_search_service.rebuild_facet_counts()
+
+
+def record_otp_audit(event, phone, expires_at, code='', attempts=0):
+    """OTP audit jurnali (VerificationCode): issued - yangi yozuv, failed/used - yangilash"""
+    from datetime import datetime, timezone as dt_timezone
+    from django.utils import timezone
+    from .models import VerificationCode
+
+    expires_at = datetime.fromtimestamp(expires_at, tz=dt_timezone.utc)
+    if event == 'issued':
+        VerificationCode.objects.create(phone=phone, code=code, expires_at=expires_at)
+        return
+    fields = {'attempts': attempts}
+    if event == 'used':
+        fields['used_at'] = timezone.now()
+    VerificationCode.objects.filter(phone=phone, expires_at=expires_at).update(**fields)
+
+
+if shared_task is not None:
+    expire_rfqs = shared_task(name='api.tasks.expire_rfqs', ignore_result=False)(expire_rfqs)
+    match_rfq = shared_task(name='api.tasks.match_rfq', ignore_result=True)(match_rfq)
+    deliver_notifications = shared_task(
+        name='api.tasks.deliver_notifications', ignore_result=True
+    )(deliver_notifications)
+    archive_notifications = shared_task(
+        name='api.tasks.archive_notifications', ignore_result=False
+    )(archive_notifications)
+    sync_topic_subscriptions = shared_task(
+        name='api.tasks.sync_topic_subscriptions', ignore_result=True
+    )(sync_topic_subscriptions)
+    expire_sessions = shared_task(name='api.tasks.expire_sessions', ignore_result=False)(expire_sessions)
+    flush_product_views = shared_task(
+        name='api.tasks.flush_product_views', ignore_result=True
+    )(flush_product_views)
+    rebuild_facet_counts = shared_task(
+        name='api.tasks.rebuild_facet_counts', ignore_result=True
+    )(rebuild_facet_counts)
+    record_otp_audit = shared_task(name='api.tasks.record_otp_audit', ignore_result=True)(record_otp_audit)
@@ -6,7 +6,8 @@ from django.utils import timezone
 from datetime import timedelta
 from django.urls import reverse
 from rest_framework import status
-from api.models import RFQ, User, VerificationCode
+from api.models import RFQ, User
+from api.otp_store import otp_store
 
 from api.tests.base import BaseAPITestCase
 
@@ -220,12 +221,7 @@ class AuthenticationWorkflowTest(BaseAPITestCase):
         """Test complete authentication workflow"""
         
         # First simulate phone verification
-        verification_code = VerificationCode.objects.create(
-            phone='+998901234600',
-            code='123456',
-            expires_at=timezone.now() + timedelta(minutes=5)
-        )
-        verification_code.mark_as_used()
+        otp_store.mark_verified('+998901234600')
         
         # Step 1: Register new user
         register_url = reverse('user-register')
@@ -1,14 +1,40 @@
 """
 Model tests for MetOneX API
 """
-from django.test import TestCase
+import os
+from io import StringIO
+from functools import partial
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import timedelta
 from api.models import (
     User, Company, Unit, Category, SubCategory, Factory,
-    Product, RFQ, Offer, Order, Payment, Notification
+    Product, ProductFacetCount, RFQ, RFQMatch, Offer, Order, OrderStatusHistory, Payment, Notification,
+    NotificationOutbox, NotificationDeliveryAttempt, DeviceToken, TopicSubscription,
+    SupplierCategory, DealerFactory
+)
+from api.checks import check_shared_cache
+from api.device_tokens import device_tokens
+from api.fake_eskiz import FakeEskizServer
+from api.lazy_service import LazyService
+from api.fake_fcm import FakeFCMClient
+from api.notification_outbox import (
+    MAX_ATTEMPTS, DeliveryError, NotificationOutboxService, send_push_batch, send_sms_batch,
+    send_topic_batch
 )
+from api.notification_service import NotificationService
+from api.notification_topics import category_topic, topic_subscriptions
+from api.sms_service import EskizSMSService
+from api.sms_transport import EskizTransport
+from api.order_state import InvalidTransition, order_state_machine
+from api import rfq_matching
+from api.rfq_matching import rfq_matching_engine
 from api.tests.base import BaseModelTestCase
 
 
@@ -222,6 +248,623 @@ class RFQModelTest(BaseModelTestCase):
         self.rfq.save()
         self.assertFalse(self.rfq.can_receive_offers())
 
+    def test_search(self):
+        """Test full-text search index stays in sync with RFQ rows"""
+        self.assertEqual(list(RFQ.objects.search('tashk')), [self.rfq])
+        self.assertFalse(RFQ.objects.search('samarkand').exists())
+        
+        self.rfq.delivery_location = 'Samarkand'
+        self.rfq.brand = 'Temir'
+        self.rfq.save()
+        self.assertFalse(RFQ.objects.search('tashkent').exists())
+        
+        rfq = RFQ.objects.search('temir samark').get()
+        self.assertEqual(rfq, self.rfq)
+        self.assertGreater(rfq.search_rank, 0)
+        
+        self.rfq.delete()
+        self.assertFalse(RFQ.objects.search('samarkand').exists())
+
+    def test_expiry_sweep(self):
+        """Test expired RFQs are closed in chunks with buyer notifications"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        past = timezone.now() - timedelta(hours=1)
+        RFQ.objects.filter(pk=self.rfq.pk).update(expires_at=past)
+        expired_ids = [self.rfq.pk]
+        for _ in range(2):
+            rfq = RFQ.objects.create(
+                buyer=self.user, category=self.category, unit=self.unit, volume=5,
+                delivery_location='Tashkent', delivery_date='2024-12-31',
+                payment_method=RFQ.PaymentMethod.CASH, expires_at=past
+            )
+            expired_ids.append(rfq.pk)
+        cancelled = RFQ.objects.create(
+            buyer=self.user, category=self.category, unit=self.unit, volume=5,
+            delivery_location='Tashkent', delivery_date='2024-12-31',
+            payment_method=RFQ.PaymentMethod.CASH, expires_at=past,
+            status=RFQ.RFQStatus.CANCELLED
+        )
+        active = RFQ.objects.create(
+            buyer=self.user, category=self.category, unit=self.unit, volume=5,
+            delivery_location='Tashkent', delivery_date='2024-12-31',
+            payment_method=RFQ.PaymentMethod.CASH, expires_at=timezone.now() + timedelta(days=1)
+        )
+        
+        out = StringIO()
+        call_command('expire_rfqs', chunk_size=2, stdout=out)
+        self.assertIn("3 ta RFQ yopildi", out.getvalue())
+        self.assertIn("2 ta bo'lak", out.getvalue())
+        
+        self.assertEqual(
+            set(RFQ.objects.filter(status=RFQ.RFQStatus.EXPIRED).values_list('id', flat=True)),
+            set(expired_ids)
+        )
+        self.assertEqual(RFQ.objects.get(pk=cancelled.pk).status, RFQ.RFQStatus.CANCELLED)
+        self.assertEqual(RFQ.objects.get(pk=active.pk).status, RFQ.RFQStatus.ACTIVE)
+        self.assertEqual(
+            sorted(Notification.objects.filter(
+                type=Notification.NotificationType.RFQ_EXPIRED, recipient_user=self.user
+            ).values_list('related_rfq_id', flat=True)),
+            sorted(expired_ids)
+        )
+        # Push worker orqali yuboriladi
+        self.assertEqual(
+            sorted(NotificationOutbox.objects.filter(
+                notification__type=Notification.NotificationType.RFQ_EXPIRED,
+                channel=NotificationOutbox.Channel.PUSH
+            ).values_list('notification__related_rfq_id', flat=True)),
+            sorted(expired_ids)
+        )
+        
+        # Takroriy sweep hech narsa qilmaydi
+        out = StringIO()
+        call_command('expire_rfqs', stdout=out)
+        self.assertIn("0 ta RFQ yopildi", out.getvalue())
+
+    def test_with_offer_stats(self):
+        """Test offer stats annotation"""
+        supplier = User.objects.create_user(
+            username='stats_supplier',
+            phone='+998901234599',
+            password='testpass123',
+            role=User.UserRole.SUPPLIER
+        )
+        for price, days in [(900, 20), (850, 10)]:
+            Offer.objects.create(
+                rfq=self.rfq,
+                supplier=supplier,
+                price_per_unit=price,
+                total_amount=price * 10,
+                delivery_terms='Delivery included',
+                delivery_date=(timezone.now() + timedelta(days=days)).date()
+            )
+        
+        rfq = RFQ.objects.with_offer_stats().get(pk=self.rfq.pk)
+        with self.assertNumQueries(0):
+            stats = rfq.get_offer_stats()
+        self.assertEqual(stats['count'], 2)
+        self.assertEqual(stats['min_price'], 850)
+        self.assertEqual(stats['max_price'], 900)
+        self.assertEqual(stats['earliest_delivery_date'], (timezone.now() + timedelta(days=10)).date())
+        self.assertEqual(stats['new_last_24h'], 2)
+        
+        # Annotatsiyasiz obyekt uchun bitta aggregate so'rov
+        with self.assertNumQueries(1):
+            self.assertEqual(self.rfq.get_offer_stats(), stats)
+
+
+class ProductFacetCountTest(BaseModelTestCase):
+    """Test product facet counts are maintained on save/delete"""
+    
+    def setUp(self):
+        super().setUp()
+        self.unit = Unit.objects.create(name='Tonna', symbol='ton', unit_type=Unit.UnitType.WEIGHT)
+        self.category = Category.objects.create(
+            name='Armatura', slug='armatura', unit_type=Category.UnitType.WEIGHT
+        )
+        self.other_category = Category.objects.create(
+            name='Truba', slug='truba', unit_type=Category.UnitType.WEIGHT
+        )
+        self.supplier = User.objects.create_user(
+            username='dealer',
+            phone='+998901111111',
+            password='testpass123',
+            role=User.UserRole.SUPPLIER,
+            supplier_type=User.SupplierType.DEALER
+        )
+    
+    def counts(self):
+        return {
+            (row.facet, row.value): row.count
+            for row in ProductFacetCount.objects.filter(count__gt=0)
+        }
+    
+    def test_counts_follow_product_changes(self):
+        """Test counts are updated incrementally"""
+        product = Product.objects.create(
+            supplier=self.supplier, category=self.category, unit=self.unit,
+            brand='Artel', grade='A500C', base_price=1000
+        )
+        self.assertEqual(self.counts(), {
+            ('category', str(self.category.id)): 1,
+            ('supplier_type', 'dealer'): 1,
+        })
+        
+        # Facetga aloqasi yo'q maydon - hech narsa o'zgarmaydi
+        product.base_price = 2000
+        with self.assertNumQueries(1):
+            product.save()
+        
+        product.category = self.other_category
+        product.save()
+        self.assertEqual(self.counts(), {
+            ('category', str(self.other_category.id)): 1,
+            ('supplier_type', 'dealer'): 1,
+        })
+        
+        # only() bilan yuklangan mahsulot
+        product = Product.objects.only('id', 'brand').get(pk=product.pk)
+        product.is_active = False
+        product.save()
+        self.assertEqual(self.counts(), {})
+        
+        Product.objects.get(pk=product.pk).delete()
+        self.assertEqual(self.counts(), {})
+    
+    def test_supplier_type_change_moves_counts(self):
+        """Test supplier type change moves the supplier's active products between buckets"""
+        for brand in ('Artel', 'Bekabad'):
+            Product.objects.create(
+                supplier=self.supplier, category=self.category, unit=self.unit,
+                brand=brand, grade='A500C', base_price=1000
+            )
+        supplier = User.objects.only('id', 'username').get(pk=self.supplier.pk)
+        supplier.supplier_type = User.SupplierType.MANUFACTURER
+        supplier.save()
+        self.assertEqual(self.counts(), {
+            ('category', str(self.category.id)): 2,
+            ('supplier_type', 'manufacturer'): 2,
+        })
+        
+        # Keyingi mahsulot saqlanishi eski bo'lakni buzmaydi
+        product = Product.objects.filter(supplier=self.supplier).first()
+        product.category = self.other_category
+        product.save()
+        self.assertEqual(self.counts()[('supplier_type', 'manufacturer')], 2)
+        
+        # Signalsiz o'zgarish - rebuild_facet_counts buyrug'i tuzatadi
+        User.objects.filter(pk=self.supplier.pk).update(supplier_type=User.SupplierType.DEALER)
+        call_command('rebuild_facet_counts', stdout=StringIO())
+        self.assertEqual(self.counts(), {
+            ('category', str(self.category.id)): 1,
+            ('category', str(self.other_category.id)): 1,
+            ('supplier_type', 'dealer'): 2,
+        })
+
+
+class RFQMatchingEngineTest(BaseModelTestCase):
+    """Test supplier-to-RFQ matching engine"""
+    
+    def setUp(self):
+        super().setUp()
+        self.weight = Unit.objects.create(name='Tonna', symbol='ton', unit_type=Unit.UnitType.WEIGHT)
+        self.piece = Unit.objects.create(name='Dona', symbol='pcs', unit_type=Unit.UnitType.PIECE)
+        self.category = Category.objects.create(
+            name='Armatura', slug='armatura', unit_type=Category.UnitType.WEIGHT
+        )
+        self.factory = Factory.objects.create(name='Test Factory')
+        self.suppliers = {
+            name: User.objects.create_user(
+                username=name,
+                phone=f'+99890000000{index}',
+                password='testpass123',
+                role=User.UserRole.SUPPLIER,
+                supplier_type=User.SupplierType.MANUFACTURER
+            )
+            for index, name in enumerate(['declared', 'weight', 'piece', 'dealer'])
+        }
+        SupplierCategory.objects.create(user=self.suppliers['declared'], category=self.category)
+        for name, unit in [('weight', self.weight), ('piece', self.piece)]:
+            Product.objects.create(
+                supplier=self.suppliers[name], category=self.category, unit=unit,
+                factory=self.factory if name == 'weight' else None,
+                brand='Artel', grade='A500C', base_price=1000
+            )
+        DealerFactory.objects.create(dealer=self.suppliers['dealer'], factory=self.factory)
+    
+    def create_rfq(self, unit):
+        # Moslar commit dan keyin (tasks.match_rfq) yoziladi
+        with self.captureOnCommitCallbacks(execute=True):
+            return RFQ.objects.create(
+                buyer=self.user,
+                category=self.category,
+                unit=unit,
+                volume=10.0,
+                delivery_location='Tashkent',
+                delivery_date='2024-12-31',
+                payment_method=RFQ.PaymentMethod.BANK,
+                expires_at=timezone.now() + timedelta(days=7)
+            )
+    
+    def matched_names(self, rfq):
+        ids = set(RFQMatch.objects.filter(rfq=rfq).values_list('supplier_id', flat=True))
+        return {name for name, supplier in self.suppliers.items() if supplier.id in ids}
+    
+    def test_new_rfq_is_matched(self):
+        """Test new RFQ is routed by category, unit type and dealer factory"""
+        self.assertEqual(self.matched_names(self.create_rfq(self.weight)), {'declared', 'weight', 'dealer'})
+        self.assertEqual(self.matched_names(self.create_rfq(self.piece)), {'declared', 'piece'})
+        
+        # Indeks tayyor bo'lganda qidiruv bazaga murojaat qilmaydi
+        with self.assertNumQueries(0):
+            rfq_matching_engine.match_key(self.category.id, None, Unit.UnitType.WEIGHT)
+        
+        # So'rov ichida indeks versiyasi keshdan bir marta o'qiladi
+        rfq_matching_engine.begin_request()
+        try:
+            with mock.patch.object(rfq_matching, 'cache', wraps=rfq_matching.cache) as cache:
+                rfq_matching_engine.match_key(self.category.id, None, Unit.UnitType.WEIGHT)
+                rfq_matching_engine.match_key(self.category.id, None, Unit.UnitType.PIECE)
+            self.assertEqual(cache.get.call_count, 1)
+        finally:
+            rfq_matching_engine.end_request()
+    
+    def test_index_invalidated_on_source_change(self):
+        """Test index is rebuilt after supplier categories change"""
+        other = Category.objects.create(name='Truba', slug='truba', unit_type=Category.UnitType.PIECE)
+        rfq = self.create_rfq(self.weight)
+        rfq.category = other
+        rfq.save()
+        self.assertEqual(rfq_matching_engine.match_rfq(rfq), frozenset())
+        
+        # Yangi kategoriya qo'shilganda mavjud faol RFQ lar ham lentaga tushadi
+        SupplierCategory.objects.create(user=self.suppliers['piece'], category=other)
+        self.assertEqual(rfq_matching_engine.match_rfq(rfq), {self.suppliers['piece'].id})
+        self.assertIn('piece', self.matched_names(rfq))
+
+
+class NotificationOutboxTest(BaseModelTestCase):
+    """Notification outbox: navbatga qo'yish, egallash, qayta urinish"""
+    
+    def setUp(self):
+        super().setUp()
+        self.sent = []
+        self.sms_error = 'Eskiz javob bermadi'
+        
+        def fake_sms(notification):
+            if self.sms_error:
+                raise DeliveryError(self.sms_error)
+            self.sent.append(('sms', notification.id))
+        
+        self.fcm = FakeFCMClient()
+        self.outbox = NotificationOutboxService(
+            senders={NotificationOutbox.Channel.SMS: fake_sms},
+            batch_senders={NotificationOutbox.Channel.PUSH: partial(send_push_batch, client=self.fcm)}
+        )
+        self.user.device_token = 'token-test-user'
+        self.user.save(update_fields=['device_token'])
+    
+    def create(self, delivery_method):
+        return NotificationService.create_notification(
+            notification_type=Notification.NotificationType.INFO,
+            title='Salom',
+            message='Test xabar',
+            recipient_user=self.user,
+            delivery_method=delivery_method
+        )
+    
+    def test_enqueue_in_same_transaction(self):
+        """Faqat database xabar navbatga tushmaydi, rollback navbatni ham bekor qiladi"""
+        notification = self.create(Notification.DeliveryMethod.DATABASE_ONLY)
+        self.assertIsNotNone(notification.sent_at)
+        self.assertFalse(NotificationOutbox.objects.exists())
+        
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.create(Notification.DeliveryMethod.PUSH_SMS)
+                raise RuntimeError
+        self.assertFalse(NotificationOutbox.objects.exists())
+    
+    def test_deliver_with_retry(self):
+        """Push yuboriladi, SMS xatoda kechikish bilan qayta navbatga qaytadi"""
+        notification = self.create(Notification.DeliveryMethod.PUSH_SMS)
+        self.assertEqual(notification.outbox_entries.count(), 2)
+        
+        stats = self.outbox.run_once(batch_size=10, worker_id='test')
+        self.assertEqual((stats['claimed'], stats['sent'], stats['retried']), (2, 1, 1))
+        self.assertEqual(set(stats['latency_ms']), {'push', 'sms'})
+        self.assertEqual(self.fcm.calls[0]['tokens'], ['token-test-user'])
+        self.assertEqual(self.fcm.calls[0]['data']['notification_id'], str(notification.id))
+        
+        sms = notification.outbox_entries.get(channel=NotificationOutbox.Channel.SMS)
+        self.assertEqual(sms.status, NotificationOutbox.Status.PENDING)
+        self.assertEqual(sms.attempts, 1)
+        self.assertGreater(sms.next_attempt_at, timezone.now())
+        self.assertEqual(NotificationDeliveryAttempt.objects.filter(success=False).count(), 1)
+        notification.refresh_from_db()
+        self.assertIsNone(notification.sent_at)
+        
+        # Kechikish muddati tugamaguncha yozuv qayta egallanmaydi
+        self.assertEqual(self.outbox.claim(batch_size=10), [])
+        
+        self.sms_error = None
+        NotificationOutbox.objects.filter(pk=sms.pk).update(next_attempt_at=timezone.now())
+        stats = self.outbox.run_once(batch_size=10)
+        self.assertEqual(stats['sent'], 1)
+        self.assertEqual(self.sent, [('sms', notification.id)])
+        notification.refresh_from_db()
+        self.assertIsNotNone(notification.sent_at)
+    
+    def test_bulk_fan_out(self):
+        """Bulk: bulk_create bilan yoziladi, push 500 tokenli multicast paketlarda yuboriladi"""
+        users = User.objects.bulk_create([
+            User(
+                username=f'bulk_{index}',
+                phone=f'+99890{index:07d}',
+                role=User.UserRole.SUPPLIER,
+                device_token=f'token-{index}'
+            )
+            for index in range(1, 603)
+        ] + [User(username='bulk_invalid', phone='+998911111111', device_token='invalid-1')])
+        DeviceToken.objects.bulk_create([DeviceToken(user=user, token=user.device_token) for user in users])
+        
+        # bulk_create: so'rovlar soni qabul qiluvchilar soniga bog'liq emas (SQLite parametr
+        # chegarasi tufayli bir nechta INSERT ga bo'linadi)
+        with CaptureQueriesContext(connection) as queries:
+            notifications = NotificationService.send_bulk_notification(
+                notification_type=Notification.NotificationType.NEW_RFQ,
+                title='Yangi so\'rov',
+                message='Armatura',
+                recipient_users=users,
+                delivery_method=Notification.DeliveryMethod.PUSH_ONLY
+            )
+        self.assertEqual(len(notifications), 603)
+        self.assertLess(len(queries), 50)
+        self.assertEqual(NotificationOutbox.objects.count(), 603)
+        
+        stats = self.outbox.run_once(batch_size=1000)
+        self.assertEqual((stats['sent'], stats['retried']), (602, 1))
+        self.assertEqual([len(call['tokens']) for call in self.fcm.calls], [500, 103])
+        self.assertNotIn('notification_id', self.fcm.calls[0]['data'])
+        self.assertEqual(
+            Notification.objects.filter(type=Notification.NotificationType.NEW_RFQ, sent_at__isnull=False).count(),
+            602
+        )
+        self.assertEqual(
+            NotificationOutbox.objects.get(status=NotificationOutbox.Status.PENDING).last_error,
+            'UNREGISTERED'
+        )
+        # O'lik qurilma tokeni registrdan o'chirildi
+        self.assertFalse(DeviceToken.objects.filter(token='invalid-1').exists())
+    
+    def test_push_to_all_devices_and_prune_stale(self):
+        """Push foydalanuvchining barcha qurilmalariga ketadi, yaroqsiz tokenlar o'chiriladi"""
+        device_tokens.register(self.user, 'invalid-old-phone', DeviceToken.Platform.ANDROID)
+        device_tokens.register(self.user, 'malformed-token', DeviceToken.Platform.IOS)
+        notification = self.create(Notification.DeliveryMethod.PUSH_ONLY)
+        
+        stats = self.outbox.run_once(batch_size=10)
+        self.assertEqual(stats['sent'], 1)
+        self.assertEqual(len(self.fcm.calls), 1)
+        self.assertEqual(len(self.fcm.calls[0]['tokens']), 3)
+        self.assertEqual(self.fcm.calls[0]['data']['notification_id'], str(notification.id))
+        self.assertEqual(
+            list(DeviceToken.objects.values_list('token', flat=True)), ['token-test-user']
+        )
+    
+    def test_entries_without_address_are_skipped(self):
+        """Device token yoki telefoni yo'q qabul qiluvchi yetkazilgan hisoblanmaydi va qayta urinilmaydi"""
+        DeviceToken.objects.filter(user=self.user).delete()
+        self.user.phone = ''
+        self.user.save(update_fields=['phone'])
+        notification = self.create(Notification.DeliveryMethod.PUSH_SMS)
+        
+        outbox = NotificationOutboxService(batch_senders={
+            NotificationOutbox.Channel.PUSH: partial(send_push_batch, client=self.fcm),
+            NotificationOutbox.Channel.SMS: send_sms_batch,
+        })
+        stats = outbox.run_once(batch_size=10)
+        self.assertEqual((stats['sent'], stats['skipped'], stats['retried']), (0, 2, 0))
+        self.assertEqual(self.fcm.calls, [])
+        self.assertEqual(
+            set(notification.outbox_entries.values_list('status', flat=True)),
+            {NotificationOutbox.Status.SKIPPED}
+        )
+        self.assertFalse(NotificationDeliveryAttempt.objects.exists())
+        notification.refresh_from_db()
+        self.assertIsNone(notification.sent_at)
+        self.assertIsNotNone(notification.failed_at)
+    
+    def test_malformed_phone_is_skipped(self):
+        """Noto'g'ri telefon raqami doimiy xato - yozuv darhol SKIPPED, qayta urinilmaydi"""
+        self.user.phone = '+99800'
+        self.user.save(update_fields=['phone'])
+        notification = self.create(Notification.DeliveryMethod.SMS_ONLY)
+        server = FakeEskizServer()
+        sms = EskizSMSService(transport=EskizTransport(
+            server.email, server.password,
+            transport=server.transport(), async_transport=server.async_transport()
+        ))
+        
+        outbox = NotificationOutboxService(
+            batch_senders={NotificationOutbox.Channel.SMS: partial(send_sms_batch, service=sms)}
+        )
+        stats = outbox.run_once(batch_size=10)
+        self.assertEqual((stats['sent'], stats['skipped'], stats['retried']), (0, 1, 0))
+        self.assertEqual(server.sent, [])
+        self.assertEqual(notification.outbox_entries.get().status, NotificationOutbox.Status.SKIPPED)
+        self.assertFalse(NotificationDeliveryAttempt.objects.exists())
+    
+    def test_gives_up_after_max_attempts(self):
+        """Urinishlar tugagach yozuv va notification muvaffaqiyatsiz belgilanadi"""
+        notification = self.create(Notification.DeliveryMethod.SMS_ONLY)
+        NotificationOutbox.objects.update(attempts=MAX_ATTEMPTS - 1)
+        
+        stats = self.outbox.run_once()
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(notification.outbox_entries.get().status, NotificationOutbox.Status.FAILED)
+        notification.refresh_from_db()
+        self.assertIsNotNone(notification.failed_at)
+        self.assertIn(self.sms_error, notification.error_message)
+    
+    def test_sms_batch_via_eskiz_transport(self):
+        """SMS lar bitta token va cheklangan parallellik bilan yuboriladi, 401 da token yangilanadi"""
+        server = FakeEskizServer(latency_ms=20)
+        sms = EskizSMSService(transport=EskizTransport(
+            server.email, server.password, concurrency=4,
+            transport=server.transport(), async_transport=server.async_transport()
+        ))
+        self.user.phone = '+998901112233'
+        self.user.save(update_fields=['phone'])
+        for _ in range(8):
+            self.create(Notification.DeliveryMethod.SMS_ONLY)
+        
+        outbox = NotificationOutboxService(
+            batch_senders={NotificationOutbox.Channel.SMS: partial(send_sms_batch, service=sms)}
+        )
+        stats = outbox.run_once(batch_size=10)
+        self.assertEqual(stats['sent'], 8)
+        self.assertEqual(len(server.sent), 8)
+        self.assertEqual(server.logins, 1)
+        self.assertTrue(1 < server.max_in_flight <= 4)
+        
+        # Sinxron yo'l: token xotirada qayta ishlatiladi, bekor bo'lsa qayta olinadi
+        server.expire_tokens()
+        results = sms.send_many([('+998901112233', 'Kod: 1234'), ('+99800', 'x'), ('998001234567', 'x')])
+        self.assertEqual([result['success'] for result in results], [True, False, False])
+        self.assertIn('Invalid phone number', results[2]['error'])
+        self.assertEqual(server.logins, 2)
+    
+    def test_new_rfq_broadcast_to_category_topic(self):
+        """Yangi RFQ kategoriya topiciga bitta xabar bilan yuboriladi, obunalar paketlab sinxronlanadi"""
+        unit = Unit.objects.create(name='Tonna', symbol='ton', unit_type=Unit.UnitType.WEIGHT)
+        categories = [
+            Category.objects.create(
+                name=name, slug=name.lower(), unit_type=Category.UnitType.WEIGHT, default_unit=unit
+            )
+            for name in ('Armatura', 'Sement')
+        ]
+        suppliers = []
+        for index in range(3):
+            supplier = User.objects.create_user(
+                username=f'topic_supplier_{index}', phone=f'+99890555000{index}',
+                password='testpass123', role=User.UserRole.SUPPLIER
+            )
+            device_tokens.register(supplier, f'supplier-{index}-phone')
+            SupplierCategory.objects.create(user=supplier, category=categories[0])
+            suppliers.append(supplier)
+        device_tokens.register(suppliers[0], 'invalid-old-phone')
+        SupplierCategory.objects.create(user=suppliers[0], category=categories[1])
+        
+        stats = topic_subscriptions.sync(client=self.fcm)
+        self.assertEqual(stats['calls'], 2)  # har bir topic uchun bitta chaqiruv
+        self.assertEqual((stats['subscribed'], stats['failed']), (4, 2))
+        self.assertEqual(
+            TopicSubscription.objects.filter(topic=category_topic(categories[0].id)).count(), 3
+        )
+        self.assertFalse(DeviceToken.objects.filter(token='invalid-old-phone').exists())
+        
+        # O'zgarish bo'lmasa FCM chaqirilmaydi; kategoriya olib tashlansa obunadan chiqariladi
+        self.assertEqual(topic_subscriptions.sync(client=self.fcm)['calls'], 0)
+        SupplierCategory.objects.filter(user=suppliers[0], category=categories[1]).delete()
+        stats = topic_subscriptions.sync(client=self.fcm)
+        self.assertEqual(stats['unsubscribed'], 1)
+        self.assertEqual(self.fcm.topic_calls[-1]['action'], 'unsubscribe')
+        self.assertFalse(TopicSubscription.objects.filter(topic=category_topic(categories[1].id)).exists())
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            rfq = RFQ.objects.create(
+                buyer=self.user, category=categories[0], unit=unit, volume=5,
+                delivery_location='Tashkent', delivery_date='2024-12-31',
+                payment_method=RFQ.PaymentMethod.CASH, expires_at=timezone.now() + timedelta(days=3)
+            )
+        entry = NotificationOutbox.objects.get(channel=NotificationOutbox.Channel.TOPIC)
+        self.assertEqual(entry.topic, category_topic(categories[0].id))
+        self.assertEqual(entry.notification.related_rfq_id, rfq.id)
+        
+        outbox = NotificationOutboxService(batch_senders={
+            NotificationOutbox.Channel.TOPIC: partial(send_topic_batch, client=self.fcm)
+        })
+        self.assertEqual(outbox.run_once(batch_size=10)['sent'], 1)
+        self.assertEqual([call.get('topic') for call in self.fcm.calls], [entry.topic])
+    
+    def test_coalesces_same_type_notifications(self):
+        """Bir xil turdagi xabarlar oynada yig'ilib bitta digest push bilan yuboriladi"""
+        notifications = [
+            NotificationService.create_notification(
+                notification_type=Notification.NotificationType.NEW_OFFER,
+                title='Yangi taklif',
+                message=f'Taklif {index}',
+                recipient_user=self.user,
+                delivery_method=Notification.DeliveryMethod.PUSH_ONLY
+            )
+            for index in range(3)
+        ]
+        windows = set(NotificationOutbox.objects.values_list('next_attempt_at', flat=True))
+        self.assertEqual(len(windows), 1)
+        self.assertGreater(windows.pop(), timezone.now())
+        # Oyna tugamaguncha yuborilmaydi
+        self.assertEqual(self.outbox.claim(batch_size=10), [])
+        
+        NotificationOutbox.objects.update(next_attempt_at=timezone.now())
+        stats = self.outbox.run_once(batch_size=10)
+        self.assertEqual((stats['claimed'], stats['sent'], stats['coalesced']), (3, 3, 2))
+        self.assertEqual(len(self.fcm.calls), 1)
+        self.assertEqual(self.fcm.calls[0]['title'], 'Yangi taklif (3 ta)')
+        self.assertEqual(NotificationDeliveryAttempt.objects.count(), 1)
+        
+        # Har bir notification alohida qoladi va yuborilgan deb belgilanadi
+        self.assertEqual(
+            Notification.objects.filter(id__in=[n.id for n in notifications], sent_at__isnull=False).count(), 3
+        )
+        self.assertEqual(
+            NotificationService.get_coalescing_stats(), {'saved': 2, 'by_channel': {'push': 2}}
+        )
+
+
+class LazyServiceTest(TestCase):
+    """Global xizmatlar birinchi murojaatda va har bir processda bir marta yaratiladi"""
+    
+    def test_lazy_and_fork_safe(self):
+        created = []
+        
+        class Service:
+            def __init__(self):
+                created.append(os.getpid())
+                self.name = 'ok'
+        
+        service = LazyService(Service)
+        self.assertFalse(service.initialized)
+        self.assertEqual(created, [])
+        self.assertEqual((service.name, service.name), ('ok', 'ok'))
+        self.assertEqual(len(created), 1)
+        
+        # Fork dan keyingi holat: boshqa process nusxani qayta yaratadi
+        service._pid = -1
+        self.assertFalse(service.initialized)
+        self.assertEqual(service.name, 'ok')
+        self.assertEqual(len(created), 2)
+
+
+class SharedCacheCheckTest(TestCase):
+    """OTP/rate limit/snapshot keshi process xotirasida bo'lsa system check xatosi"""
+    
+    def test_local_cache_rejected_when_shared_cache_required(self):
+        local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(SHARED_CACHE_REQUIRED=True, CACHES=local):
+            errors = check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ['api.E001'])
+        self.assertIn('OTP', errors[0].msg)
+        
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                              'LOCATION': 'redis://localhost:6379/0'}}
+        with override_settings(SHARED_CACHE_REQUIRED=True, CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
+        with override_settings(SHARED_CACHE_REQUIRED=False, CACHES=local):
+            self.assertEqual(check_shared_cache(None), [])
+
 
 class OfferModelTest(BaseModelTestCase):
     """Test Offer model"""
@@ -377,3 +1020,58 @@ class OrderModelTest(BaseModelTestCase):
         self.order.status = Order.OrderStatus.COMPLETED
         self.order.save()
         self.assertFalse(self.order.can_be_cancelled())
+    
+    def test_state_machine_transition(self):
+        """Holat o'tishi shartli UPDATE va tarix yozuvi bilan"""
+        self.assertTrue(order_state_machine.can_transition(
+            Order.OrderStatus.CREATED, Order.OrderStatus.AWAITING_PAYMENT
+        ))
+        self.assertFalse(order_state_machine.can_transition(
+            Order.OrderStatus.COMPLETED, Order.OrderStatus.CANCELLED
+        ))
+        
+        history = order_state_machine.transition(
+            self.order, Order.OrderStatus.AWAITING_PAYMENT, self.user
+        )
+        self.assertEqual(history.status, Order.OrderStatus.AWAITING_PAYMENT)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.OrderStatus.AWAITING_PAYMENT)
+        
+        with self.assertRaises(InvalidTransition) as ctx:
+            order_state_machine.transition(self.order, Order.OrderStatus.COMPLETED, self.user)
+        self.assertEqual(ctx.exception.status_code, 400)
+        
+        # Eskirgan nusxa: bazadagi holat boshqa so'rov tomonidan o'zgartirilgan
+        stale = Order.objects.get(pk=self.order.pk)
+        Order.objects.filter(pk=self.order.pk).update(status=Order.OrderStatus.CANCELLED)
+        with self.assertRaises(InvalidTransition) as ctx:
+            order_state_machine.transition(stale, Order.OrderStatus.PAYMENT_CONFIRMED, self.user)
+        self.assertEqual(ctx.exception.status_code, 409)
+        self.assertEqual(self.order.status_history.count(), 1)
+    
+    def test_state_machine_bulk_transition(self):
+        """Ko'p buyurtma bitta UPDATE va bulk_create bilan o'tkaziladi"""
+        second = Order.objects.create(
+            rfq=self.rfq, offer=self.offer, buyer=self.user, supplier=self.supplier,
+            total_amount=100.0, payment_method='bank', delivery_date='2024-12-25'
+        )
+        done = Order.objects.create(
+            rfq=self.rfq, offer=self.offer, buyer=self.user, supplier=self.supplier,
+            total_amount=100.0, payment_method='bank', delivery_date='2024-12-25',
+            status=Order.OrderStatus.COMPLETED
+        )
+        
+        # SELECT ... FOR UPDATE, UPDATE, INSERT (+ savepoint juftligi)
+        with self.assertNumQueries(5):
+            result = order_state_machine.bulk_transition(
+                [self.order.pk, str(second.pk), str(done.pk)], Order.OrderStatus.CANCELLED, self.user
+            )
+        
+        self.assertEqual(result['updated'], [self.order.pk, second.pk])
+        self.assertEqual(result['skipped'], [done.pk])
+        self.assertEqual(
+            Order.objects.filter(status=Order.OrderStatus.CANCELLED).count(), 2
+        )
+        self.assertEqual(
+            OrderStatusHistory.objects.filter(status=Order.OrderStatus.CANCELLED).count(), 2
+        )
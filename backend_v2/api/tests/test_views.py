@@ -1,11 +1,34 @@
 """
 View tests for MetOneX API
 """
+import os
+import tempfile
+import time
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DataError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
 from rest_framework import status
-from api.models import RFQ, Offer, Order, Company
+from rest_framework_simplejwt.tokens import AccessToken
+from api.authentication import user_snapshots
+from api.models import (
+    RFQ, Offer, Order, Company, Category, Document, Product, SupplierCategory, Notification, User,
+    ProductViewDaily, UserSession, VerificationCode
+)
+from api.offer_ranking import normalize_weights
+from api.order_state import InvalidTransition, order_state_machine
+from api.otp_store import otp_store
+from api.product_view_counter import product_view_counter
+from api.rate_limit import rate_limiter
+from api.session_tracker import session_tracker
+from api.realtime import encode, event_stream, get_bus, user_channel
 from api.tests.base import BaseAPITestCase
 
 
@@ -14,16 +37,9 @@ class AuthenticationViewTest(BaseAPITestCase):
     
     def test_user_registration(self):
         """Test user registration"""
-        from api.models import VerificationCode
-        
         # Avval telefon raqamini tasdiqlash
         phone = '+998901234590'
-        verification_code = VerificationCode.objects.create(
-            phone=phone,
-            code='123456',
-            expires_at=timezone.now() + timedelta(minutes=5)
-        )
-        verification_code.mark_as_used()  # Tasdiqlangan deb belgilash
+        otp_store.mark_verified(phone)
         
         url = reverse('user-register')
         data = {
@@ -41,6 +57,168 @@ class AuthenticationViewTest(BaseAPITestCase):
         self.assertIn('access', response.data['tokens'])
         self.assertIn('refresh', response.data['tokens'])
     
+    def test_sms_code_verification(self):
+        """Kod keshdan tekshiriladi, bir marta ishlatiladi, urinishlar cheklangan, audit commit dan keyin yoziladi"""
+        phone = '+998901234591'
+        url = reverse('verify-sms')
+        with self.captureOnCommitCallbacks(execute=True):
+            code = otp_store.issue(phone)
+        audit = VerificationCode.objects.get(phone=phone)
+        self.assertNotEqual(audit.code, code)
+        self.assertTrue(audit.code.endswith(code[-2:]))
+        
+        wrong = '000000' if code != '000000' else '111111'
+        response = self.client.post(url, {'phone': phone, 'code': wrong})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'phone': phone, 'code': code})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(otp_store.is_verified(phone))
+        audit.refresh_from_db()
+        self.assertIsNotNone(audit.used_at)
+        self.assertEqual(audit.attempts, 2)
+        
+        # Ishlatilgan kod qayta o'tmaydi
+        response = self.client.post(url, {'phone': phone, 'code': code})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        # Urinishlar tugagach to'g'ri kod ham qabul qilinmaydi
+        code = otp_store.issue(phone)
+        for _ in range(3):
+            self.client.post(url, {'phone': phone, 'code': wrong})
+        response = self.client.post(url, {'phone': phone, 'code': code})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+    
+    def test_login_rate_limited_by_phone(self):
+        """Login telefon bo'yicha cheklanadi, hisoblagichlar monitoring endpointida ko'rinadi"""
+        url = reverse('user-login')
+        data = {'phone': '+998901234567', 'password': 'wrongpass'}
+        with mock.patch.dict(rate_limiter.rates, {'login_phone': '2/min'}):
+            rate_limiter.reset('login_phone', data['phone'])
+            statuses = [self.client.post(url, data).status_code for _ in range(3)]
+            self.assertEqual(statuses[2], status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertNotEqual(statuses[1], status.HTTP_429_TOO_MANY_REQUESTS)
+            
+            # Boshqa telefon cheklanmaydi
+            response = self.client.post(url, {'phone': '+998901234568', 'password': 'testpass123'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.authenticate_user('admin')
+        response = self.client.get(reverse('rate-limit-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        scope = response.data['scopes']['login_phone']
+        self.assertGreaterEqual(scope['blocked'], 1)
+        self.assertLess(scope['avg_decision_ms'], 1)
+    
+    def test_sms_cooldown_is_one_period(self):
+        """Limit 1 (SMS qayta yuborish) - oyna chegarasidan qat'i nazar aniq 60 soniya"""
+        phone = '+998901111111'
+        rate_limiter.reset('sms_phone', phone, rate='1/min')
+        start = 1000 * 60 + 59  # oyna oxiri: sliding window keyingi oynada ham rad etardi
+        with mock.patch('api.rate_limit.time.time', return_value=start):
+            self.assertTrue(rate_limiter.hit('sms_phone', phone, rate='1/min').allowed)
+        with mock.patch('api.rate_limit.time.time', return_value=start + 30):
+            decision = rate_limiter.hit('sms_phone', phone, rate='1/min')
+            self.assertEqual((decision.allowed, decision.wait), (False, 30))
+        with mock.patch('api.rate_limit.time.time', return_value=start + 60):
+            self.assertTrue(rate_limiter.hit('sms_phone', phone, rate='1/min').allowed)
+    
+    def test_jwt_claims_and_user_snapshot(self):
+        """Token claimlari va keshlangan snapshot: rol tekshiruvi DB siz, o'zgarishda bekor qilinadi"""
+        response = self.client.post(
+            reverse('user-login'), {'phone': '+998901234568', 'password': 'testpass123'}
+        )
+        token = AccessToken(response.data['access'])
+        self.assertEqual(token['role'], User.UserRole.SUPPLIER)
+        self.assertEqual(token['supplier_type'], User.SupplierType.MANUFACTURER)
+        self.assertIsNone(token['company_id'])
+        
+        # Kesh bo'sh: bitta so'rov bilan bazadan, keyin snapshotdan
+        cache.delete(f'auth:user:{self.supplier_user.id}')
+        with self.assertNumQueries(1):
+            user = user_snapshots.get_user(token['user_id'])
+        with self.assertNumQueries(0):
+            self.assertTrue(user.is_supplier())
+            self.assertEqual((user.phone, user.first_name), ('+998901234568', 'Test'))
+            with self.assertRaises(Company.DoesNotExist):
+                user.company
+        
+        # Rol o'zgarsa eski token claimlari ishlatilmaydi
+        self.supplier_user.role = User.UserRole.BUYER
+        self.supplier_user.save()
+        with self.assertNumQueries(1):
+            user = user_snapshots.get_user(token['user_id'])
+        self.assertTrue(user.is_buyer())
+        
+        company = Company.objects.create(user=self.supplier_user, name='Snapshot MChJ')
+        with self.assertNumQueries(1):
+            user = user_snapshots.get_user(token['user_id'])
+        with self.assertNumQueries(0):
+            self.assertEqual(user.company_id, company.id)
+            user_snapshots.get_user(token['user_id'])
+    
+    def test_deactivated_user_rejected_after_cache_loss(self):
+        """Kesh yo'qolsa (restart, eviction) ham faolsizlantirilgan foydalanuvchi kira olmaydi"""
+        response = self.client.post(
+            reverse('user-login'), {'phone': '+998901234567', 'password': 'testpass123'}
+        )
+        User.objects.filter(pk=self.buyer_user.pk).update(is_active=False)
+        cache.clear()
+        user_snapshots._local.clear()
+        
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        response = self.client.get(reverse('notification-unread-count'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_session_activity_write_behind(self):
+        """Sessiya faolligi so'rovda yozilmaydi, paketlab flush qilinadi; eski sessiyalar yopiladi"""
+        response = self.client.post(
+            reverse('user-login'), {'phone': '+998901234567', 'password': 'testpass123'},
+            HTTP_USER_AGENT='MetOneX/1.0'
+        )
+        session_id = AccessToken(response.data['access'])['session_id']
+        session = UserSession.objects.get(pk=session_id)
+        self.assertEqual((session.user, session.user_agent), (self.buyer_user, 'MetOneX/1.0'))
+        
+        old = timezone.now() - timedelta(days=40)
+        UserSession.objects.filter(pk=session_id).update(last_activity=old)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        with mock.patch.object(session_tracker, 'flush_interval', 3600):
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(3):
+                    self.client.get(reverse('notification-unread-count'), REMOTE_ADDR='10.0.0.7')
+        self.assertFalse([query for query in queries if 'user_sessions' in query['sql']])
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(session_tracker.flush(), 1)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('CASE', queries[0]['sql'])
+        session.refresh_from_db()
+        self.assertGreater(session.last_activity, old)
+        self.assertEqual(session.ip_address, '10.0.0.7')
+        
+        UserSession.objects.filter(pk=session_id).update(last_activity=old)
+        self.assertEqual(session_tracker.expire(idle_days=30, chunk_size=1), 1)
+        self.assertFalse(UserSession.objects.get(pk=session_id).is_active)
+    
+    def test_session_invalid_ip_and_permanent_flush_error(self):
+        """Noto'g'ri X-Forwarded-For login ni buzmaydi; doimiy xato bergan paket qayta navbatga qo'yilmaydi"""
+        response = self.client.post(
+            reverse('user-login'), {'phone': '+998901234567', 'password': 'testpass123'},
+            HTTP_X_FORWARDED_FOR='unknown'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        session_id = AccessToken(response.data['access'])['session_id']
+        self.assertEqual(UserSession.objects.get(pk=session_id).ip_address, '0.0.0.0')
+        
+        with mock.patch.object(session_tracker, 'flush_interval', 3600):
+            session_tracker.touch(session_id, 'unknown')
+        self.assertEqual(session_tracker._pending[session_id][1], None)
+        
+        with mock.patch.object(session_tracker, '_write', side_effect=DataError('invalid input')):
+            self.assertEqual(session_tracker.flush(), 0)
+        self.assertEqual(session_tracker.pending, 0)
+    
     def test_user_login(self):
         """Test user login"""
         url = reverse('user-login')
@@ -281,6 +459,379 @@ class RFQViewTest(BaseAPITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertGreater(len(response.data), 0)
+    
+    def test_rfq_active_query_count(self):
+        """Test active RFQ list does not issue a query per RFQ"""
+        def create_rfq_with_offer():
+            rfq = RFQ.objects.create(
+                buyer=self.buyer_user,
+                category=self.category,
+                subcategory=self.subcategory,
+                unit=self.weight_unit,
+                volume=10.0,
+                delivery_location='Tashkent',
+                delivery_date='2024-12-31',
+                payment_method='bank',
+                expires_at=timezone.now() + timedelta(days=7)
+            )
+            Offer.objects.create(
+                rfq=rfq,
+                supplier=self.supplier_user,
+                price_per_unit=850.0,
+                total_amount=8500.0,
+                delivery_terms='Delivery included',
+                delivery_date=(timezone.now() + timedelta(days=30)).date()
+            )
+        
+        self.authenticate_user('supplier')
+        url = reverse('rfq-active')
+        self.client.get(url)  # foydalanuvchi snapshotini keshga yuklash
+        
+        create_rfq_with_offer()
+        with CaptureQueriesContext(connection) as single:
+            self.client.get(url)
+        
+        create_rfq_with_offer()
+        create_rfq_with_offer()
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(single), len(many))
+        self.assertEqual(response.data['results'][0]['offers_count'], 1)
+        self.assertEqual(response.data['results'][0]['offer_stats']['min_price'], '850.00')
+    
+    def test_rfq_matched_feed(self):
+        """Test supplier sees RFQs matched to their categories"""
+        SupplierCategory.objects.create(user=self.supplier_user, category=self.category)
+        rfqs = []
+        for location in ['Tashkent', 'Samarkand', 'Bukhara']:
+            with self.captureOnCommitCallbacks(execute=True):
+                rfqs.append(RFQ.objects.create(
+                    buyer=self.buyer_user,
+                    category=self.category,
+                    unit=self.weight_unit,
+                    volume=10.0,
+                    delivery_location=location,
+                    delivery_date='2024-12-31',
+                    payment_method='bank',
+                    expires_at=timezone.now() + timedelta(days=7)
+                ))
+        
+        self.authenticate_user('supplier')
+        url = reverse('rfq-matched')
+        response = self.client.get(url, {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']], [rfqs[2].id, rfqs[1].id])
+        
+        # Keyingi sahifa RFQMatch (created_at, id) cursori bo'yicha
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['id'] for item in response.data['results']], [rfqs[0].id])
+        
+        self.authenticate_user('buyer')
+        response = self.client.get(reverse('rfq-matched'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_rfq_accept_offer(self):
+        """Test offer acceptance is atomic and rejects sibling offers"""
+        rfq = RFQ.objects.create(
+            buyer=self.buyer_user,
+            category=self.category,
+            unit=self.weight_unit,
+            volume=10.0,
+            delivery_location='Tashkent',
+            delivery_date='2024-12-31',
+            payment_method='bank',
+            expires_at=timezone.now() + timedelta(days=7)
+        )
+        offers = [
+            Offer.objects.create(
+                rfq=rfq, supplier=self.supplier_user, price_per_unit=price,
+                total_amount=price * 10, delivery_terms='DAP', delivery_date='2025-01-15'
+            )
+            for price in (800, 900, 1000)
+        ]
+        
+        self.authenticate_user('supplier')
+        response = self.client.post(reverse('offer-accept', kwargs={'pk': offers[0].id}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        
+        self.authenticate_user('buyer')
+        url = reverse('rfq-accept-offer', kwargs={'pk': rfq.id})
+        response = self.client.post(url, {'offer_id': offers[1].id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['rejected_offers'], 2)
+        
+        order = Order.objects.get(id=response.data['order_id'])
+        self.assertEqual(order.offer_id, offers[1].id)
+        self.assertEqual(list(order.status_history.values_list('status', flat=True)), ['created'])
+        self.assertEqual(RFQ.objects.get(pk=rfq.pk).status, RFQ.RFQStatus.COMPLETED)
+        self.assertEqual(
+            dict(Offer.objects.filter(rfq=rfq).values_list('id', 'status')),
+            {offers[0].id: 'rejected', offers[1].id: 'accepted', offers[2].id: 'rejected'}
+        )
+        
+        # Takroriy bosish - ikkinchi buyurtma yaratilmaydi
+        response = self.client.post(url, {'offer_id': offers[2].id})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Order.objects.filter(rfq=rfq).count(), 1)
+    
+    def test_rfq_compare_offers(self):
+        """Test offers are ranked by weighted score"""
+        rfq = RFQ.objects.create(
+            buyer=self.buyer_user,
+            category=self.category,
+            unit=self.weight_unit,
+            volume=10.0,
+            delivery_location='Tashkent',
+            delivery_date='2024-12-31',
+            payment_method='bank',
+            expires_at=timezone.now() + timedelta(days=7)
+        )
+        today = timezone.now().date()
+        cheap_slow = Offer.objects.create(
+            rfq=rfq, supplier=self.supplier_user, price_per_unit=800, total_amount=8000,
+            delivery_terms='DAP', delivery_date=today + timedelta(days=30)
+        )
+        fast_expensive = Offer.objects.create(
+            rfq=rfq, supplier=self.supplier_user, price_per_unit=1000, total_amount=10000,
+            delivery_terms='DAP', delivery_date=today + timedelta(days=2)
+        )
+        Offer.objects.create(
+            rfq=rfq, supplier=self.supplier_user, price_per_unit=500, total_amount=5000,
+            delivery_terms='DAP', delivery_date=today, status=Offer.OfferStatus.REJECTED
+        )
+        url = reverse('rfq-compare-offers', kwargs={'pk': rfq.id})
+        
+        self.authenticate_user('buyer')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['results'][0]['offer']['id'], cheap_slow.id)
+        self.assertEqual(response.data['results'][0]['price_score'], 1.0)
+        self.assertEqual(response.data['results'][1]['lead_time_days'], 2)
+        
+        response = self.client.get(url, {'w_price': 1, 'w_delivery': 3, 'w_reliability': 0})
+        self.assertEqual(response.data['weights'], {'price': 0.25, 'delivery': 0.75, 'reliability': 0.0})
+        self.assertEqual(
+            [item['offer']['id'] for item in response.data['results']],
+            [fast_expensive.id, cheap_slow.id]
+        )
+        self.assertEqual(response.data['results'][0]['score'], 0.75)
+        
+        response = self.client.get(url, {'w_price': 0, 'w_delivery': 0, 'w_reliability': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for value in ('inf', 'nan'):
+            response = self.client.get(url, {'w_price': value})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(normalize_weights({'price': float(value)}), normalize_weights())
+        
+        self.authenticate_user('supplier')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_rfq_search_ranked(self):
+        """Test RFQ search view ranks brand matches above location matches"""
+        location_match = RFQ.objects.create(
+            buyer=self.buyer_user,
+            category=self.category,
+            unit=self.weight_unit,
+            volume=10.0,
+            delivery_location='Artel ombori',
+            delivery_date='2024-12-31',
+            payment_method='bank',
+            expires_at=timezone.now() + timedelta(days=7)
+        )
+        brand_match = RFQ.objects.create(
+            buyer=self.buyer_user,
+            category=self.category,
+            unit=self.weight_unit,
+            brand='Artel',
+            volume=10.0,
+            delivery_location='Tashkent',
+            delivery_date='2024-12-31',
+            payment_method='bank',
+            expires_at=timezone.now() + timedelta(days=7)
+        )
+        RFQ.objects.create(
+            buyer=self.buyer_user,
+            category=self.category,
+            unit=self.weight_unit,
+            brand='Boshqa',
+            volume=10.0,
+            delivery_location='Tashkent',
+            delivery_date='2024-12-31',
+            payment_method='bank',
+            expires_at=timezone.now() + timedelta(days=7)
+        )
+        
+        self.authenticate_user('supplier')
+        response = self.client.get(reverse('rfq-search'), {'search': 'artel', 'page_size': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']], [brand_match.id])
+        
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['id'] for item in response.data['results']], [location_match.id])
+        self.assertIsNone(response.data['next'])
+        
+        response = self.client.get(reverse('rfq-list'), {'search': 'artel'})
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [brand_match.id, location_match.id]
+        )
+    
+    def test_rfq_active_keyset_pagination(self):
+        """Test active RFQ list pages by (created_at, id) cursor"""
+        rfq_ids = []
+        for _ in range(5):
+            rfq = RFQ.objects.create(
+                buyer=self.buyer_user,
+                category=self.category,
+                subcategory=self.subcategory,
+                unit=self.weight_unit,
+                volume=10.0,
+                delivery_location='Tashkent',
+                delivery_date='2024-12-31',
+                payment_method='bank',
+                expires_at=timezone.now() + timedelta(days=7)
+            )
+            rfq_ids.append(rfq.id)
+        # Bir xil created_at bo'lgan yozuvlar id bo'yicha ajratiladi
+        RFQ.objects.filter(id__in=rfq_ids[:3]).update(created_at=timezone.now())
+        
+        self.authenticate_user('supplier')
+        url = reverse('rfq-active') + '?page_size=2'
+        
+        seen = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+            pages += 1
+        
+        self.assertEqual(pages, 3)
+        self.assertEqual(sorted(seen), sorted(rfq_ids))
+        
+        # Oxirgi sahifadan orqaga qaytish
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([item['id'] for item in response.data['results']], seen[2:4])
+        
+        response = self.client.get(reverse('rfq-active') + '?cursor=broken')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ProductViewTest(BaseAPITestCase):
+    """Test product views"""
+    
+    def setUp(self):
+        super().setUp()
+        self.create_test_data()
+    
+    def create_product(self, category, brand, base_price, **kwargs):
+        return Product.objects.create(
+            supplier=self.supplier_user,
+            category=category,
+            unit=self.weight_unit,
+            brand=brand,
+            grade='A500C',
+            base_price=base_price,
+            **kwargs
+        )
+    
+    def test_product_search_facets(self):
+        """Test product search returns hits with facet counts"""
+        other_category = Category.objects.create(
+            name='Truba', slug='truba', unit_type=Category.UnitType.WEIGHT
+        )
+        self.create_product(self.category, 'Artel', 50000)
+        self.create_product(self.category, 'Bekabad', 700000)
+        self.create_product(other_category, 'Artel', 2000000, is_featured=True)
+        self.create_product(other_category, 'Artel', 50000, is_active=False)
+        
+        self.authenticate_user('buyer')
+        url = reverse('product-search')
+        
+        # Filtrsiz - oldindan hisoblangan sonlar, kategoriya/sotuvchi turi GROUP BY siz
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+        sqls = [query['sql'] for query in queries.captured_queries]
+        self.assertTrue(any('product_facet_counts' in sql for sql in sqls))
+        self.assertFalse([
+            sql for sql in sqls if 'GROUP BY' in sql and ('supplier_type' in sql or '"category_id"' in sql)
+        ])
+        facets = response.data['facets']
+        self.assertEqual(
+            [(item['id'], item['count']) for item in facets['category']],
+            [(self.category.id, 2), (other_category.id, 1)]
+        )
+        self.assertEqual(
+            [(item['value'], item['count']) for item in facets['supplier_type']],
+            [('manufacturer', 3)]
+        )
+        self.assertEqual(
+            [item['count'] for item in facets['price_band']], [1, 0, 1, 1, 0, 0]
+        )
+        
+        # Filtr bilan - bitta GROUP BY so'rov
+        response = self.client.get(url, {'search': 'artel'})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(
+            [(item['id'], item['count']) for item in response.data['facets']['category']],
+            [(self.category.id, 1), (other_category.id, 1)]
+        )
+        self.assertEqual(
+            [item['count'] for item in response.data['facets']['price_band']], [1, 0, 0, 1, 0, 0]
+        )
+        
+        response = self.client.get(url, {'is_featured': 'true'})
+        self.assertEqual(len(response.data['results']), 1)
+    
+    def test_view_count_buffered_and_flushed(self):
+        """Test product views are counted in cache and flushed in bulk"""
+        cache.clear()
+        product = self.create_product(self.category, 'Artel', 50000)
+        other = self.create_product(self.category, 'Bekabad', 70000)
+        url = reverse('product-increment-view', kwargs={'pk': product.id})
+        self.authenticate_user('admin')
+        
+        # So'rovlar DB ga yozmaydi
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(3):
+                response = self.client.post(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([q for q in queries.captured_queries if 'UPDATE' in q['sql']])
+        self.client.post(reverse('product-increment-view', kwargs={'pk': other.id}))
+        self.client.post(reverse('product-increment-view', kwargs={'pk': 999999}))
+        response = self.client.post(reverse('product-increment-view', kwargs={'pk': 'abc'}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        product.refresh_from_db()
+        self.assertEqual(product.view_count, 0)
+        
+        flush_at = time.time() + 2 * product_view_counter.interval
+        stats = product_view_counter.flush(now=flush_at)
+        self.assertEqual((stats['products'], stats['views']), (2, 4))
+        product.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((product.view_count, other.view_count), (3, 1))
+        self.assertEqual(ProductViewDaily.objects.get(product=product).views, 3)
+        # Qayta flush ikki marta yozmaydi
+        self.assertEqual(product_view_counter.flush(now=flush_at)['views'], 0)
+        
+        self.authenticate_user('supplier')
+        response = self.client.get(reverse('product-analytics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        trend = {item['id']: item['views_trend'] for item in response.data}[product.id]
+        self.assertEqual(trend['last_7_days'], 3)
+        self.assertEqual(trend['daily'][-1]['views'], 3)
+        
+        # Flusher bir soatdan ko'p to'xtasa ham bo'lak yo'qolmaydi
+        product_view_counter.increment(product.id, now=flush_at)
+        stats = product_view_counter.flush(now=flush_at + 3 * 60 * 60)
+        self.assertEqual(stats['views'], 1)
 
 
 class OfferViewTest(BaseAPITestCase):
@@ -382,6 +933,35 @@ class OrderViewTest(BaseAPITestCase):
             delivery_date=(timezone.now() + timedelta(days=30)).date()
         )
     
+    def test_upload_ttn_rolled_back_on_conflict(self):
+        """Test TTN document is not kept when the status transition is rejected"""
+        order = Order.objects.create(
+            rfq=self.rfq,
+            offer=self.offer,
+            buyer=self.buyer_user,
+            supplier=self.supplier_user,
+            total_amount=8500.0,
+            payment_method='bank',
+            delivery_date=(timezone.now() + timedelta(days=30)).date(),
+            status=Order.OrderStatus.IN_PREPARATION
+        )
+        # Holatni tekshiruvdan keyin parallel so'rov o'zgartirgan holat
+        conflict = InvalidTransition('Buyurtma holati boshqa so\'rov tomonidan o\'zgartirildi', 409)
+        # Hujjat yuklash actionlari IsAdminUser talab qiladi
+        self.supplier_user.is_staff = True
+        self.supplier_user.save(update_fields=['is_staff'])
+        
+        self.authenticate_user('supplier')
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root), \
+                mock.patch.object(order_state_machine, 'transition', side_effect=conflict):
+            response = self.client.post(
+                reverse('order-upload-ttn', kwargs={'pk': order.id}),
+                {'file': SimpleUploadedFile('ttn.pdf', b'%PDF-1.4', content_type='application/pdf')}
+            )
+            self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+            self.assertFalse(Document.objects.filter(order=order).exists())
+            self.assertEqual([name for _, _, names in os.walk(media_root) for name in names], [])
+    
     def test_order_list(self):
         """Test order list view"""
         Order.objects.create(
@@ -420,6 +1000,175 @@ class OrderViewTest(BaseAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['total_amount'], '8500.00')
         self.assertEqual(response.data['payment_method'], 'bank')
+    
+    def test_order_status_feed(self):
+        """Holat lentasi: tomon bo'yicha, bir nechta holat va tablar soni"""
+        for order_status in ['created', 'created', 'awaiting_payment', 'completed']:
+            Order.objects.create(
+                rfq=self.rfq,
+                offer=self.offer,
+                buyer=self.buyer_user,
+                supplier=self.supplier_user,
+                total_amount=8500.0,
+                payment_method='bank',
+                delivery_date=(timezone.now() + timedelta(days=30)).date(),
+                status=order_status
+            )
+        
+        self.authenticate_user('buyer')
+        url = reverse('order-status-feed')
+        
+        response = self.client.get(url, {'status': 'created,awaiting_payment', 'side': 'buyer', 'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+        self.assertEqual(response.data['counts']['created'], 2)
+        self.assertEqual(response.data['counts']['awaiting_payment'], 1)
+        self.assertEqual(response.data['counts']['completed'], 1)
+        self.assertEqual(response.data['counts']['cancelled'], 0)
+        
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        
+        # Xaridor sotuvchi tomonida buyurtmaga ega emas
+        response = self.client.get(url, {'side': 'supplier'})
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(sum(response.data['counts'].values()), 0)
+        
+        response = self.client.get(reverse('order-created'))
+        self.assertEqual(len(response.data['results']), 2)
+        
+        response = self.client.get(url, {'status': 'unknown'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class NotificationViewTest(BaseAPITestCase):
+    """Test notification views"""
+    
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+    
+    def create_notification(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(
+                recipient_user=self.buyer_user,
+                type=kwargs.pop('type', Notification.NotificationType.INFO),
+                title='Salom',
+                message='Test',
+                **kwargs
+            )
+    
+    def test_unread_counter(self):
+        """Badge hisoblagichi yaratish va o'qishda atomik o'zgaradi"""
+        self.authenticate_user('buyer')
+        url = reverse('notification-unread-count')
+        
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['unread'], 0)
+        
+        first = self.create_notification()
+        self.create_notification()
+        self.create_notification(read_at=timezone.now())
+        # Hisoblagich va JWT foydalanuvchi snapshoti cache dan - bazaga so'rov yo'q
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.data['unread'], 2)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('notification-mark-read', kwargs={'pk': first.id}))
+        self.assertEqual(self.client.get(url).data['unread'], 1)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('notification-mark-all-read'))
+        self.assertEqual(self.client.get(url).data['unread'], 0)
+    
+    def test_notification_stats_single_query(self):
+        """Statistika bitta GROUP BY so'rov bilan"""
+        self.create_notification(type=Notification.NotificationType.NEW_RFQ)
+        self.create_notification(
+            type=Notification.NotificationType.NEW_RFQ,
+            delivery_method=Notification.DeliveryMethod.PUSH_ONLY,
+            read_at=timezone.now()
+        )
+        self.create_notification(type=Notification.NotificationType.NEW_OFFER)
+        
+        self.authenticate_user('buyer')
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('notification-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['total'], response.data['unread'], response.data['read']), (3, 2, 1))
+        self.assertEqual(response.data['by_type']['new_rfq'], 2)
+        self.assertEqual(response.data['by_type']['new_offer'], 1)
+        self.assertEqual(response.data['by_channel']['database_only'], 2)
+        self.assertEqual(response.data['by_channel']['push_only'], 1)
+    
+    def test_retention_archives_old_notifications(self):
+        """Eski xabarlar bo'laklab arxivga ko'chadi, my_notifications faqat issiq jadvalni o'qiydi"""
+        from api.models import NotificationArchive, NotificationOutbox
+        from api.notification_counter import unread_counter
+        from api.notification_retention import RETENTION_DAYS, notification_retention
+        
+        fresh = self.create_notification()
+        old = [self.create_notification() for _ in range(3)]
+        pending = self.create_notification(delivery_method=Notification.DeliveryMethod.SMS_ONLY)
+        NotificationOutbox.objects.create(notification=pending, channel=NotificationOutbox.Channel.SMS)
+        Notification.objects.exclude(id=fresh.id).update(
+            created_at=timezone.now() - timedelta(days=RETENTION_DAYS + 1)
+        )
+        self.assertEqual(unread_counter.get(self.buyer_user.id), 5)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            stats = notification_retention.run(chunk_size=2)
+        self.assertEqual((stats['archived'], stats['chunks']), (3, 2))
+        # Yetkazilishi tugamagan xabar arxivlanmaydi
+        self.assertEqual(set(Notification.objects.values_list('id', flat=True)), {fresh.id, pending.id})
+        self.assertEqual(
+            set(NotificationArchive.objects.values_list('id', flat=True)), {n.id for n in old}
+        )
+        self.assertEqual(unread_counter.get(self.buyer_user.id), 2)
+        
+        self.authenticate_user('buyer')
+        response = self.client.get(reverse('notification-my-notifications'))
+        self.assertEqual([item['id'] for item in response.data['results']], [fresh.id])
+        response = self.client.get(reverse('notification-archived'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+
+
+    async def test_notification_stream(self):
+        """SSE: Last-Event-ID dan keyingi xabarlar, heartbeat va jonli hodisalar"""
+        first = await sync_to_async(self.create_notification)()
+        second = await sync_to_async(self.create_notification)()
+        
+        stream = event_stream(self.buyer_user.id, last_id=first.id, heartbeat=0.05)
+        try:
+            self.assertTrue((await anext(stream)).startswith('retry:'))
+            event = await anext(stream)
+            self.assertTrue(event.startswith(f'id: {second.id}\nevent: notification\n'))
+            self.assertEqual(await anext(stream), ': heartbeat\n\n')
+            
+            third = await sync_to_async(self.create_notification)()
+            self.assertIn(f'id: {third.id}\n', await anext(stream))
+            
+            get_bus().publish(user_channel(self.buyer_user.id), encode('order_status', {'order_id': 7, 'status': 'cancelled'}))
+            event = await anext(stream)
+            self.assertTrue(event.startswith('event: order_status\n'))
+            self.assertIn('"status": "cancelled"', event)
+        finally:
+            await stream.aclose()
+    
+    async def test_notification_stream_requires_token(self):
+        """SSE: token bo'lmasa 401, ?token= bilan oqim ochiladi"""
+        url = reverse('notification-stream')
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+        response = await self.async_client.get(url, {'token': self.buyer_token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        await response.streaming_content.aclose()
 
 
 class PermissionTest(BaseAPITestCase):
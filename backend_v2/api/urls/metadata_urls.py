@@ -7,7 +7,8 @@ from ..views.metadata_views import (
     OrderStatusesView,
     RFQStatusesView,
     OfferStatusesView,
-    AllStatusesView
+    AllStatusesView,
+    RateLimitStatsView
 )
 
 metadata_urlpatterns = [
@@ -16,4 +17,7 @@ metadata_urlpatterns = [
     path('rfqs/statuses/', RFQStatusesView.as_view(), name='rfq-statuses'),
     path('offers/statuses/', OfferStatusesView.as_view(), name='offer-statuses'),
     path('statuses/', AllStatusesView.as_view(), name='all-statuses'),
+    
+    # Monitoring
+    path('rate-limits/', RateLimitStatsView.as_view(), name='rate-limit-stats'),
 ]
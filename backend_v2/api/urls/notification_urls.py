@@ -14,7 +14,10 @@ from ..views.notification_views import (
     NotificationBulkActionView,
     NotificationSettingsView,
     NotificationStatsView,
-    NotificationSearchView
+    NotificationUnreadCountView,
+    NotificationSearchView,
+    DeviceTokenView,
+    notification_stream
 )
 
 # Notification router
@@ -22,8 +25,15 @@ notification_router = DefaultRouter()
 notification_router.register(r'', NotificationViewSet, basename='notification')
 
 notification_urlpatterns = [
-    # Router URLs
-    path('', include(notification_router.urls)),
+    # Realtime oqim (SSE)
+    path('stream/', notification_stream, name='notification-stream'),
+    
+    # Badge va statistika
+    path('unread-count/', NotificationUnreadCountView.as_view(), name='notification-unread-count'),
+    path('stats/', NotificationStatsView.as_view(), name='notification-stats'),
+    
+    # Push qurilmalari
+    path('devices/', DeviceTokenView.as_view(), name='notification-devices'),
     
     # Additional notification endpoints
     path('list/', NotificationListView.as_view({'get': 'list'}), name='notification-list'),
@@ -37,7 +47,6 @@ notification_urlpatterns = [
     
     # Notification settings and stats
     path('settings/', NotificationSettingsView.as_view(), name='notification-settings'),
-    path('stats/', NotificationStatsView.as_view(), name='notification-stats'),
     
     # Notification search
     path('search/', NotificationSearchView.as_view(), name='notification-search'),
@@ -54,4 +63,7 @@ notification_urlpatterns = [
     path('mark-all-unread/', NotificationViewSet.as_view({'post': 'mark_all_unread'}), name='notification-mark-all-unread'),
     path('delete-read/', NotificationViewSet.as_view({'post': 'delete_read'}), name='notification-delete-read'),
     path('delete-old/', NotificationViewSet.as_view({'post': 'delete_old'}), name='notification-delete-old'),
+    
+    # Router URLs (qat'iy yo'llardan keyin - aks holda detail yo'li ularni egallaydi)
+    path('', include(notification_router.urls)),
 ]
@@ -32,16 +32,17 @@ order_urlpatterns = [
     path('my_orders/', OrderViewSet.as_view({'get': 'my_orders'}), name='order-my'),
     path('my_buyer_orders/', OrderViewSet.as_view({'get': 'buyer_orders'}), name='order-buyer'),
     path('my_supplier_orders/', OrderViewSet.as_view({'get': 'supplier_orders'}), name='order-supplier'),
-    path('created/', OrderViewSet.as_view({'get': 'created'}), name='order-created'),
-    path('awaiting_payment/', OrderViewSet.as_view({'get': 'awaiting_payment'}), name='order-awaiting-payment'),
-    path('payment_confirmed/', OrderViewSet.as_view({'get': 'payment_confirmed'}), name='order-payment-confirmed'),
-    path('ready_for_delivery/', OrderViewSet.as_view({'get': 'ready_for_delivery'}), name='order-ready-for-delivery'),
-    path('in_preparation/', OrderViewSet.as_view({'get': 'in_preparation'}), name='order-in-preparation'),
-    path('in_transit/', OrderViewSet.as_view({'get': 'in_transit'}), name='order-in-transit'),
-    path('delivered/', OrderViewSet.as_view({'get': 'delivered'}), name='order-delivered'),
-    path('confirmed/', OrderViewSet.as_view({'get': 'confirmed'}), name='order-confirmed'),
-    path('completed/', OrderViewSet.as_view({'get': 'completed'}), name='order-completed'),
-    path('cancelled/', OrderViewSet.as_view({'get': 'cancelled'}), name='order-cancelled'),
+    path('feed/', OrderViewSet.as_view({'get': 'status_feed'}), name='order-status-feed'),
+    path('created/', OrderViewSet.as_view({'get': 'status_feed'}, feed_statuses=['created']), name='order-created'),
+    path('awaiting_payment/', OrderViewSet.as_view({'get': 'status_feed'}, feed_statuses=['awaiting_payment']), name='order-awaiting-payment'),
+    path('payment_confirmed/', OrderViewSet.as_view({'get': 'status_feed'}, feed_statuses=['payment_confirmed']), name='order-payment-confirmed'),
+    path('ready_for_delivery/', OrderViewSet.as_view({'get': 'status_feed'}, feed_statuses=['ready_for_delivery']), name='order-ready-for-delivery'),
+    path('in_preparation/', OrderViewSet.as_view({'get': 'status_feed'}, feed_statuses=['in_preparation']), name='order-in-preparation'),
+    path('in_transit/', OrderViewSet.as_view({'get': 'status_feed'}, feed_statuses=['in_transit']), name='order-in-transit'),
+    path('delivered/', OrderViewSet.as_view({'get': 'status_feed'}, feed_statuses=['delivered']), name='order-delivered'),
+    path('confirmed/', OrderViewSet.as_view({'get': 'status_feed'}, feed_statuses=['confirmed']), name='order-confirmed'),
+    path('completed/', OrderViewSet.as_view({'get': 'status_feed'}, feed_statuses=['completed']), name='order-completed'),
+    path('cancelled/', OrderViewSet.as_view({'get': 'status_feed'}, feed_statuses=['cancelled']), name='order-cancelled'),
     
     # Order search
     path('search/', OrderSearchView.as_view(), name='order-search'),
@@ -63,6 +64,7 @@ order_urlpatterns = [
     path('<int:pk>/confirm-delivery/', OrderViewSet.as_view({'post': 'confirm_delivery'}), name='order-confirm-delivery'),
     path('<int:pk>/cancel/', OrderViewSet.as_view({'post': 'cancel'}), name='order-cancel'),
     path('<int:pk>/complete/', OrderViewSet.as_view({'post': 'complete'}), name='order-complete'),
+    path('bulk-status/', OrderViewSet.as_view({'post': 'bulk_status'}), name='order-bulk-status'),
     
     # Order documents (yangi Document model)
     path('<int:order_id>/documents/', OrderDocumentView.as_view(), name='order-documents-new'),
@@ -18,12 +18,12 @@ rfq_router = DefaultRouter()
 rfq_router.register(r'', RFQViewSet, basename='rfq')
 
 rfq_urlpatterns = [
+    # RFQ search (router dan oldin, aks holda 'search/' detail sifatida ushlanadi)
+    path('search/', RFQSearchView.as_view(), name='rfq-search'),
+    
     # Router URLs
     path('', include(rfq_router.urls)),
     
-    # RFQ search
-    path('search/', RFQSearchView.as_view(), name='rfq-search'),
-    
     # Custom RFQ actions
     path('my-rfqs/', RFQViewSet.as_view({'get': 'my_rfqs'}), name='rfq-my'),
     path('active/', RFQViewSet.as_view({'get': 'active'}), name='rfq-active'),
@@ -31,7 +31,9 @@ rfq_urlpatterns = [
     path('cancelled/', RFQViewSet.as_view({'get': 'cancelled'}), name='rfq-cancelled'),
     path('by-category/', RFQViewSet.as_view({'get': 'by_category'}), name='rfq-by-category'),
     path('by-buyer/', RFQViewSet.as_view({'get': 'by_buyer'}), name='rfq-by-buyer'),
+    path('matched/', RFQViewSet.as_view({'get': 'matched'}), name='rfq-matched'),
     path('<int:pk>/offers/', RFQViewSet.as_view({'get': 'offers'}), name='rfq-offers'),
+    path('<int:pk>/compare-offers/', RFQViewSet.as_view({'get': 'compare_offers'}), name='rfq-compare-offers'),
     path('<int:pk>/accept-offer/', RFQViewSet.as_view({'post': 'accept_offer'}), name='rfq-accept-offer'),
     path('<int:pk>/cancel/', RFQViewSet.as_view({'post': 'cancel'}), name='rfq-cancel'),
     path('<int:pk>/complete/', RFQViewSet.as_view({'post': 'complete'}), name='rfq-complete'),
@@ -107,7 +107,10 @@ from .notification_views import (
     NotificationBulkActionView,
     NotificationSettingsView,
     NotificationStatsView,
-    NotificationSearchView
+    NotificationUnreadCountView,
+    DeviceTokenView,
+    NotificationSearchView,
+    notification_stream
 )
 
 __all__ = [
@@ -208,5 +211,8 @@ __all__ = [
     'NotificationBulkActionView',
     'NotificationSettingsView',
     'NotificationStatsView',
+    'NotificationUnreadCountView',
+    'DeviceTokenView',
+    'notification_stream',
     'NotificationSearchView',
 ]
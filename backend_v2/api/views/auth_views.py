@@ -2,11 +2,7 @@
 Authentication views - Autentifikatsiya uchun views
 """
 
-import random
-import string
-from datetime import timedelta
 from django.utils import timezone
-from django.core.cache import cache
 from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -14,7 +10,11 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
 
-from ..models import User, VerificationCode
+from ..authentication import SnapshotRefreshToken
+from ..models import User
+from ..otp_store import OTPResult, otp_store
+from ..rate_limit import IPRateThrottle, PhoneRateThrottle, get_client_ip
+from ..session_tracker import SESSION_CLAIM, session_tracker
 from ..serializers import (
     UserRegistrationSerializer,
     SendSMSSerializer,
@@ -25,11 +25,28 @@ from ..serializers import (
 from ..sms_service import sms_service
 
 
+def otp_error_response(result):
+    """OTP tekshiruvi natijasi bo'yicha xato javobi"""
+    if result == OTPResult.LOCKED:
+        return Response({
+            'error': 'Urinishlar soni tugadi, yangi kod so\'rang'
+        }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    if result == OTPResult.EXPIRED:
+        return Response({
+            'error': 'Kod noto\'g\'ri yoki muddati tugagan'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        'error': 'Kod noto\'g\'ri'
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
 class SendSMSView(APIView):
     """
     SMS kod yuborish
     """
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [PhoneRateThrottle, IPRateThrottle]
+    throttle_scope = 'sms'
     
     def post(self, request):
         serializer = SendSMSSerializer(data=request.data)
@@ -38,22 +55,8 @@ class SendSMSView(APIView):
         
         phone = serializer.validated_data['phone']
         
-        # Rate limiting tekshirish
-        cache_key = f"sms_rate_limit_{phone}"
-        if cache.get(cache_key):
-            return Response({
-                'error': 'SMS kod yuborish uchun 60 soniya kutish kerak'
-            }, status=status.HTTP_429_TOO_MANY_REQUESTS)
-        
-        # SMS kod yaratish
-        code = ''.join(random.choices(string.digits, k=6))
-        
-        # VerificationCode yaratish
-        VerificationCode.objects.create(
-            phone=phone,
-            code=code,
-            expires_at=timezone.now() + timedelta(minutes=5)
-        )
+        # SMS kod yaratish (keshda, xeshlangan holda)
+        code = otp_store.issue(phone)
         
         # SMS yuborish - telefon raqamidan + belgisini olib tashlash
         try:
@@ -69,9 +72,6 @@ class SendSMSView(APIView):
                 'error': f'SMS yuborishda xatolik yuz berdi: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-        # Rate limiting qo'yish
-        cache.set(cache_key, True, 60)
-        
         return Response({
             'message': 'SMS kod yuborildi',
             'phone': phone
@@ -83,6 +83,8 @@ class VerifySMSView(APIView):
     SMS kodni tasdiqlash
     """
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [PhoneRateThrottle, IPRateThrottle]
+    throttle_scope = 'otp_verify'
     
     def post(self, request):
         serializer = UserPhoneVerificationSerializer(data=request.data)
@@ -92,33 +94,19 @@ class VerifySMSView(APIView):
         phone = serializer.validated_data['phone']
         code = serializer.validated_data['code']
         
-        # Kodni tekshirish
-        try:
-            verification_code = VerificationCode.objects.filter(
-                phone=phone,
-                code=code,
-                used_at__isnull=True
-            ).latest('created_at')
-            
-            if not verification_code.is_valid():
-                verification_code.increment_attempts()
-                return Response({
-                    'error': 'Kod noto\'g\'ri yoki muddati tugagan'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Kodni ishlatilgan deb belgilash
-            verification_code.mark_as_used()
-            
-            return Response({
-                'message': 'Kod tasdiqlandi',
-                'phone': phone,
-                'verified': True
-            }, status=status.HTTP_200_OK)
-            
-        except VerificationCode.DoesNotExist:
-            return Response({
-                'error': 'Kod noto\'g\'ri'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        # Kodni tekshirish va ishlatish (atomik)
+        result = otp_store.verify(phone, code)
+        if result != OTPResult.VALID:
+            return otp_error_response(result)
+        
+        # Ro'yxatdan o'tish uchun telefon tasdiqlangan deb belgilash
+        otp_store.mark_verified(phone)
+        
+        return Response({
+            'message': 'Kod tasdiqlandi',
+            'phone': phone,
+            'verified': True
+        }, status=status.HTTP_200_OK)
 
 
 class UserRegistrationView(APIView):
@@ -138,10 +126,7 @@ class UserRegistrationView(APIView):
         
         # Telefon raqami tasdiqlanganligini tekshirish
         phone = serializer.validated_data['phone']
-        if not VerificationCode.objects.filter(
-            phone=phone,
-            used_at__isnull=False
-        ).exists():
+        if not otp_store.is_verified(phone):
             return Response({
                 'error': 'Telefon raqami tasdiqlanmagan'
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -153,7 +138,8 @@ class UserRegistrationView(APIView):
         user.save()
         
         # JWT token yaratish
-        refresh = RefreshToken.for_user(user)
+        refresh = SnapshotRefreshToken.for_user(user)
+        refresh[SESSION_CLAIM] = session_tracker.start(user, request).id
         
         return Response({
             'message': 'Foydalanuvchi muvaffaqiyatli yaratildi',
@@ -170,6 +156,8 @@ class UserLoginView(TokenObtainPairView):
     Foydalanuvchi kirish
     """
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [PhoneRateThrottle, IPRateThrottle]
+    throttle_scope = 'login'
     
     def post(self, request, *args, **kwargs):
         response = super().post(request, *args, **kwargs)
@@ -180,21 +168,12 @@ class UserLoginView(TokenObtainPairView):
             
             # Oxirgi kirish vaqtini yangilash
             user.last_login_at = timezone.now()
-            user.last_login_ip = self.get_client_ip(request)
+            user.last_login_ip = get_client_ip(request)
             user.save(update_fields=['last_login_at', 'last_login_ip'])
             
             response.data['user'] = UserProfileSerializer(user).data
         
         return response
-    
-    def get_client_ip(self, request):
-        """Client IP manzilini olish"""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
 
 
 class UserLogoutView(APIView):
@@ -210,6 +189,10 @@ class UserLogoutView(APIView):
                 token = RefreshToken(refresh_token)
                 token.blacklist()
             
+            # Sessiyani yopish
+            if request.auth is not None:
+                session_tracker.end(request.auth.get(SESSION_CLAIM))
+            
             return Response({
                 'message': 'Muvaffaqiyatli chiqildi'
             }, status=status.HTTP_200_OK)
@@ -267,6 +250,8 @@ class SendPasswordChangeCodeView(APIView):
     Parol o'zgartirish uchun SMS kod yuborish
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [PhoneRateThrottle]
+    throttle_scope = 'sms'
     
     def post(self, request):
         user = request.user
@@ -277,22 +262,8 @@ class SendPasswordChangeCodeView(APIView):
                 'error': 'Telefon raqami kiritilmagan'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Rate limiting tekshirish
-        cache_key = f"password_change_rate_limit_{phone}"
-        if cache.get(cache_key):
-            return Response({
-                'error': 'SMS kod yuborish uchun 60 soniya kutish kerak'
-            }, status=status.HTTP_429_TOO_MANY_REQUESTS)
-        
-        # SMS kod yaratish
-        code = ''.join(random.choices(string.digits, k=6))
-        
-        # VerificationCode yaratish
-        VerificationCode.objects.create(
-            phone=phone,
-            code=code,
-            expires_at=timezone.now() + timedelta(minutes=5)
-        )
+        # SMS kod yaratish (keshda, xeshlangan holda)
+        code = otp_store.issue(phone)
         
         # SMS yuborish - telefon raqamidan + belgisini olib tashlash
         try:
@@ -308,9 +279,6 @@ class SendPasswordChangeCodeView(APIView):
                 'error': f'SMS yuborishda xatolik yuz berdi: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-        # Rate limiting qo'yish
-        cache.set(cache_key, True, 60)
-        
         return Response({
             'message': 'Parol o\'zgartirish kodi yuborildi',
             'phone': phone
@@ -322,6 +290,8 @@ class UserPhoneVerificationView(APIView):
     Telefon raqami tasdiqlash
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [PhoneRateThrottle, IPRateThrottle]
+    throttle_scope = 'otp_verify'
     
     def post(self, request):
         serializer = UserPhoneVerificationSerializer(data=request.data)
@@ -331,38 +301,21 @@ class UserPhoneVerificationView(APIView):
         phone = serializer.validated_data['phone']
         code = serializer.validated_data['code']
         
-        # Kodni tekshirish
-        try:
-            verification_code = VerificationCode.objects.filter(
-                phone=phone,
-                code=code,
-                used_at__isnull=True
-            ).latest('created_at')
-            
-            if not verification_code.is_valid():
-                verification_code.increment_attempts()
-                return Response({
-                    'error': 'Kod noto\'g\'ri yoki muddati tugagan'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Kodni ishlatilgan deb belgilash
-            verification_code.mark_as_used()
-            
-            # Foydalanuvchi telefonini yangilash
-            user = request.user
-            user.phone = phone
-            user.phone_verified = True
-            user.save()
-            
-            return Response({
-                'message': 'Telefon raqami tasdiqlandi',
-                'phone': phone
-            }, status=status.HTTP_200_OK)
-            
-        except VerificationCode.DoesNotExist:
-            return Response({
-                'error': 'Kod noto\'g\'ri'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        # Kodni tekshirish va ishlatish (atomik)
+        result = otp_store.verify(phone, code)
+        if result != OTPResult.VALID:
+            return otp_error_response(result)
+        
+        # Foydalanuvchi telefonini yangilash
+        user = request.user
+        user.phone = phone
+        user.phone_verified = True
+        user.save()
+        
+        return Response({
+            'message': 'Telefon raqami tasdiqlandi',
+            'phone': phone
+        }, status=status.HTTP_200_OK)
 
 
 class TokenRefreshView(TokenRefreshView):
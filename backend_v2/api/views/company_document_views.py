@@ -9,9 +9,9 @@ from rest_framework.views import APIView
 from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework_simplejwt.authentication import JWTAuthentication
 import uuid
 
+from ..authentication import SnapshotJWTAuthentication
 from ..models import Company, Document
 
 
@@ -19,7 +19,7 @@ class CompanyDocumentView(APIView):
     """
     Kompaniya hujjatlari uchun APIView - Document modelini ishlatadi
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [SnapshotJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
     
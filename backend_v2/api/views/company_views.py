@@ -301,9 +301,8 @@ class CompanyProfileView(APIView):
     def get(self, request):
         """Kompaniya profili ma'lumotlarini olish"""
         try:
-            # Refresh user to get latest company relationship
-            user = User.objects.get(pk=request.user.pk)
-            company = user.company
+            # Snapshot User.company_id ni biladi: kompaniya yo'q bo'lsa so'rov yuborilmaydi
+            company = request.user.company
             serializer = CompanyProfileSerializer(company)
             return Response(serializer.data)
         except Company.DoesNotExist:
@@ -9,6 +9,8 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.views import APIView
 
+from ..pagination import KeysetPaginationMixin
+from ..rate_limit import UserOrIPRateThrottle
 from ..models import Document
 from ..serializers import (
     DocumentSerializer,
@@ -111,11 +113,13 @@ class DocumentListView(viewsets.ReadOnlyModelViewSet):
         return Document.objects.select_related('user')
 
 
-class DocumentSearchView(APIView):
+class DocumentSearchView(KeysetPaginationMixin, APIView):
     """
     Hujjat qidiruv uchun View
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserOrIPRateThrottle]
+    throttle_scope = 'search'
     
     def get(self, request):
         """Hujjat qidiruv"""
@@ -132,6 +136,5 @@ class DocumentSearchView(APIView):
         if document_type:
             documents = documents.filter(document_type=document_type)
         
-        documents = documents.select_related('user')[:50]  # Limit 50 ta
-        serializer = DocumentSearchSerializer(documents, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        documents = documents.select_related('user')
+        return self.keyset_paginated_response(documents, DocumentSearchSerializer)
\ No newline at end of file
@@ -7,6 +7,7 @@ from rest_framework.response import Response
 from rest_framework import permissions
 
 from ..models import Order, RFQ, Offer
+from ..rate_limit import rate_limiter
 
 
 class OrderStatusesView(APIView):
@@ -106,3 +107,13 @@ class AllStatusesView(APIView):
                 for choice in Offer.OfferStatus.choices
             ]
         })
+
+
+class RateLimitStatsView(APIView):
+    """
+    Rate limiter hisoblagichlari (monitoring uchun, shu worker bo'yicha)
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        return Response(rate_limiter.stats())
@@ -2,19 +2,32 @@
 Notification views - Xabarnomalar uchun views
 """
 
-from django.db.models import Q
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Q
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from datetime import timedelta
 from rest_framework import viewsets, status, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken
 
-from ..models import Notification, User
+from ..authentication import SnapshotJWTAuthentication
+from ..device_tokens import device_tokens
+from ..notification_counter import unread_counter
+from ..notification_retention import hot_cutoff, notification_retention
+from ..pagination import KeysetPaginationMixin
+from ..rate_limit import UserOrIPRateThrottle
+from ..realtime import event_stream
+from ..models import DeviceToken, Notification, NotificationArchive, User
 from ..serializers import (
     NotificationSerializer,
     NotificationListSerializer,
+    NotificationArchiveSerializer,
+    DeviceTokenSerializer,
     NotificationCreateSerializer,
     NotificationSearchSerializer,
     NotificationSettingsSerializer,
@@ -22,7 +35,7 @@ from ..serializers import (
 )
 
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
     """
     Xabarnomalar uchun ViewSet
     """
@@ -49,7 +62,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
     
     def get_permissions(self):
         """Permission tekshirish"""
-        if self.action in ['list', 'retrieve', 'search', 'my_notifications']:
+        if self.action in ['list', 'retrieve', 'search', 'my_notifications', 'archived']:
+            permission_classes = [permissions.IsAuthenticated]
+        elif self.action in ['unread', 'read', 'mark_read', 'mark_unread', 'mark_all_read', 'mark_all_unread']:
+            # Faqat joriy foydalanuvchi xabarnomalari bilan ishlaydi
             permission_classes = [permissions.IsAuthenticated]
         elif self.action in ['create', 'update', 'partial_update']:
             permission_classes = [permissions.IsAuthenticated]
@@ -68,6 +84,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
         if notification.recipient_user != self.request.user and not self.request.user.is_staff:
             raise permissions.PermissionDenied("Siz bu xabarnomani yangilay olmaysiz")
         serializer.save()
+        unread_counter.invalidate(notification.recipient_user_id)
     
     def perform_destroy(self, instance):
         """Xabarnoma o'chirish"""
@@ -75,27 +92,34 @@ class NotificationViewSet(viewsets.ModelViewSet):
         if instance.recipient_user != self.request.user and not self.request.user.is_staff:
             raise permissions.PermissionDenied("Siz bu xabarnomani o'chira olmaysiz")
         instance.delete()
+        if instance.read_at is None:
+            unread_counter.decrement(instance.recipient_user_id)
     
     @action(detail=False, methods=['get'])
     def my_notifications(self, request):
-        """Joriy foydalanuvchi xabarnomalari"""
-        notifications = self.get_queryset().filter(recipient_user=request.user)
-        serializer = NotificationListSerializer(notifications, many=True)
-        return Response(serializer.data)
+        """Joriy foydalanuvchi xabarnomalari (faqat issiq - arxivlanmagan muddat ichidagilari)"""
+        notifications = self.get_queryset().filter(
+            recipient_user=request.user, created_at__gte=hot_cutoff()
+        )
+        return self.keyset_paginated_response(notifications, NotificationListSerializer)
+    
+    @action(detail=False, methods=['get'])
+    def archived(self, request):
+        """Joriy foydalanuvchining arxivlangan xabarnomalari"""
+        notifications = NotificationArchive.objects.filter(recipient_user=request.user)
+        return self.keyset_paginated_response(notifications, NotificationArchiveSerializer)
     
     @action(detail=False, methods=['get'])
     def unread(self, request):
         """O'qilmagan xabarnomalar"""
         notifications = self.get_queryset().filter(recipient_user=request.user, read_at__isnull=True)
-        serializer = NotificationListSerializer(notifications, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(notifications, NotificationListSerializer)
     
     @action(detail=False, methods=['get'])
     def read(self, request):
         """O'qilgan xabarnomalar"""
         notifications = self.get_queryset().filter(recipient_user=request.user, read_at__isnull=False)
-        serializer = NotificationListSerializer(notifications, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(notifications, NotificationListSerializer)
     
     @action(detail=False, methods=['get'])
     def by_type(self, request):
@@ -106,8 +130,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
                            status=status.HTTP_400_BAD_REQUEST)
         
         notifications = self.get_queryset().filter(recipient_user=request.user, type=notification_type)
-        serializer = NotificationListSerializer(notifications, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(notifications, NotificationListSerializer)
     
     @action(detail=False, methods=['get'])
     def by_channel(self, request):
@@ -118,8 +141,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
                            status=status.HTTP_400_BAD_REQUEST)
         
         notifications = self.get_queryset().filter(recipient_user=request.user, delivery_method=channel)
-        serializer = NotificationListSerializer(notifications, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(notifications, NotificationListSerializer)
     
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
@@ -128,8 +150,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
         if notification.recipient_user != request.user:
             raise permissions.PermissionDenied("Siz bu xabarnomani o'qilgan deb belgilay olmaysiz")
         
-        notification.read_at = timezone.now()
-        notification.save()
+        notification.mark_as_read()
         
         return Response({'message': 'Xabarnoma o\'qilgan deb belgilandi'})
     
@@ -140,36 +161,46 @@ class NotificationViewSet(viewsets.ModelViewSet):
         if notification.recipient_user != request.user:
             raise permissions.PermissionDenied("Siz bu xabarnomani o'qilmagan deb belgilay olmaysiz")
         
-        notification.read_at = None
-        notification.save()
+        notification.mark_as_unread()
         
         return Response({'message': 'Xabarnoma o\'qilmagan deb belgilandi'})
     
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """Barcha xabarnomalarni o'qilgan deb belgilash"""
-        Notification.objects.filter(recipient_user=request.user, read_at__isnull=True).update(read_at=timezone.now())
+        updated = Notification.objects.filter(
+            recipient_user=request.user, read_at__isnull=True
+        ).update(read_at=timezone.now())
+        unread_counter.decrement(request.user.id, updated)
         return Response({'message': 'Barcha xabarnomalar o\'qilgan deb belgilandi'})
     
     @action(detail=False, methods=['post'])
     def mark_all_unread(self, request):
         """Barcha xabarnomalarni o'qilmagan deb belgilash"""
-        Notification.objects.filter(recipient_user=request.user, read_at__isnull=False).update(read_at=None)
+        updated = Notification.objects.filter(
+            recipient_user=request.user, read_at__isnull=False
+        ).update(read_at=None)
+        unread_counter.increment(request.user.id, updated)
         return Response({'message': 'Barcha xabarnomalar o\'qilmagan deb belgilandi'})
     
     @action(detail=False, methods=['post'])
     def delete_read(self, request):
-        """O'qilgan xabarnomalarni o'chirish"""
-        Notification.objects.filter(recipient_user=request.user, read_at__isnull=False).delete()
-        return Response({'message': 'O\'qilgan xabarnomalar o\'chirildi'})
+        """O'qilgan xabarnomalarni o'chirish (bo'laklab)"""
+        deleted = notification_retention.delete_for_user(
+            Notification.objects.filter(recipient_user=request.user, read_at__isnull=False)
+        )
+        return Response({'message': 'O\'qilgan xabarnomalar o\'chirildi', 'deleted': deleted})
     
     @action(detail=False, methods=['post'])
     def delete_old(self, request):
-        """Eski xabarnomalarni o'chirish"""
+        """Eski xabarnomalarni o'chirish (bo'laklab)"""
         days = request.data.get('days', 30)
         cutoff_date = timezone.now() - timedelta(days=days)
-        Notification.objects.filter(recipient_user=request.user, created_at__lt=cutoff_date).delete()
-        return Response({'message': f'{days} kun oldingi xabarnomalar o\'chirildi'})
+        deleted = notification_retention.delete_for_user(
+            Notification.objects.filter(recipient_user=request.user, created_at__lt=cutoff_date)
+        )
+        unread_counter.invalidate(request.user.id)
+        return Response({'message': f'{days} kun oldingi xabarnomalar o\'chirildi', 'deleted': deleted})
 
 
 class NotificationListView(viewsets.ReadOnlyModelViewSet):
@@ -232,8 +263,7 @@ class NotificationMarkReadView(APIView):
         """Xabarnomani o'qilgan deb belgilash"""
         try:
             notification = Notification.objects.get(pk=pk, recipient_user=request.user)
-            notification.read_at = timezone.now()
-            notification.save()
+            notification.mark_as_read()
             
             return Response({'message': 'Xabarnoma o\'qilgan deb belgilandi'})
         except Notification.DoesNotExist:
@@ -251,8 +281,7 @@ class NotificationMarkUnreadView(APIView):
         """Xabarnomani o'qilmagan deb belgilash"""
         try:
             notification = Notification.objects.get(pk=pk, recipient_user=request.user)
-            notification.read_at = None
-            notification.save()
+            notification.mark_as_unread()
             
             return Response({'message': 'Xabarnoma o\'qilmagan deb belgilandi'})
         except Notification.DoesNotExist:
@@ -281,13 +310,16 @@ class NotificationBulkActionView(APIView):
         )
         
         if action_type == 'mark_read':
-            notifications.update(read_at=timezone.now())
+            updated = notifications.filter(read_at__isnull=True).update(read_at=timezone.now())
+            unread_counter.decrement(request.user.id, updated)
             return Response({'message': 'Xabarnomalar o\'qilgan deb belgilandi'})
         elif action_type == 'mark_unread':
-            notifications.update(read_at=None)
+            updated = notifications.filter(read_at__isnull=False).update(read_at=None)
+            unread_counter.increment(request.user.id, updated)
             return Response({'message': 'Xabarnomalar o\'qilmagan deb belgilandi'})
         elif action_type == 'delete':
             notifications.delete()
+            unread_counter.invalidate(request.user.id)
             return Response({'message': 'Xabarnomalar o\'chirildi'})
         else:
             return Response({'error': 'Noto\'g\'ri action'}, 
@@ -318,33 +350,123 @@ class NotificationStatsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        """Xabarnoma statistikasi"""
-        user_notifications = Notification.objects.filter(recipient_user=request.user)
+        """Xabarnoma statistikasi (bitta GROUP BY so'rov)"""
+        rows = Notification.objects.filter(recipient_user=request.user).order_by().values(
+            'type', 'delivery_method'
+        ).annotate(
+            total=Count('id'),
+            unread=Count('id', filter=Q(read_at__isnull=True))
+        )
         
         stats = {
-            'total': user_notifications.count(),
-            'unread': user_notifications.filter(read_at__isnull=True).count(),
-            'read': user_notifications.filter(read_at__isnull=False).count(),
-            'by_type': {},
-            'by_channel': {}
+            'total': 0,
+            'unread': 0,
+            'read': 0,
+            'by_type': dict.fromkeys(Notification.NotificationType.values, 0),
+            'by_channel': dict.fromkeys(Notification.DeliveryMethod.values, 0)
         }
+        for row in rows:
+            stats['total'] += row['total']
+            stats['unread'] += row['unread']
+            stats['by_type'][row['type']] = stats['by_type'].get(row['type'], 0) + row['total']
+            stats['by_channel'][row['delivery_method']] = (
+                stats['by_channel'].get(row['delivery_method'], 0) + row['total']
+            )
+        stats['read'] = stats['total'] - stats['unread']
         
-        # Tur bo'yicha statistikalar
-        for notification_type in ['new_rfq', 'offer_received', 'payment_received', 'order_update']:
-            stats['by_type'][notification_type] = user_notifications.filter(type=notification_type).count()
-        
-        # Kanal bo'yicha statistikalar
-        for channel in ['push', 'sms', 'email']:
-            stats['by_channel'][channel] = user_notifications.filter(delivery_method=channel).count()
-        
+        # Aniq son hisoblangani uchun hisoblagich ham yangilanadi
+        unread_counter.set(request.user.id, stats['unread'])
         return Response(stats)
 
 
-class NotificationSearchView(APIView):
+class NotificationUnreadCountView(APIView):
+    """
+    O'qilmagan xabarnomalar soni (badge uchun) - cache dagi hisoblagichdan
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        """O'qilmagan xabarnomalar soni"""
+        return Response({'unread': unread_counter.get(request.user.id)})
+
+
+class DeviceTokenView(APIView):
+    """
+    Joriy foydalanuvchi qurilmalarining push (FCM) tokenlari
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        """Ro'yxatdan o'tgan qurilmalar"""
+        devices = DeviceToken.objects.filter(user=request.user).order_by('-last_seen')
+        return Response(DeviceTokenSerializer(devices, many=True).data)
+    
+    def post(self, request):
+        """Tokenni ro'yxatga olish yoki last_seen ni yangilash (ilova har ochilganda)"""
+        serializer = DeviceTokenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        device = device_tokens.register(
+            request.user, serializer.validated_data['token'], serializer.validated_data.get('platform', '')
+        )
+        return Response(DeviceTokenSerializer(device).data, status=status.HTTP_201_CREATED)
+    
+    def delete(self, request):
+        """Tokenni o'chirish (logout)"""
+        token = request.data.get('token')
+        if not token:
+            return Response({'error': 'token parametri kerak'}, status=status.HTTP_400_BAD_REQUEST)
+        if not device_tokens.unregister(request.user, token):
+            return Response({'error': 'Token topilmadi'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def _stream_user(request):
+    """JWT orqali foydalanuvchini aniqlash: Authorization header yoki ?token= (EventSource header yubora olmaydi)"""
+    authenticator = SnapshotJWTAuthentication()
+    header = authenticator.get_header(request)
+    raw_token = authenticator.get_raw_token(header) if header else request.GET.get('token')
+    if not raw_token:
+        return None
+    try:
+        return authenticator.get_user(authenticator.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+async def notification_stream(request):
+    """
+    Realtime xabarlar oqimi (Server-Sent Events).
+    Hodisalar: notification (id bilan), offer_status, order_status; jimlikda heartbeat izohi.
+    Qayta ulanishda Last-Event-ID (yoki ?last_event_id=) dan keyingi notificationlar yuboriladi.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Faqat GET'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    
+    user = await sync_to_async(_stream_user)(request)
+    if user is None or not user.is_active:
+        return JsonResponse({'error': 'Autentifikatsiya talab qilinadi'}, status=status.HTTP_401_UNAUTHORIZED)
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return JsonResponse({'error': 'Noto\'g\'ri Last-Event-ID'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    response = StreamingHttpResponse(
+        event_stream(user.id, last_event_id), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class NotificationSearchView(KeysetPaginationMixin, APIView):
     """
     Xabarnoma qidirish uchun APIView
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserOrIPRateThrottle]
+    throttle_scope = 'search'
     
     def get(self, request):
         """Xabarnoma qidirish"""
@@ -379,5 +501,4 @@ class NotificationSearchView(APIView):
                 Q(message__icontains=search_term)
             )
         
-        serializer = NotificationListSerializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(queryset, NotificationListSerializer)
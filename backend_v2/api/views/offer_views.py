@@ -9,6 +9,10 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.views import APIView
 
+from ..offer_acceptance import OfferAcceptanceError, offer_acceptance_service
+from ..pagination import KeysetPaginationMixin
+from ..rate_limit import UserOrIPRateThrottle
+from ..realtime import publish_offer_status
 from ..models import Offer, CounterOffer, User
 from ..serializers import (
     OfferSerializer,
@@ -21,7 +25,7 @@ from ..serializers import (
 )
 
 
-class MyOffersView(APIView):
+class MyOffersView(KeysetPaginationMixin, APIView):
     """
     Standalone view for my_offers to bypass ViewSet permission issues
     """
@@ -42,11 +46,10 @@ class MyOffersView(APIView):
             return Response({'error': 'Noto\'g\'ri foydalanuvchi roli'}, 
                            status=status.HTTP_400_BAD_REQUEST)
         
-        serializer = OfferListSerializer(offers, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(offers, OfferListSerializer)
 
 
-class OfferViewSet(viewsets.ModelViewSet):
+class OfferViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
     """
     Takliflar uchun ViewSet
     """
@@ -122,36 +125,31 @@ class OfferViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Noto\'g\'ri foydalanuvchi roli'}, 
                            status=status.HTTP_400_BAD_REQUEST)
         
-        serializer = OfferListSerializer(offers, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(offers, OfferListSerializer)
     
     @action(detail=False, methods=['get'])
     def pending(self, request):
         """Kutilayotgan takliflar"""
         offers = self.get_queryset().filter(status='pending')
-        serializer = OfferListSerializer(offers, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(offers, OfferListSerializer)
     
     @action(detail=False, methods=['get'])
     def accepted(self, request):
         """Qabul qilingan takliflar"""
         offers = self.get_queryset().filter(status='accepted')
-        serializer = OfferListSerializer(offers, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(offers, OfferListSerializer)
     
     @action(detail=False, methods=['get'])
     def rejected(self, request):
         """Rad etilgan takliflar"""
         offers = self.get_queryset().filter(status='rejected')
-        serializer = OfferListSerializer(offers, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(offers, OfferListSerializer)
     
     @action(detail=False, methods=['get'])
     def counter_offered(self, request):
         """Counter-offer qilingan takliflar"""
         offers = self.get_queryset().filter(status='counter_offered')
-        serializer = OfferListSerializer(offers, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(offers, OfferListSerializer)
     
     @action(detail=False, methods=['get'])
     def by_rfq(self, request):
@@ -162,8 +160,7 @@ class OfferViewSet(viewsets.ModelViewSet):
                            status=status.HTTP_400_BAD_REQUEST)
         
         offers = self.get_queryset().filter(rfq_id=rfq_id)
-        serializer = OfferListSerializer(offers, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(offers, OfferListSerializer)
     
     @action(detail=False, methods=['get'])
     def by_supplier(self, request):
@@ -174,8 +171,7 @@ class OfferViewSet(viewsets.ModelViewSet):
                            status=status.HTTP_400_BAD_REQUEST)
         
         offers = self.get_queryset().filter(supplier_id=supplier_id)
-        serializer = OfferListSerializer(offers, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(offers, OfferListSerializer)
     
     @action(detail=True, methods=['get'])
     def counter_offers(self, request, pk=None):
@@ -282,52 +278,15 @@ class OfferAcceptView(APIView):
     def post(self, request, pk):
         """Taklifni qabul qilish"""
         try:
-            offer = Offer.objects.get(pk=pk)
-            # Faqat RFQ egasi qabul qila oladi
-            if offer.rfq.buyer != request.user:
-                return Response({'error': 'Siz bu taklifni qabul qila olmaysiz'}, 
-                               status=status.HTTP_403_FORBIDDEN)
-            
-            offer.status = 'accepted'
-            offer.save()
-            
-            # RFQ ni tugallangan deb belgilash
-            offer.rfq.status = 'completed'
-            offer.rfq.save()
-            
-            # Order yaratish
-            from ..models import Order
-            order = Order.objects.create(
-                rfq=offer.rfq,
-                offer=offer,
-                buyer=offer.rfq.buyer,
-                supplier=offer.supplier,
-                total_amount=offer.total_amount,
-                payment_method=offer.rfq.payment_method,
-                delivery_address=offer.rfq.delivery_location,
-                delivery_date=offer.delivery_date,
-                status='created'
-            )
-            # if offer.rfq.payment_method == 'bank':
-            #     # Bank to'lov uchun - Didox API chaqirish kerak
-            #     order.status = 'contract_generated'  # Didox API dan keyin
-            #     # Didox API chaqirish
-            #     # didox_service.create_contract(order)
-            #     # didox_service.create_invoice(order)
-            #     # order.status = 'awaiting_payment'
-            # else:  # cash
-            #     # Naqd to'lov uchun - to'g'ridan-to'g'ri tayyorlash
-            #     order.status = 'in_preparation'
-            # order.save()    
-            # return order
-            
-            return Response({
-                'message': 'Taklif qabul qilindi',
-                'order_id': order.id
-            })
-        except Offer.DoesNotExist:
-            return Response({'error': 'Taklif topilmadi'}, 
-                           status=status.HTTP_404_NOT_FOUND)
+            result = offer_acceptance_service.accept(pk, request.user)
+        except OfferAcceptanceError as e:
+            return Response({'error': e.message}, status=e.status_code)
+        
+        return Response({
+            'message': 'Taklif qabul qilindi',
+            'order_id': result['order'].id,
+            'rejected_offers': result['rejected_count']
+        })
 
 
 class OfferRejectView(APIView):
@@ -347,7 +306,8 @@ class OfferRejectView(APIView):
             
             offer.status = 'rejected'
             offer.rejection_reason = request.data.get('reason', '')
-            offer.save()
+            offer.save(update_fields=['status', 'rejection_reason', 'updated_at'])
+            publish_offer_status(offer.pk, offer.rfq_id, offer.status, [offer.supplier_id])
             
             return Response({'message': 'Taklif rad etildi'})
         except Offer.DoesNotExist:
@@ -462,11 +422,13 @@ class CounterOfferRejectView(APIView):
                            status=status.HTTP_404_NOT_FOUND)
 
 
-class OfferSearchView(APIView):
+class OfferSearchView(KeysetPaginationMixin, APIView):
     """
     Taklif qidirish uchun APIView
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserOrIPRateThrottle]
+    throttle_scope = 'search'
     
     def get(self, request):
         """Taklif qidirish"""
@@ -504,5 +466,4 @@ class OfferSearchView(APIView):
                 Q(comment__icontains=search_term)
             )
         
-        serializer = OfferListSerializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(queryset, OfferListSerializer)
@@ -6,8 +6,8 @@ from rest_framework.views import APIView
 from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from ..authentication import SnapshotJWTAuthentication
 from ..models import Order, Document
 
 
@@ -24,7 +24,7 @@ class OrderDocumentView(APIView):
     - INVOICE - Hisob varaqi  
     - TTN - Transport hujjati
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [SnapshotJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
     
@@ -2,13 +2,17 @@
 Order views - Buyurtmalar uchun views
 """
 
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Q
 from rest_framework import viewsets, status, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.views import APIView
 
+from ..order_state import InvalidTransition, order_state_machine
+from ..pagination import KeysetPaginationMixin
+from ..rate_limit import UserOrIPRateThrottle
 from ..models import Order, OrderDocument, OrderStatusHistory, Document
 from django.utils import timezone
 from ..serializers import (
@@ -22,7 +26,7 @@ from ..serializers import (
 )
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
     """
     Buyurtmalar uchun ViewSet
     """
@@ -34,6 +38,8 @@ class OrderViewSet(viewsets.ModelViewSet):
     search_fields = ['contract_url', 'invoice_url']
     ordering_fields = ['created_at', 'delivery_date', 'total_amount']
     ordering = ['-created_at']
+    # URL da qat'iy belgilangan holat (masalan, orders/created/) - status_feed uchun
+    feed_statuses = None
     
     def get_queryset(self):
         """Queryset optimizatsiyasi"""
@@ -58,7 +64,8 @@ class OrderViewSet(viewsets.ModelViewSet):
     
     def get_permissions(self):
         """Permission tekshirish"""
-        if self.action in ['list', 'retrieve', 'search', 'my_orders', 'buyer_orders', 'supplier_orders']:
+        if self.action in ['list', 'retrieve', 'search', 'my_orders', 'buyer_orders', 'supplier_orders',
+                           'status_feed']:
             permission_classes = [permissions.IsAuthenticated]
         elif self.action in ['create', 'update', 'partial_update', 'destroy']:
             permission_classes = [permissions.IsAuthenticated]
@@ -91,92 +98,65 @@ class OrderViewSet(viewsets.ModelViewSet):
         orders = self.get_queryset().filter(
             Q(buyer=request.user) | Q(supplier=request.user)
         )
-        serializer = OrderListSerializer(orders, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(orders, OrderListSerializer)
     
     @action(detail=False, methods=['get'])
     def buyer_orders(self, request):
         """Sotib oluvchi buyurtmalari"""
         orders = self.get_queryset().filter(buyer=request.user)
-        serializer = OrderListSerializer(orders, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(orders, OrderListSerializer)
     
     @action(detail=False, methods=['get'])
     def supplier_orders(self, request):
         """Sotuvchi buyurtmalari"""
         orders = self.get_queryset().filter(supplier=request.user)
-        serializer = OrderListSerializer(orders, many=True)
-        return Response(serializer.data)
-    
-    @action(detail=False, methods=['get'])
-    def created(self, request):
-        """Yaratilgan buyurtmalar"""
-        orders = self.get_queryset().filter(status='created')
-        serializer = OrderListSerializer(orders, many=True)
-        return Response(serializer.data)
-    
-    @action(detail=False, methods=['get'])
-    def payment_confirmed(self, request):
-        """To'lov tasdiqlangan buyurtmalar"""
-        orders = self.get_queryset().filter(status='payment_confirmed')
-        serializer = OrderListSerializer(orders, many=True)
-        return Response(serializer.data)
-    
-    @action(detail=False, methods=['get'])
-    def awaiting_payment(self, request):
-        """To'lov kutayotgan buyurtmalar"""
-        orders = self.get_queryset().filter(status='awaiting_payment')
-        serializer = OrderListSerializer(orders, many=True)
-        return Response(serializer.data)
-    
-    @action(detail=False, methods=['get'])
-    def ready_for_delivery(self, request):
-        """Yetkazib berishga tayyor buyurtmalar"""
-        orders = self.get_queryset().filter(status='ready_for_delivery')
-        serializer = OrderListSerializer(orders, many=True)
-        return Response(serializer.data)
-    
-    @action(detail=False, methods=['get'])
-    def in_preparation(self, request):
-        """Tayyorlanayotgan buyurtmalar"""
-        orders = self.get_queryset().filter(status='in_preparation')
-        serializer = OrderListSerializer(orders, many=True)
-        return Response(serializer.data)
-    
-    @action(detail=False, methods=['get'])
-    def in_transit(self, request):
-        """Yetkazilayotgan buyurtmalar"""
-        orders = self.get_queryset().filter(status='in_transit')
-        serializer = OrderListSerializer(orders, many=True)
-        return Response(serializer.data)
-    
-    @action(detail=False, methods=['get'])
-    def delivered(self, request):
-        """Yetkazilgan buyurtmalar"""
-        orders = self.get_queryset().filter(status='delivered')
-        serializer = OrderListSerializer(orders, many=True)
-        return Response(serializer.data)
-    
-    @action(detail=False, methods=['get'])
-    def confirmed(self, request):
-        """Tasdiqlangan buyurtmalar"""
-        orders = self.get_queryset().filter(status='confirmed')
-        serializer = OrderListSerializer(orders, many=True)
-        return Response(serializer.data)
-    
-    @action(detail=False, methods=['get'])
-    def completed(self, request):
-        """Tugallangan buyurtmalar"""
-        orders = self.get_queryset().filter(status='completed')
-        serializer = OrderListSerializer(orders, many=True)
-        return Response(serializer.data)
-    
-    @action(detail=False, methods=['get'])
-    def cancelled(self, request):
-        """Bekor qilingan buyurtmalar"""
-        orders = self.get_queryset().filter(status='cancelled')
-        serializer = OrderListSerializer(orders, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(orders, OrderListSerializer)
+    
+    @action(detail=False, methods=['get'], url_path='feed')
+    def status_feed(self, request):
+        """
+        Holatlar bo'yicha buyurtmalar lentasi.
+        ?status=created,awaiting_payment - bir nechta holat (vergul bilan yoki takroriy parametr)
+        ?side=buyer|supplier - faqat xaridor yoki sotuvchi tomoni
+        Javobda sahifa va tablar uchun har bir holat bo'yicha sonlar (counts) qaytadi.
+        """
+        statuses = self.feed_statuses or [
+            value
+            for param in request.query_params.getlist('status')
+            for value in param.split(',') if value
+        ]
+        invalid = set(statuses) - set(Order.OrderStatus.values)
+        if invalid:
+            return Response(
+                {'error': f'Noto\'g\'ri holat: {", ".join(sorted(invalid))}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        side = request.query_params.get('side')
+        if side == 'buyer':
+            scoped = Order.objects.filter(buyer=request.user)
+        elif side == 'supplier':
+            scoped = Order.objects.filter(supplier=request.user)
+        elif side:
+            return Response({'error': 'side buyer yoki supplier bo\'lishi kerak'}, 
+                           status=status.HTTP_400_BAD_REQUEST)
+        else:
+            scoped = Order.objects.filter(Q(buyer=request.user) | Q(supplier=request.user))
+        
+        orders = scoped.select_related(
+            'buyer', 'supplier', 'rfq__category', 'rfq__unit'
+        )
+        if statuses:
+            orders = orders.filter(status__in=statuses)
+        response = self.keyset_paginated_response(orders, OrderListSerializer)
+        
+        # Tablar uchun sonlar - bitta GROUP BY
+        counts = dict.fromkeys(Order.OrderStatus.values, 0)
+        counts.update(
+            scoped.order_by().values('status').annotate(total=Count('id')).values_list('status', 'total')
+        )
+        response.data['counts'] = counts
+        return response
     
     @action(detail=True, methods=['post'])
     def confirm_payment(self, request, pk=None):
@@ -195,18 +175,16 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        order.payment_confirmed_by_seller = True
-        order.payment_confirmed_at = timezone.now()
-        order.status = Order.OrderStatus.PAYMENT_CONFIRMED
-        order.save()
-        
-        # Status history ga qo'shish
-        OrderStatusHistory.objects.create(
-            order=order,
-            status=order.status,
-            comment='Sotuvchi tomonidan to\'lov tasdiqlangan',
-            created_by=request.user
-        )
+        try:
+            order_state_machine.transition(
+                order,
+                Order.OrderStatus.PAYMENT_CONFIRMED,
+                request.user,
+                payment_confirmed_by_seller=True,
+                payment_confirmed_at=timezone.now()
+            )
+        except InvalidTransition as e:
+            return Response({'error': e.message}, status=e.status_code)
         
         return Response({'message': 'To\'lov muvaffaqiyatli tasdiqlandi'})
     
@@ -240,7 +218,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         )
         
         order.payment_proof_document = document
-        order.save()
+        order.save(update_fields=['payment_proof_document', 'updated_at'])
         
         return Response({'message': 'To\'lov hujjati muvaffaqiyatli yuklandi'})
     
@@ -261,29 +239,31 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # TTN hujjatini yuklash
-        document = Document.objects.create(
-            title=f"TTN hujjati - Order {order.id}",
-            file=request.FILES['file'],
-            user=request.user,
-            order=order,
-            document_type='ttn',
-            file_name=request.FILES['file'].name,
-            file_size=request.FILES['file'].size,
-            content_type=request.FILES['file'].content_type
-        )
-        
-        order.ttn_document = document
-        order.status = Order.OrderStatus.IN_TRANSIT
-        order.save()
-        
-        # Status history ga qo'shish
-        OrderStatusHistory.objects.create(
-            order=order,
-            status=order.status,
-            comment='TTN hujjati yuklandi, mahsulot yo\'lda',
-            created_by=request.user
-        )
+        # TTN hujjati va holat o'tishi bitta tranzaksiyada - o'tish rad etilsa hujjat qolmaydi
+        document = None
+        try:
+            with transaction.atomic():
+                document = Document.objects.create(
+                    title=f"TTN hujjati - Order {order.id}",
+                    file=request.FILES['file'],
+                    user=request.user,
+                    order=order,
+                    document_type='ttn',
+                    file_name=request.FILES['file'].name,
+                    file_size=request.FILES['file'].size,
+                    content_type=request.FILES['file'].content_type
+                )
+                order_state_machine.transition(
+                    order,
+                    Order.OrderStatus.IN_TRANSIT,
+                    request.user,
+                    comment='TTN hujjati yuklandi, mahsulot yo\'lda',
+                    ttn_document=document
+                )
+        except InvalidTransition as e:
+            if document is not None:
+                document.file.delete(save=False)
+            return Response({'error': e.message}, status=e.status_code)
         
         return Response({'message': 'TTN hujjati muvaffaqiyatli yuklandi'})
     
@@ -311,7 +291,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         )
         
         order.contract_document = document
-        order.save()
+        order.save(update_fields=['contract_document', 'updated_at'])
         
         return Response({'message': 'Shartnoma hujjati muvaffaqiyatli yuklandi'})
     
@@ -339,7 +319,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         )
         
         order.invoice_document = document
-        order.save()
+        order.save(update_fields=['invoice_document', 'updated_at'])
         
         return Response({'message': 'Hisob-faktura hujjati muvaffaqiyatli yuklandi'})
     
@@ -351,8 +331,10 @@ class OrderViewSet(viewsets.ModelViewSet):
         if order.buyer != request.user:
             raise permissions.PermissionDenied("Siz bu buyurtma yetkazishini tasdiqlay olmaysiz")
         
-        order.status = 'confirmed'
-        order.save()
+        try:
+            order_state_machine.transition(order, Order.OrderStatus.CONFIRMED, request.user)
+        except InvalidTransition as e:
+            return Response({'error': e.message}, status=e.status_code)
         
         return Response({'message': 'Yetkazish tasdiqlandi'})
     
@@ -364,8 +346,10 @@ class OrderViewSet(viewsets.ModelViewSet):
         if order.buyer != request.user and order.supplier != request.user:
             raise permissions.PermissionDenied("Siz bu buyurtmani bekor qila olmaysiz")
         
-        order.status = 'cancelled'
-        order.save()
+        try:
+            order_state_machine.transition(order, Order.OrderStatus.CANCELLED, request.user)
+        except InvalidTransition as e:
+            return Response({'error': e.message}, status=e.status_code)
         
         return Response({'message': 'Buyurtma bekor qilindi'})
     
@@ -377,10 +361,33 @@ class OrderViewSet(viewsets.ModelViewSet):
         if not request.user.is_staff:
             raise permissions.PermissionDenied("Siz bu buyurtmani tugallay olmaysiz")
         
-        order.status = 'completed'
-        order.save()
+        try:
+            order_state_machine.transition(order, Order.OrderStatus.COMPLETED, request.user)
+        except InvalidTransition as e:
+            return Response({'error': e.message}, status=e.status_code)
         
         return Response({'message': 'Buyurtma tugallandi'})
+    
+    @action(detail=False, methods=['post'])
+    def bulk_status(self, request):
+        """Ko'p buyurtma holatini bir vaqtda o'zgartirish (admin)"""
+        order_ids = request.data.get('order_ids')
+        new_status = request.data.get('status')
+        if not isinstance(order_ids, list) or not new_status:
+            return Response({'error': 'order_ids (ro\'yxat) va status kerak'}, 
+                           status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            result = order_state_machine.bulk_transition(
+                order_ids, new_status, request.user, comment=request.data.get('comment')
+            )
+        except InvalidTransition as e:
+            return Response({'error': e.message}, status=e.status_code)
+        except (TypeError, ValueError):
+            return Response({'error': 'order_ids butun sonlar ro\'yxati bo\'lishi kerak'}, 
+                           status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(result)
 
 
 class OrderListView(viewsets.ReadOnlyModelViewSet):
@@ -491,16 +498,10 @@ class OrderStatusUpdateView(APIView):
                                status=status.HTTP_400_BAD_REQUEST)
             
             # Holat yangilash logikasi
-            order.status = new_status
-            order.save()
-            
-            # Status history ga qo'shish
-            OrderStatusHistory.objects.create(
-                order=order,
-                status=new_status,
-                comment=comment,
-                created_by=request.user
-            )
+            try:
+                order_state_machine.transition(order, new_status, request.user, comment=comment)
+            except InvalidTransition as e:
+                return Response({'error': e.message}, status=e.status_code)
             
             return Response({'message': 'Buyurtma holati yangilandi'})
         except Order.DoesNotExist:
@@ -556,11 +557,13 @@ class OrderStatusHistoryViewSet(viewsets.ModelViewSet):
         serializer.save(created_by=self.request.user)
 
 
-class OrderSearchView(APIView):
+class OrderSearchView(KeysetPaginationMixin, APIView):
     """
     Buyurtma qidirish uchun APIView
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserOrIPRateThrottle]
+    throttle_scope = 'search'
     
     def get(self, request):
         """Buyurtma qidirish"""
@@ -601,5 +604,4 @@ class OrderSearchView(APIView):
                 Q(payment_reference__icontains=search_term)
             )
         
-        serializer = OrderListSerializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(queryset, OrderListSerializer)
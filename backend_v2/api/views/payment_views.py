@@ -10,6 +10,8 @@ from rest_framework import viewsets, status, permissions, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from ..pagination import KeysetPaginationMixin
+from ..rate_limit import UserOrIPRateThrottle
 from ..models import Payment, Order, User
 from ..serializers import (
     PaymentSerializer,
@@ -332,11 +334,13 @@ class PaymentRefundView(APIView):
                            status=status.HTTP_404_NOT_FOUND)
 
 
-class PaymentSearchView(APIView):
+class PaymentSearchView(KeysetPaginationMixin, APIView):
     """
     To'lov qidirish uchun APIView
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserOrIPRateThrottle]
+    throttle_scope = 'search'
     
     def get(self, request):
         """To'lov qidirish"""
@@ -375,8 +379,7 @@ class PaymentSearchView(APIView):
                 Q(transaction_id__icontains=search_term)
             )
         
-        serializer = PaymentListSerializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(queryset, PaymentListSerializer)
 
 
 class PaymentAnalyticsView(APIView):
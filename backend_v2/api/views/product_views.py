@@ -2,12 +2,17 @@
 Product views - Mahsulotlar uchun views
 """
 
-from django.db.models import Q, Count, Avg
+from django.db.models import Count, Avg
 from rest_framework import viewsets, status, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.views import APIView
+
+from ..pagination import KeysetPaginationMixin
+from ..rate_limit import UserOrIPRateThrottle
+from ..product_search import product_search_service
+from ..product_view_counter import product_view_counter, recent_views_prefetch
 from ..models import Product, User, Category, SubCategory, Unit, Factory
 from ..serializers import (
     ProductSerializer,
@@ -19,7 +24,7 @@ from ..serializers import (
 )
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
     """
     Mahsulotlar uchun ViewSet
     """
@@ -84,15 +89,13 @@ class ProductViewSet(viewsets.ModelViewSet):
                            status=status.HTTP_400_BAD_REQUEST)
         
         products = self.get_queryset().filter(supplier=request.user)
-        serializer = ProductListSerializer(products, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(products, ProductListSerializer)
     
     @action(detail=False, methods=['get'])
     def featured(self, request):
         """Taniqli mahsulotlar"""
         products = self.get_queryset().filter(is_featured=True, is_active=True)
-        serializer = ProductListSerializer(products, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(products, ProductListSerializer)
     
     @action(detail=False, methods=['get'])
     def by_category(self, request):
@@ -103,8 +106,7 @@ class ProductViewSet(viewsets.ModelViewSet):
                            status=status.HTTP_400_BAD_REQUEST)
         
         products = self.get_queryset().filter(category_id=category_id, is_active=True)
-        serializer = ProductListSerializer(products, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(products, ProductListSerializer)
     
     @action(detail=False, methods=['get'])
     def by_supplier(self, request):
@@ -115,68 +117,29 @@ class ProductViewSet(viewsets.ModelViewSet):
                            status=status.HTTP_400_BAD_REQUEST)
         
         products = self.get_queryset().filter(supplier_id=supplier_id, is_active=True)
-        serializer = ProductListSerializer(products, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(products, ProductListSerializer)
     
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Mahsulot qidirish"""
+        """Mahsulot qidirish (facet hisoblari bilan)"""
         serializer = ProductSearchSerializer(data=request.query_params)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        queryset = self.get_queryset().filter(is_active=True)
-        filters = serializer.validated_data
-        
-        # Kategoriya bo'yicha filter
-        if filters.get('category_id'):
-            queryset = queryset.filter(category_id=filters['category_id'])
-        
-        # Sub-kategoriya bo'yicha filter
-        if filters.get('subcategory_id'):
-            queryset = queryset.filter(category__subcategories__id=filters['subcategory_id'])
-        
-        # Brend bo'yicha filter
-        if filters.get('brand'):
-            queryset = queryset.filter(brand__icontains=filters['brand'])
-        
-        # Marka bo'yicha filter
-        if filters.get('grade'):
-            queryset = queryset.filter(grade__icontains=filters['grade'])
-        
-        # Narx bo'yicha filter
-        if filters.get('min_price'):
-            queryset = queryset.filter(base_price__gte=filters['min_price'])
-        if filters.get('max_price'):
-            queryset = queryset.filter(base_price__lte=filters['max_price'])
-        
-        # Sotuvchi turi bo'yicha filter
-        if filters.get('supplier_type'):
-            queryset = queryset.filter(supplier__supplier_type=filters['supplier_type'])
-        
-        # Taniqli mahsulotlar
-        if filters.get('is_featured') is not None:
-            queryset = queryset.filter(is_featured=filters['is_featured'])
-        
-        # Qidiruv matni
-        if filters.get('search'):
-            search_term = filters['search']
-            queryset = queryset.filter(
-                Q(brand__icontains=search_term) |
-                Q(grade__icontains=search_term) |
-                Q(material__icontains=search_term) |
-                Q(origin_country__icontains=search_term)
-            )
-        
-        serializer = ProductListSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset, facets = product_search_service.search(serializer.validated_data)
+        response = self.keyset_paginated_response(queryset, ProductListSerializer)
+        response.data['facets'] = facets
+        return response
     
     @action(detail=True, methods=['post'])
     def increment_view(self, request, pk=None):
-        """Ko'rishlar sonini oshirish"""
-        product = self.get_object()
-        product.view_count += 1
-        product.save(update_fields=['view_count'])
+        """Ko'rishlar sonini oshirish (keshda, DB ga flush_product_views yozadi)"""
+        try:
+            product_id = int(pk)
+        except (TypeError, ValueError):
+            return Response({'error': 'Mahsulot topilmadi'},
+                           status=status.HTTP_404_NOT_FOUND)
+        product_view_counter.increment(product_id)
         return Response({'message': 'Ko\'rishlar soni oshirildi'})
     
     @action(detail=False, methods=['get'])
@@ -186,7 +149,9 @@ class ProductViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Faqat sotuvchilar analytics ko\'ra oladi'}, 
                            status=status.HTTP_400_BAD_REQUEST)
         
-        products = self.get_queryset().filter(supplier=request.user)
+        products = self.get_queryset().filter(supplier=request.user).prefetch_related(
+            recent_views_prefetch()
+        )
         serializer = ProductAnalyticsSerializer(products, many=True)
         return Response(serializer.data)
 
@@ -278,54 +243,24 @@ class ProductUpdateView(APIView):
                            status=status.HTTP_404_NOT_FOUND)
 
 
-class ProductSearchView(APIView):
+class ProductSearchView(KeysetPaginationMixin, APIView):
     """
     Mahsulot qidirish uchun APIView
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserOrIPRateThrottle]
+    throttle_scope = 'search'
     
     def get(self, request):
-        """Mahsulot qidirish"""
+        """Mahsulot qidirish (facet hisoblari bilan)"""
         serializer = ProductSearchSerializer(data=request.query_params)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        queryset = Product.objects.select_related(
-            'supplier', 'category', 'unit'
-        ).filter(is_active=True)
-        
-        filters = serializer.validated_data
-        
-        # Filterlar
-        if filters.get('category_id'):
-            queryset = queryset.filter(category_id=filters['category_id'])
-        if filters.get('subcategory_id'):
-            queryset = queryset.filter(category__subcategories__id=filters['subcategory_id'])
-        if filters.get('brand'):
-            queryset = queryset.filter(brand__icontains=filters['brand'])
-        if filters.get('grade'):
-            queryset = queryset.filter(grade__icontains=filters['grade'])
-        if filters.get('min_price'):
-            queryset = queryset.filter(base_price__gte=filters['min_price'])
-        if filters.get('max_price'):
-            queryset = queryset.filter(base_price__lte=filters['max_price'])
-        if filters.get('supplier_type'):
-            queryset = queryset.filter(supplier__supplier_type=filters['supplier_type'])
-        if filters.get('is_featured') is not None:
-            queryset = queryset.filter(is_featured=filters['is_featured'])
-        
-        # Qidiruv matni
-        if filters.get('search'):
-            search_term = filters['search']
-            queryset = queryset.filter(
-                Q(brand__icontains=search_term) |
-                Q(grade__icontains=search_term) |
-                Q(material__icontains=search_term) |
-                Q(origin_country__icontains=search_term)
-            )
-        
-        serializer = ProductListSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset, facets = product_search_service.search(serializer.validated_data)
+        response = self.keyset_paginated_response(queryset, ProductListSerializer)
+        response.data['facets'] = facets
+        return response
 
 
 class ProductAnalyticsView(APIView):
@@ -342,7 +277,7 @@ class ProductAnalyticsView(APIView):
         
         products = Product.objects.filter(supplier=request.user).select_related(
             'supplier', 'category'
-        )
+        ).prefetch_related(recent_views_prefetch())
         
         serializer = ProductAnalyticsSerializer(products, many=True)
         return Response(serializer.data)
@@ -2,7 +2,6 @@
 RFQ views - Request for Quote uchun views
 """
 
-from django.db.models import Q
 from rest_framework import viewsets, status, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -10,34 +9,41 @@ from rest_framework.exceptions import PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.views import APIView
 
+from ..pagination import CreatedAtKeysetPagination, KeysetPaginationMixin, SearchRankKeysetPagination
+from ..rate_limit import UserOrIPRateThrottle
+from ..offer_acceptance import OfferAcceptanceError, offer_acceptance_service
+from ..offer_ranking import offer_ranking_service
+from ..rfq_matching import rfq_matching_engine
+from ..search import RFQSearchFilter
 from ..models import RFQ, User, Category, SubCategory, Unit
 from ..serializers import (
     RFQSerializer,
     RFQListSerializer,
     RFQCreateSerializer,
     RFQUpdateSerializer,
-    RFQSearchSerializer
+    RFQSearchSerializer,
+    OfferComparisonQuerySerializer,
+    OfferComparisonSerializer
 )
 
 
-class RFQViewSet(viewsets.ModelViewSet):
+class RFQViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
     """
     RFQ lar uchun ViewSet
     """
     queryset = RFQ.objects.all()
     serializer_class = RFQSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, RFQSearchFilter]
     filterset_fields = ['buyer', 'category', 'status']
-    search_fields = ['brand', 'grade']
     ordering_fields = ['created_at', 'delivery_date']
     ordering = ['-created_at']
     
     def get_queryset(self):
         """Queryset optimizatsiyasi"""
         return RFQ.objects.select_related(
-            'buyer', 'category', 'unit'
-        ).prefetch_related('buyer__company')
+            'buyer', 'category', 'subcategory', 'unit'
+        ).prefetch_related('buyer__company').with_offer_stats()
     
     def get_serializer_class(self):
         """Action bo'yicha serializer tanlash"""
@@ -63,7 +69,7 @@ class RFQViewSet(viewsets.ModelViewSet):
     
     def get_permissions(self):
         """Permission tekshirish"""
-        if self.action in ['list', 'retrieve', 'search', 'my_rfqs', 'active', 'completed', 'cancelled', 'by_category', 'by_buyer', 'offers']:
+        if self.action in ['list', 'retrieve', 'search', 'my_rfqs', 'active', 'completed', 'cancelled', 'by_category', 'by_buyer', 'matched', 'offers', 'compare_offers']:
             permission_classes = [permissions.IsAuthenticated]
         elif self.action in ['create', 'update', 'partial_update', 'destroy', 'accept_offer', 'cancel', 'complete']:
             permission_classes = [permissions.IsAuthenticated]
@@ -100,29 +106,25 @@ class RFQViewSet(viewsets.ModelViewSet):
                            status=status.HTTP_400_BAD_REQUEST)
         
         rfqs = self.get_queryset().filter(buyer=request.user)
-        serializer = RFQListSerializer(rfqs, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(rfqs, RFQListSerializer)
     
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Faol RFQ lar"""
         rfqs = self.get_queryset().filter(status='active')
-        serializer = RFQListSerializer(rfqs, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(rfqs, RFQListSerializer)
     
     @action(detail=False, methods=['get'])
     def completed(self, request):
         """Tugallangan RFQ lar"""
         rfqs = self.get_queryset().filter(status='completed')
-        serializer = RFQListSerializer(rfqs, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(rfqs, RFQListSerializer)
     
     @action(detail=False, methods=['get'])
     def cancelled(self, request):
         """Bekor qilingan RFQ lar"""
         rfqs = self.get_queryset().filter(status='cancelled')
-        serializer = RFQListSerializer(rfqs, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(rfqs, RFQListSerializer)
     
     @action(detail=False, methods=['get'])
     def by_category(self, request):
@@ -133,8 +135,29 @@ class RFQViewSet(viewsets.ModelViewSet):
                            status=status.HTTP_400_BAD_REQUEST)
         
         rfqs = self.get_queryset().filter(category_id=category_id, status='active')
-        serializer = RFQListSerializer(rfqs, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(rfqs, RFQListSerializer)
+    
+    @action(detail=False, methods=['get'])
+    def matched(self, request):
+        """Sotuvchiga mos faol RFQ lar (matching engine lentasi)"""
+        if request.user.role != User.UserRole.SUPPLIER:
+            return Response({'error': 'Faqat sotuvchilar uchun'}, 
+                           status=status.HTTP_400_BAD_REQUEST)
+        
+        # Sahifa rfq_matches (supplier, created_at) indeksi bo'yicha kesiladi,
+        # keyin sahifadagi RFQ lar bitta so'rovda yuklanadi
+        paginator = CreatedAtKeysetPagination()
+        matches = paginator.paginate_queryset(
+            rfq_matching_engine.matched_feed(request.user), request, view=self
+        )
+        rfqs = RFQ.objects.filter(id__in=[match.rfq_id for match in matches]).select_related(
+            'buyer', 'category', 'subcategory', 'unit'
+        ).with_offer_stats().in_bulk()
+        # Ikki so'rov orasida o'chirilgan RFQ lar tashlab yuboriladi
+        serializer = RFQListSerializer(
+            [rfqs[match.rfq_id] for match in matches if match.rfq_id in rfqs], many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def by_buyer(self, request):
@@ -145,17 +168,38 @@ class RFQViewSet(viewsets.ModelViewSet):
                            status=status.HTTP_400_BAD_REQUEST)
         
         rfqs = self.get_queryset().filter(buyer_id=buyer_id)
-        serializer = RFQListSerializer(rfqs, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(rfqs, RFQListSerializer)
     
     @action(detail=True, methods=['get'])
     def offers(self, request, pk=None):
         """RFQ takliflari"""
         rfq = self.get_object()
-        offers = rfq.offers.all()
+        offers = rfq.offers.select_related('supplier', 'rfq__category', 'rfq__unit')
         from ..serializers import OfferListSerializer
-        serializer = OfferListSerializer(offers, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(offers, OfferListSerializer)
+    
+    @action(detail=True, methods=['get'], url_path='compare-offers')
+    def compare_offers(self, request, pk=None):
+        """RFQ takliflarini vaznli ball bo'yicha solishtirish"""
+        rfq = self.get_object()
+        if rfq.buyer != request.user and not request.user.is_staff:
+            raise PermissionDenied("Takliflarni faqat RFQ egasi solishtira oladi")
+        
+        serializer = OfferComparisonQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        weights, ranked = offer_ranking_service.rank(
+            rfq,
+            weights=serializer.get_weights(),
+            include_rejected=serializer.validated_data['include_rejected']
+        )
+        return Response({
+            'rfq_id': rfq.id,
+            'weights': {key: round(value, 4) for key, value in weights.items()},
+            'count': len(ranked),
+            'results': OfferComparisonSerializer(ranked, many=True).data,
+        })
     
     @action(detail=True, methods=['post'])
     def accept_offer(self, request, pk=None):
@@ -168,18 +212,18 @@ class RFQViewSet(viewsets.ModelViewSet):
                            status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            offer = rfq.offers.get(id=offer_id)
-            offer.status = 'accepted'
-            offer.save()
-            
-            # RFQ ni tugallangan deb belgilash
-            rfq.status = 'completed'
-            rfq.save()
-            
-            return Response({'message': 'Taklif qabul qilindi'})
-        except Exception as e:
+            result = offer_acceptance_service.accept(offer_id, request.user, rfq_id=rfq.id)
+        except OfferAcceptanceError as e:
+            return Response({'error': e.message}, status=e.status_code)
+        except (TypeError, ValueError):
             return Response({'error': 'Taklif topilmadi'}, 
                            status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({
+            'message': 'Taklif qabul qilindi',
+            'order_id': result['order'].id,
+            'rejected_offers': result['rejected_count']
+        })
     
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
@@ -211,9 +255,8 @@ class RFQListView(viewsets.ReadOnlyModelViewSet):
     queryset = RFQ.objects.all()
     serializer_class = RFQListSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, RFQSearchFilter]
     filterset_fields = ['buyer', 'category', 'status']
-    search_fields = ['brand', 'grade']
     ordering_fields = ['created_at', 'delivery_date']
     ordering = ['-created_at']
     
@@ -221,7 +264,7 @@ class RFQListView(viewsets.ReadOnlyModelViewSet):
         """Queryset optimizatsiyasi"""
         return RFQ.objects.select_related(
             'buyer', 'category', 'unit'
-        ).filter(status='active')
+        ).filter(status='active').with_offer_stats()
 
 
 class RFQDetailView(viewsets.ReadOnlyModelViewSet):
@@ -235,11 +278,11 @@ class RFQDetailView(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         """Queryset optimizatsiyasi"""
         return RFQ.objects.select_related(
-            'buyer', 'category', 'unit'
+            'buyer', 'category', 'subcategory', 'unit'
         ).prefetch_related(
             'buyer__company',
             'offers__supplier'
-        )
+        ).with_offer_stats()
 
 
 class RFQCreateView(APIView):
@@ -293,11 +336,13 @@ class RFQUpdateView(APIView):
                            status=status.HTTP_404_NOT_FOUND)
 
 
-class RFQSearchView(APIView):
+class RFQSearchView(KeysetPaginationMixin, APIView):
     """
     RFQ qidirish uchun APIView
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserOrIPRateThrottle]
+    throttle_scope = 'search'
     serializer_class = RFQSearchSerializer
     
     def get(self, request):
@@ -308,7 +353,7 @@ class RFQSearchView(APIView):
         
         queryset = RFQ.objects.select_related(
             'buyer', 'category', 'unit'
-        ).filter(status='active')
+        ).filter(status='active').with_offer_stats()
         
         filters = serializer.validated_data
         
@@ -330,14 +375,11 @@ class RFQSearchView(APIView):
         if filters.get('payment_method'):
             queryset = queryset.filter(payment_method=filters['payment_method'])
         
-        # Qidiruv matni
+        # Qidiruv matni - full-text, relevantlik bo'yicha saralanadi
         if filters.get('search'):
-            search_term = filters['search']
-            queryset = queryset.filter(
-                Q(brand__icontains=search_term) |
-                Q(grade__icontains=search_term) |
-                Q(delivery_location__icontains=search_term)
+            queryset = queryset.search(filters['search'])
+            return self.keyset_paginated_response(
+                queryset, RFQListSerializer, pagination_class=SearchRankKeysetPagination
             )
         
-        serializer = RFQListSerializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.keyset_paginated_response(queryset, RFQListSerializer)
@@ -3,6 +3,9 @@ ASGI config for backend_v2 project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Realtime xabarlar oqimi (notifications/stream/) uchun ASGI server bilan ishga tushiring:
+    uvicorn core.asgi:application --workers 4
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -11,6 +14,6 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend_v2.settings")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 application = get_asgi_application()
@@ -146,7 +146,7 @@ CORS_ALLOW_ALL_ORIGINS = DEBUG
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.SnapshotJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -174,6 +174,8 @@ SIMPLE_JWT = {
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    # role, supplier_type, company_id, is_staff claimlari bilan (api.authentication)
+    'TOKEN_OBTAIN_SERIALIZER': 'api.authentication.SnapshotTokenObtainPairSerializer',
 }
 
 # OpenAPI/Swagger Configuration
@@ -190,6 +192,27 @@ ESKIZ_EMAIL = os.environ.get('ESKIZ_EMAIL', '')
 ESKIZ_PASSWORD = os.environ.get('ESKIZ_PASSWORD', '')
 ESKIZ_SENDER = os.environ.get('ESKIZ_SENDER', '4546')
 
+# Kesh: REDIS_URL berilsa Redis (OTP kodlari, rate limit), aks holda process xotirasi
+REDIS_URL = os.environ.get('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+# OTP, rate limit, auth snapshot va ko'rishlar hisoblagichi processlar o'rtasida umumiy
+# kesh talab qiladi: yoqilgan bo'lsa process xotirasidagi kesh system check xatosi (api.E001)
+SHARED_CACHE_REQUIRED = os.environ.get('SHARED_CACHE_REQUIRED', str(not DEBUG)).lower() == 'true'
+
+# OTP kodlari keshda saqlanadi; VerificationCode jadvali faqat audit jurnali
+OTP_TTL_SECONDS = int(os.environ.get('OTP_TTL_SECONDS', 300))
+OTP_MAX_ATTEMPTS = int(os.environ.get('OTP_MAX_ATTEMPTS', 3))
+OTP_AUDIT_LOG = os.environ.get('OTP_AUDIT_LOG', 'True').lower() == 'true'
+
+# Firebase va Eskiz xizmatlarini process ishga tushganda yaratish (odatda - birinchi murojaatda)
+SERVICES_EAGER_INIT = os.environ.get('SERVICES_EAGER_INIT', 'False').lower() == 'true'
+
 # Push Notification Service (Firebase Admin SDK)
 FIREBASE_CONFIG = {
     'PROJECT_ID': os.environ.get('FIREBASE_PROJECT_ID', ''),